@@ -6,6 +6,7 @@ from dotenv import load_dotenv
 from .utils import APIException, generate_sitemap
 from .config import Config
 from .db import db
+from .serializers import FastJSONProvider
 
 # Load environment variables from .env file
 load_dotenv()
@@ -16,10 +17,15 @@ from .routes.users import users_bp
 from .routes.orgs import orgs_bp
 from .routes.admin import admin_api_bp
 from .routes.oauth import oauth_bp
+from .routes.reference import reference_bp
+from .routes.events import events_bp
 
 app = Flask(__name__)
 app.url_map.strict_slashes = False
 
+# jsonify() encodes through orjson when it is installed
+app.json = FastJSONProvider(app)
+
 # Load configuration from Config class (which reads environment variables)
 app.config.from_object(Config)
 
@@ -27,6 +33,37 @@ MIGRATE = Migrate(app, db)
 db.init_app(app)
 CORS(app)
 
+# Buffered view/bookmark counters, flushed in the background and at exit;
+# each flush also updates the time-decayed trending scores
+from .services.counter_service import CounterService
+from .services.trending_service import TrendingService
+CounterService.init_app(app)
+TrendingService.init_app(app)
+
+# Two-tier read-through cache for organization reads
+from .services.cache_service import CacheService
+CacheService.init_app(app)
+
+# Categories and locations, held in memory and reloaded when their version moves
+from .services.reference_service import ReferenceService
+ReferenceService.init_app(app)
+
+# Typeahead index for /orgs/suggest, built on first use
+from .services.suggest_service import SuggestService
+SuggestService.init_app(app)
+
+# Near-duplicate detection for registrations, built on first use
+from .services.duplicate_service import DuplicateService
+DuplicateService.init_app(app)
+
+# Live change events for /events/orgs, optionally shared through Redis pub/sub
+from .services.event_service import EventService
+EventService.init_app(app)
+
+# Password hashing on a process pool, with old hashes upgraded at login
+from .services.password_service import PasswordService
+PasswordService.init_app(app)
+
 # Initialize JWT (if available)
 jwt = None
 try:
@@ -36,6 +73,11 @@ except ImportError:
 	print("Warning: flask-jwt-extended not installed. JWT features will not be available.")
 	pass
 
+# Role claims in access tokens, revoked through a cached per-user token version
+if jwt is not None:
+	from .services.token_service import TokenService
+	TokenService.init_app(app, jwt)
+
 # Import and setup admin (avoid circular import)
 try:
 	from .admin_setup import setup_admin
@@ -50,6 +92,8 @@ app.register_blueprint(users_bp)
 app.register_blueprint(orgs_bp)
 app.register_blueprint(admin_api_bp)
 app.register_blueprint(oauth_bp)
+app.register_blueprint(reference_bp)
+app.register_blueprint(events_bp)
 
 @app.errorhandler(APIException)
 def handle_invalid_usage(error):
@@ -64,6 +108,16 @@ def health_check():
 	"""Basic health check endpoint"""
 	return jsonify({"status": "healthy", "message": "API is running"}), 200
 
+@app.route('/health/cache')
+def cache_health():
+	"""Cache hit/miss/eviction metrics per tier"""
+	return jsonify(CacheService.metrics()), 200
+
+@app.route('/health/events')
+def events_health():
+	"""Open event streams and fan-out counters for this worker"""
+	return jsonify(EventService.metrics()), 200
+
 if __name__ == '__main__':
 	PORT = int(os.environ.get('PORT', 3000))
 	app.run(host='0.0.0.0', port=PORT, debug=False)
@@ -1,14 +1,16 @@
 import os
 from datetime import datetime, timedelta
 from flask_admin import Admin, AdminIndexView, expose
+from flask_admin.actions import action
 from flask_admin.contrib.sqla import ModelView
-from flask import redirect, url_for
+from flask import abort, flash, redirect, request, url_for
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
 from wtforms import StringField, BooleanField, SelectField, PasswordField
 from wtforms.validators import DataRequired, Email
-from werkzeug.security import generate_password_hash
 from flask_admin.form import BaseForm
 from .db import db
 from .models import User
+from .services.password_service import PasswordService
 
 class DashboardView(AdminIndexView):
     """Custom admin home dashboard with statistics and quick actions"""
@@ -93,10 +95,25 @@ class SecureModelView(ModelView):
         # return redirect(url_for('auth.login'))
         return "Access Denied - Admin privileges required"
 
+    @expose('/stream-export/<fmt>/')
+    def stream_export(self, fmt):
+        """Stream every row of this model as NDJSON or CSV in constant memory"""
+        from .services.export_service import ExportService, EXPORT_FORMATS
+        if fmt not in EXPORT_FORMATS:
+            abort(404)
+        columns = ExportService.columns_for(self.model, exclude=self.column_export_exclude_list or ())
+        return ExportService.response(
+            columns,
+            fmt,
+            self.model.__tablename__,
+            compress=request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+        )
+
 class UserModelView(SecureModelView):
     form = UserForm
     column_list = ['user_id', 'name', 'email', 'role', 'is_verified', 'created_at']
     column_exclude_list = ['password_hash']  # Hide sensitive data
+    column_export_exclude_list = ['password_hash']
     form_excluded_columns = ['password_hash', 'created_at', 'updated_at', 'last_login']
 
     # Add search functionality
@@ -106,7 +123,53 @@ class UserModelView(SecureModelView):
     def on_model_change(self, form, model, is_created):
         # Hash password if provided
         if hasattr(form, 'password') and form.password.data:
-            model.password_hash = generate_password_hash(form.password.data)
+            model.password_hash = PasswordService.hash(form.password.data)
+
+class OrganizationModelView(SecureModelView):
+    """Organizations, with bulk approve/reject for the pending queue"""
+    column_list = ['org_id', 'name', 'email', 'status', 'verification_level', 'created_at', 'approval_date']
+    column_filters = ['status', 'verification_level', 'category_id', 'created_at']
+    column_searchable_list = ['name', 'email']
+    column_default_sort = ('created_at', False)
+
+    def _reviewer(self):
+        """The signed-in user, when the request carries a valid access token"""
+        try:
+            verify_jwt_in_request(optional=True)
+            user_id = get_jwt_identity()
+        except Exception:
+            return None
+        return db.session.get(User, int(user_id)) if user_id else None
+
+    def _moderate(self, ids, status):
+        # One UPDATE and one audit insert for the whole selection, emails queued
+        from .services.moderation_service import ModerationService, MAX_BATCH
+        org_ids = [int(org_id) for org_id in ids]
+        try:
+            reviewer = self._reviewer()
+            moderated = []
+            for start in range(0, len(org_ids), MAX_BATCH):
+                result = ModerationService.moderate(
+                    org_ids[start:start + MAX_BATCH], status, reviewer=reviewer, source='admin_dashboard',
+                    ip_address=request.remote_addr, user_agent=request.headers.get('User-Agent')
+                )
+                moderated.extend(result['moderated'])
+            skipped = len(org_ids) - len(moderated)
+            message = f'{len(moderated)} organization(s) {status}.'
+            if skipped:
+                message += f' {skipped} skipped (not pending).'
+            flash(message, 'success')
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Moderation failed: {e}', 'error')
+
+    @action('approve', 'Approve', 'Approve the selected pending organizations?')
+    def action_approve(self, ids):
+        self._moderate(ids, 'approved')
+
+    @action('reject', 'Reject', 'Reject the selected pending organizations?')
+    def action_reject(self, ids):
+        self._moderate(ids, 'rejected')
 
 def setup_admin(app):
     app.secret_key = os.environ.get('FLASK_APP_KEY', 'sample key')
@@ -124,7 +187,7 @@ def setup_admin(app):
     from .models import Organization, Category, Location, Notification, AuditLog, Advertisement
 
     # Apply security to all model views
-    admin.add_view(SecureModelView(Organization, db.session, name='Organizations'))
+    admin.add_view(OrganizationModelView(Organization, db.session, name='Organizations'))
     admin.add_view(SecureModelView(Category, db.session, name='Categories'))
     admin.add_view(SecureModelView(Location, db.session, name='Locations'))
     admin.add_view(SecureModelView(Notification, db.session, name='Notifications'))
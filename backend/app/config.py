@@ -22,7 +22,64 @@ class Config:
     # Frontend URL
     FRONTEND_URL = os.getenv('FRONTEND_URL')
 
-    # TODO: Add Redis configuration for caching
+    # Bulk organization endpoints (POST/PATCH /orgs/bulk)
+    BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', '500'))
+    BULK_MAX_ROWS = int(os.getenv('BULK_MAX_ROWS', '10000'))
+
+    # Shared Redis (optional; features fall back to in-process stores without it)
+    REDIS_URL = os.getenv('REDIS_URL')
+
+    # Write-behind view/bookmark counters: 'local' (per worker) or 'redis'
+    COUNTER_BACKEND = os.getenv('COUNTER_BACKEND', 'local')
+    COUNTER_FLUSH_INTERVAL = float(os.getenv('COUNTER_FLUSH_INTERVAL', '5'))
+    COUNTER_FLUSH_THRESHOLD = int(os.getenv('COUNTER_FLUSH_THRESHOLD', '1000'))
+
+    # Read-through cache: in-process LRU (L1), plus Redis (L2) when CACHE_BACKEND=redis
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'local')
+    CACHE_TTL = float(os.getenv('CACHE_TTL', '300'))
+    CACHE_L1_TTL = float(os.getenv('CACHE_L1_TTL', '60'))
+    CACHE_L1_SIZE = int(os.getenv('CACHE_L1_SIZE', '10000'))
+    # Serve expired entries this much longer while one background reload runs
+    CACHE_STALE_TTL = float(os.getenv('CACHE_STALE_TTL', '60'))
+    # Longest a request waits on another caller's (or worker's) load of the same key
+    CACHE_LOCK_TIMEOUT = float(os.getenv('CACHE_LOCK_TIMEOUT', '5'))
+    CACHE_REFRESH_WORKERS = int(os.getenv('CACHE_REFRESH_WORKERS', '2'))
+
+    # Categories/locations are cached in memory; other workers' writes show up within this many seconds
+    REFERENCE_CHECK_INTERVAL = float(os.getenv('REFERENCE_CHECK_INTERVAL', '5'))
+
+    # /orgs/suggest applies this worker's writes as they commit; full rebuilds pick up the rest
+    SUGGEST_REBUILD_INTERVAL = float(os.getenv('SUGGEST_REBUILD_INTERVAL', '300'))
+
+    # Duplicate detection on POST /orgs/ (same rebuild scheme as suggestions)
+    DUPLICATE_REBUILD_INTERVAL = float(os.getenv('DUPLICATE_REBUILD_INTERVAL', '300'))
+
+    # /orgs/trending: scores halve every TRENDING_HALF_LIFE_HOURS (changing it needs the table reseeded)
+    TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', '24'))
+    TRENDING_BOOKMARK_WEIGHT = float(os.getenv('TRENDING_BOOKMARK_WEIGHT', '5'))
+
+    # /events/orgs: 'local' (this worker's writes only) or 'redis' pub/sub across workers
+    EVENTS_BACKEND = os.getenv('EVENTS_BACKEND', 'local')
+    # Per-client queue; a client further behind loses its oldest events
+    EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', '256'))
+    EVENTS_MAX_SUBSCRIBERS = int(os.getenv('EVENTS_MAX_SUBSCRIBERS', '1000'))
+    EVENTS_HEARTBEAT = float(os.getenv('EVENTS_HEARTBEAT', '15'))
+
+    # Password hashing: a Werkzeug method ('scrypt:32768:8:1', 'pbkdf2:sha256:600000')
+    # or 'argon2[:time_cost:memory_kib:parallelism]'; older hashes are upgraded on login
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    # Hashing processes per web worker process (0 hashes on the request thread);
+    # keep web workers x PASSWORD_HASH_WORKERS near the number of CPUs
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+    # Hashes in flight per web worker process before requests get 503
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '64'))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', '10'))
+
+    # Each worker caches users' token versions this long, so a logout or role
+    # change reaches the other workers within TOKEN_VERSION_CACHE_TTL seconds
+    TOKEN_VERSION_CACHE_TTL = float(os.getenv('TOKEN_VERSION_CACHE_TTL', '30'))
+    TOKEN_VERSION_CACHE_SIZE = int(os.getenv('TOKEN_VERSION_CACHE_SIZE', '10000'))
+
     # TODO: Add AWS S3 configuration for file uploads
     # TODO: Add social media API keys (Facebook, Twitter, Instagram)
     # TODO: Add analytics configuration (Google Analytics)
@@ -0,0 +1,159 @@
+"""
+Geo Helpers
+Geohash encoding, neighbouring cells, great-circle distance and the Web
+Mercator grid used for map clustering
+"""
+
+import math
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 12
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+# Sorts after every geohash character, so [prefix, prefix + END) covers a cell
+GEOHASH_RANGE_END = '{'
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Encode a coordinate as a geohash string of `precision` characters"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        rng, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            rng[0] = middle
+        else:
+            rng[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def decode_geohash(geohash):
+    """Return (latitude, longitude, lat_error, lng_error) for a cell's centre"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            rng = lng_range if even else lat_range
+            middle = (rng[0] + rng[1]) / 2
+            if (value >> shift) & 1:
+                rng[0] = middle
+            else:
+                rng[1] = middle
+            even = not even
+    return (
+        (lat_range[0] + lat_range[1]) / 2,
+        (lng_range[0] + lng_range[1]) / 2,
+        (lat_range[1] - lat_range[0]) / 2,
+        (lng_range[1] - lng_range[0]) / 2,
+    )
+
+
+def cell_size_degrees(precision):
+    """(height, width) in degrees of a geohash cell at `precision`"""
+    total_bits = precision * 5
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def geohash_neighbors(geohash):
+    """The cell itself plus its (up to) eight neighbours at the same precision"""
+    latitude, longitude, lat_error, lng_error = decode_geohash(geohash)
+    cells = []
+    for dlat in (-1, 0, 1):
+        lat = latitude + dlat * lat_error * 2
+        if lat > 90 or lat < -90:
+            continue
+        for dlng in (-1, 0, 1):
+            lng = longitude + dlng * lng_error * 2
+            lng = (lng + 180) % 360 - 180
+            cell = encode_geohash(lat, lng, len(geohash))
+            if cell not in cells:
+                cells.append(cell)
+    return cells
+
+
+def precision_for_radius(latitude, radius_km):
+    """
+    Longest geohash precision whose cells are at least `radius_km` on each
+    side at this latitude, so a circle is always covered by the 3x3 block
+    around its centre. Returns 0 when even single-character cells are too
+    small (search everything).
+    """
+    # Use the latitude of the circle edge nearest a pole, where cells are narrowest
+    edge_latitude = min(89.9, abs(latitude) + radius_km / KM_PER_DEGREE)
+    shrink = math.cos(math.radians(edge_latitude))
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size_degrees(precision)
+        if height * KM_PER_DEGREE >= radius_km and width * KM_PER_DEGREE * shrink >= radius_km:
+            return precision
+    return 0
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    (min_lat, max_lat, min_lng, max_lng) enclosing the circle, or None for the
+    longitude bounds when the circle crosses the antimeridian or a pole.
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    min_lat = max(-90.0, latitude - dlat)
+    max_lat = min(90.0, latitude + dlat)
+    if max_lat >= 90.0 or min_lat <= -90.0:
+        return min_lat, max_lat, None, None
+    dlng = radius_km / (KM_PER_DEGREE * math.cos(math.radians(max(abs(min_lat), abs(max_lat)))))
+    min_lng = longitude - dlng
+    max_lng = longitude + dlng
+    if min_lng < -180.0 or max_lng > 180.0:
+        return min_lat, max_lat, None, None
+    return min_lat, max_lat, min_lng, max_lng
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two coordinates in kilometres"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+# Web Mercator grid used for map clustering. Each 256px tile is split into
+# 2**CELL_SUBDIVISION_BITS cells per side, i.e. 64px cells on screen.
+MERCATOR_MAX_LATITUDE = 85.05112878
+CELL_SUBDIVISION_BITS = 2
+
+
+def mercator_cell(latitude, longitude, zoom):
+    """(x, y) of the clustering cell containing the coordinate at `zoom`"""
+    n = 1 << (zoom + CELL_SUBDIVISION_BITS)
+    lat = max(-MERCATOR_MAX_LATITUDE, min(MERCATOR_MAX_LATITUDE, latitude))
+    x = int((longitude + 180.0) / 360.0 * n)
+    sin_lat = math.sin(math.radians(lat))
+    y = int((0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def mercator_cell_bounds(x, y, zoom):
+    """(min_lat, max_lat, min_lng, max_lng) of a clustering cell"""
+    n = 1 << (zoom + CELL_SUBDIVISION_BITS)
+
+    def latitude_of(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return latitude_of(y + 1), latitude_of(y), x / n * 360.0 - 180.0, (x + 1) / n * 360.0 - 180.0
@@ -0,0 +1,57 @@
+"""
+HTTP Conditional Requests
+ETag / Last-Modified helpers so unchanged resources are answered with 304
+before any rows are loaded or serialized
+"""
+
+import hashlib
+from datetime import timezone
+from flask import make_response, request
+
+
+def make_etag(*parts):
+    """Strong ETag value derived from a resource's version parts"""
+    raw = '|'.join('' if part is None else str(part) for part in parts)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def representation_key():
+    """Query args that change the response body, in a stable order"""
+    return '&'.join(f'{key}={value}' for key, value in sorted(request.args.items(multi=True)))
+
+
+def _as_utc(value):
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+
+def not_modified(etag, last_modified=None):
+    """
+    Return a 304 response if the request's validators still match, else None.
+    If-None-Match wins over If-Modified-Since, as RFC 9110 requires.
+    """
+    if request.if_none_match:
+        matched = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and last_modified is not None:
+        matched = _as_utc(last_modified) <= request.if_modified_since
+    else:
+        matched = False
+
+    if not matched:
+        return None
+    response = make_response('', 304)
+    return with_validators(response, etag, last_modified)
+
+
+def with_validators(response, etag, last_modified=None):
+    """Attach ETag / Last-Modified to a response (a Response or (body, status) tuple)"""
+    response = make_response(response)
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = _as_utc(last_modified)
+    # Clients must revalidate, but may keep the body to send If-None-Match
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
@@ -6,10 +6,10 @@ General authentication and authorization for the charity directory platform
 from functools import wraps
 from flask import request, jsonify, g
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
+from ..db import db
 from ..models.user import User
+from ..services.token_service import TokenService
 
-# TODO: Implement JWT token validation middleware
-# TODO: Add role-based access control middleware
 # TODO: Create session management middleware
 # TODO: Implement user permission checking
 # TODO: Add OAuth token validation for Google auth
@@ -19,43 +19,70 @@ from ..models.user import User
 # TODO: Create user rate limiting per authentication level
 # TODO: Implement multi-factor authentication middleware
 
+class TokenUser:
+    """
+    The caller as described by their access token: user_id, role and
+    is_verified without a query. Any other attribute loads the users row
+    once, on first use.
+    """
+
+    def __init__(self, user_id, claims):
+        self.user_id = user_id
+        self.role = claims['role']
+        self.is_verified = claims.get('verified', False)
+        self._user = None
+
+    def __getattr__(self, name):
+        # Only reached for attributes not set in __init__
+        if self._user is None:
+            self._user = db.session.get(User, self.user_id)
+            if self._user is None:
+                raise AttributeError(name)
+        return getattr(self._user, name)
+
+
 def jwt_required_with_user(f):
     """
-    Decorator that validates JWT and loads user into g.current_user
+    Decorator that validates JWT and loads user into g.current_user.
+    Revoked tokens are rejected by TokenService's blocklist check; for
+    tokens carrying a role claim that cached check is the only lookup.
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
         try:
-            # TODO: Implement comprehensive JWT validation
-            # TODO: Check token expiration and blacklist
-            # TODO: Load user permissions and roles
             # TODO: Log authentication attempts
 
             verify_jwt_in_request()
-            current_user_id = get_jwt_identity()
-            user = User.query.get(current_user_id)
-
-            if not user:
-                return jsonify({'message': 'User not found'}), 404
+            current_user_id = TokenService.current_user_id()
+            claims = get_jwt()
+            if 'role' in claims:
+                g.current_user = TokenUser(current_user_id, claims)
+            else:
+                # Tokens issued before claims were added
+                user = db.session.get(User, current_user_id)
 
-            g.current_user = user
-            return f(*args, **kwargs)
+                if not user:
+                    return jsonify({'message': 'User not found'}), 404
 
+                g.current_user = user
         except Exception as e:
             return jsonify({'message': 'Authentication failed'}), 401
 
+        return f(*args, **kwargs)
+
     return decorated_function
 
 def role_required(required_role):
     """
-    Decorator to require specific user role
+    Decorator to require specific user role. Use under
+    @jwt_required_with_user, which sets g.current_user.
     """
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            # TODO: Implement role-based access control
-            # TODO: Support multiple roles and permissions
-            # TODO: Add hierarchical role checking
+            # The role comes from the token's claims (see TokenUser); one
+            # exact role per route for now
+            # TODO: Accept several roles or a role hierarchy
             # TODO: Log authorization failures
 
             if not hasattr(g, 'current_user') or not g.current_user:
@@ -3,8 +3,10 @@ Security Middleware
 CORS, CSRF protection, and general security for the charity directory platform
 """
 
+from functools import wraps
 from flask import request, jsonify
 from flask_cors import CORS
+from ..services.duplicate_service import DuplicateService, MATCH_FIELDS
 
 # TODO: Implement comprehensive CORS configuration
 # TODO: Add CSRF protection for forms
@@ -76,14 +78,34 @@ class SecurityMiddleware:
 
 def validate_charity_data(f):
     """
-    Decorator to validate charity organization data
+    Decorator to validate charity organization data. Submissions that look
+    like an existing organization are refused with 409 and the suspected
+    matches, unless resubmitted with ?force=true.
     """
+    @wraps(f)
     def decorated_function(*args, **kwargs):
-        # TODO: Implement charity data validation
         # TODO: Validate charity registration numbers
-        # TODO: Check required charity information fields
         # TODO: Validate charity contact information
-        # TODO: Check for duplicate charity registrations
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return f(*args, **kwargs)
+
+        name = data.get('name')
+        if not isinstance(name, str) or not name.strip():
+            return jsonify({'error': 'Name is required'}), 400
+        # The duplicate check normalizes these as text
+        for field in MATCH_FIELDS:
+            if data.get(field) is not None and not isinstance(data[field], str):
+                return jsonify({'error': f'{field} must be a string'}), 400
+
+        if request.args.get('force', '').lower() not in ('1', 'true', 'yes'):
+            duplicates = DuplicateService.find(data)
+            if duplicates:
+                return jsonify({
+                    'error': 'This looks like an organization that is already registered',
+                    'duplicates': duplicates,
+                    'hint': 'Resubmit with ?force=true to register it anyway'
+                }), 409
         return f(*args, **kwargs)
     return decorated_function
 
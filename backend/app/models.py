@@ -6,6 +6,11 @@ from .models.location import Location
 from .models.notification import Notification
 from .models.audit_log import AuditLog
 from .models.advertisement import Advertisement
+from .models.organization_facet_count import OrganizationFacetCount
+from .models.map_cluster_cell import MapClusterCell
+from .models.resource_version import ResourceVersion
+from .models.organization_trend import OrganizationTrend
+from .models.organization_change import OrganizationChange
 
 # Register all models with SQLAlchemy
 # (If using Flask-Migrate/Alembic, this ensures all models are detected)
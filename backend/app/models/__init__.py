@@ -5,3 +5,8 @@ from .location import Location
 from .notification import Notification
 from .audit_log import AuditLog
 from .advertisement import Advertisement
+from .organization_facet_count import OrganizationFacetCount
+from .map_cluster_cell import MapClusterCell
+from .resource_version import ResourceVersion
+from .organization_trend import OrganizationTrend
+from .organization_change import OrganizationChange
@@ -9,6 +9,8 @@ class Location(db.Model):
     postal_code = db.Column(db.String(20))
     latitude = db.Column(db.Numeric(10,8))
     longitude = db.Column(db.Numeric(11,8))
+    # Derived from latitude/longitude by GeoService; indexed for prefix-range prefilters
+    geohash = db.Column(db.String(12), index=True)
     timezone = db.Column(db.String(50))
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime)
@@ -0,0 +1,15 @@
+from ..db import db
+
+class MapClusterCell(db.Model):
+    """
+    Pre-aggregated organizations per Web Mercator grid cell and zoom level,
+    maintained incrementally by ClusterService for the map view.
+    """
+    __tablename__ = 'map_cluster_cells'
+    zoom = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    cell_x = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    cell_y = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    sum_latitude = db.Column(db.Float, nullable=False, default=0.0)
+    sum_longitude = db.Column(db.Float, nullable=False, default=0.0)
+    representative_org_ids = db.Column(db.JSON)
@@ -1,13 +1,21 @@
+from datetime import datetime
 from ..db import db
 
 class Organization(db.Model):
     __tablename__ = 'organizations'
+    __table_args__ = (
+        # Composite (sort key, org_id) indexes back keyset pagination on GET /orgs/
+        db.Index('ix_organizations_name_org_id', 'name', 'org_id'),
+        db.Index('ix_organizations_created_at_org_id', 'created_at', 'org_id'),
+        db.Index('ix_organizations_view_count_org_id', 'view_count', 'org_id'),
+        db.Index('ix_organizations_bookmark_count_org_id', 'bookmark_count', 'org_id'),
+    )
     org_id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     mission = db.Column(db.Text)
     description = db.Column(db.Text)
-    category_id = db.Column(db.Integer, db.ForeignKey('categories.category_id'))
-    location_id = db.Column(db.Integer, db.ForeignKey('locations.location_id'))
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.category_id'), index=True)
+    location_id = db.Column(db.Integer, db.ForeignKey('locations.location_id'), index=True)
     address = db.Column(db.Text)
     phone = db.Column(db.String(20))
     email = db.Column(db.String(150))
@@ -16,13 +24,19 @@ class Organization(db.Model):
     logo_url = db.Column(db.String(255))
     operating_hours = db.Column(db.Text)
     established_year = db.Column(db.Integer)
-    status = db.Column(db.String(20), default='pending')
+    status = db.Column(db.String(20), default='pending', index=True)
     verification_level = db.Column(db.String(20), default='basic')
     admin_user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'))
     approved_by = db.Column(db.Integer, db.ForeignKey('users.user_id'))
     approval_date = db.Column(db.DateTime)
     rejection_reason = db.Column(db.Text)
-    view_count = db.Column(db.Integer, default=0)
-    bookmark_count = db.Column(db.Integer, default=0)
-    created_at = db.Column(db.DateTime)
-    updated_at = db.Column(db.DateTime)
+    view_count = db.Column(db.Integer, default=0, nullable=False)
+    bookmark_count = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Many-to-one lookups; load them with ?expand= (selectinload), never lazily per row
+    category = db.relationship('Category')
+    location = db.relationship('Location')
+    admin_user = db.relationship('User', foreign_keys=[admin_user_id])
+    approver = db.relationship('User', foreign_keys=[approved_by])
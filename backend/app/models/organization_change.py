@@ -0,0 +1,18 @@
+from ..db import db
+
+class OrganizationChange(db.Model):
+    """
+    Latest change per organization for the /orgs/changes feed. seq comes
+    from the organizations version counter, so it grows in commit order;
+    rows of deleted orgs stay behind as tombstones (op 'delete').
+    """
+    __tablename__ = 'organization_changes'
+    # No foreign key: a tombstone outlives its organization
+    org_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    seq = db.Column(db.BigInteger, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # 'upsert' | 'delete'
+    changed_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_organization_changes_seq', 'seq', 'org_id'),
+    )
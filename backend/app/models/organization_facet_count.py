@@ -0,0 +1,16 @@
+from ..db import db
+
+class OrganizationFacetCount(db.Model):
+    """
+    Number of organizations per (category, location, status, verification
+    level) combination. Maintained incrementally by FacetService so facet
+    counts for any filter are a SUM over this small table, not a GROUP BY
+    over organizations.
+    """
+    __tablename__ = 'organization_facet_counts'
+    combo_key = db.Column(db.String(120), primary_key=True)
+    category_id = db.Column(db.Integer, index=True)
+    location_id = db.Column(db.Integer, index=True)
+    status = db.Column(db.String(20), index=True)
+    verification_level = db.Column(db.String(20), index=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,21 @@
+from ..db import db
+
+class OrganizationTrend(db.Model):
+    """
+    Time-decayed popularity per organization, maintained by TrendingService
+    from counter flushes. score_log is the log of the views/bookmarks sum
+    with every event scaled up by its age, so ordering by it orders by the
+    decayed score at any moment and old rows never need rewriting.
+    """
+    __tablename__ = 'organization_trends'
+    org_id = db.Column(db.Integer, db.ForeignKey('organizations.org_id', ondelete='CASCADE'),
+                       primary_key=True, autoincrement=False)
+    # Copied from the organization so per-category top-K is one index range
+    category_id = db.Column(db.Integer)
+    score_log = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_organization_trends_category_score', 'category_id', 'score_log'),
+        db.Index('ix_organization_trends_score', 'score_log'),
+    )
@@ -0,0 +1,12 @@
+from ..db import db
+
+class ResourceVersion(db.Model):
+    """
+    Monotonic version counter per resource collection, bumped in the same
+    transaction as every write to that collection. Cheap to read, so it
+    backs collection ETags and cache keys.
+    """
+    __tablename__ = 'resource_versions'
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime)
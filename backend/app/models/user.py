@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index, func
 from ..db import db
 
 class User(db.Model):
@@ -12,9 +13,22 @@ class User(db.Model):
     is_verified = Column(Boolean, default=False)
     google_id = Column(String(50))
     profile_picture = Column(String(255))
-    created_at = Column(DateTime)
-    updated_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_login = Column(DateTime)
+    # Matched against the 'tv' claim of access tokens; bumping it revokes them
+    token_version = Column(Integer, nullable=False, default=0, server_default='0')
+
+    __table_args__ = (
+        # (sort key, user_id) indexes back keyset pagination on GET /users/
+        Index('ix_users_created_at_user_id', 'created_at', 'user_id'),
+        Index('ix_users_name_user_id', 'name', 'user_id'),
+        Index('ix_users_role_created_at_user_id', 'role', 'created_at', 'user_id'),
+        Index('ix_users_last_login', 'last_login'),
+        # Case-insensitive prefix search (?q=) seeks these expression indexes
+        Index('ix_users_lower_name', func.lower(name)),
+        Index('ix_users_lower_email', func.lower(email)),
+    )
 
     def __repr__(self):
         return f'<User {self.name}>'
@@ -0,0 +1,166 @@
+"""
+Keyset (cursor) Pagination
+Helpers for paging large tables by (sort key, primary key) instead of OFFSET
+"""
+
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import func, select, tuple_
+from .utils import APIException
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(payload):
+    """Encode a cursor payload as an opaque URL-safe token"""
+    raw = json.dumps(payload, separators=(',', ':'), default=_json_default)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a token produced by encode_cursor, raising APIException when invalid"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise APIException('Invalid cursor', status_code=400)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return {'$dt': value.isoformat()}
+    raise TypeError(f'Cannot encode {type(value).__name__} in cursor')
+
+
+def _restore(value):
+    if isinstance(value, dict) and '$dt' in value:
+        return datetime.fromisoformat(value['$dt'])
+    return value
+
+
+def parse_limit(args, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Read ?limit= from request args and clamp it to [1, maximum]"""
+    try:
+        limit = int(args.get('limit', default))
+    except (TypeError, ValueError):
+        raise APIException('limit must be an integer', status_code=400)
+    return max(1, min(limit, maximum))
+
+
+def parse_sort(args, sort_columns, default):
+    """
+    Read ?sort= from request args. A leading '-' means descending.
+    Returns (sort_name, descending).
+    """
+    sort = args.get('sort', default)
+    descending = sort.startswith('-')
+    name = sort.lstrip('-')
+    if name not in sort_columns:
+        allowed = ', '.join(sorted(sort_columns))
+        raise APIException(f'Invalid sort field. Allowed: {allowed}', status_code=400)
+    return name, descending
+
+
+def parse_count(args):
+    """
+    Read ?count= from request args: None (no total, the default), 'exact'
+    or 'estimate'
+    """
+    mode = args.get('count')
+    if mode in (None, '', 'none'):
+        return None
+    if mode not in ('exact', 'estimate'):
+        raise APIException('count must be one of: exact, estimate', status_code=400)
+    return mode
+
+
+def count_rows(session, query, mode='exact'):
+    """
+    Total rows matched by a (filtered, unpaginated) query as
+    (count, is_estimate). 'estimate' asks the PostgreSQL planner, which
+    answers from table statistics without scanning; other backends, which
+    have no such statistics, fall back to an exact COUNT(*).
+    """
+    statement = query.order_by(None).statement
+    connection = session.connection()
+    if mode == 'estimate' and connection.dialect.name == 'postgresql':
+        compiled = statement.compile(dialect=connection.dialect, compile_kwargs={'render_postcompile': True})
+        plan = connection.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows']), True
+    total = connection.execute(select(func.count()).select_from(statement.subquery())).scalar()
+    return total, False
+
+
+class KeysetPage:
+    """One page of keyset-paginated rows plus the cursors around it"""
+
+    def __init__(self, items, next_cursor, prev_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+
+def keyset_paginate(query, sort_name, sort_column, pk_column, descending=False,
+                    limit=DEFAULT_PAGE_SIZE, after=None, before=None, row_key=None):
+    """
+    Page through `query` ordered by (sort_column, pk_column).
+
+    The WHERE clause compares the (sort, pk) row value against the cursor so
+    the database seeks straight into a composite index on (sort, pk); page N
+    costs the same as page 1. `row_key` extracts (sort value, pk) from a
+    result row and defaults to attribute access on ORM objects.
+    """
+    if after and before:
+        raise APIException('Use either after or before, not both', status_code=400)
+
+    if row_key is None:
+        def row_key(row):
+            return getattr(row, sort_column.key), getattr(row, pk_column.key)
+
+    cursor = decode_cursor(after or before) if (after or before) else None
+    if cursor is not None:
+        if not isinstance(cursor, dict) or 'v' not in cursor or not isinstance(cursor.get('id'), int):
+            raise APIException('Invalid cursor', status_code=400)
+        if cursor.get('s') != sort_name or cursor.get('d') != descending:
+            raise APIException('Cursor does not match the requested sort', status_code=400)
+        key = tuple_(sort_column, pk_column)
+        value = tuple_(_restore(cursor['v']), cursor['id'])
+        # Walking backwards flips the comparison and the ORDER BY; rows are
+        # reversed again below so the page is always returned in sort order.
+        forward = after is not None
+        if forward != descending:
+            query = query.filter(key > value)
+        else:
+            query = query.filter(key < value)
+    else:
+        forward = True
+
+    if forward != descending:
+        query = query.order_by(sort_column.asc(), pk_column.asc())
+    else:
+        query = query.order_by(sort_column.desc(), pk_column.desc())
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not forward:
+        rows.reverse()
+
+    def cursor_for(row):
+        sort_value, pk = row_key(row)
+        return encode_cursor({'s': sort_name, 'd': descending, 'v': sort_value, 'id': pk})
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if forward:
+            next_cursor = cursor_for(rows[-1]) if has_more else None
+            prev_cursor = cursor_for(rows[0]) if cursor is not None else None
+        else:
+            next_cursor = cursor_for(rows[-1])
+            prev_cursor = cursor_for(rows[0]) if has_more else None
+
+    return KeysetPage(rows, next_cursor, prev_cursor)
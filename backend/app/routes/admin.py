@@ -1,16 +1,46 @@
-from flask import Blueprint, request, jsonify
-from ..models import User
+from flask import Blueprint, g, request, jsonify, url_for
+from ..models import Organization, User
 from ..db import db
+from ..fieldsets import load_only_fields
+from ..middleware.auth import jwt_required_with_user, role_required
+from ..pagination import keyset_paginate, parse_limit
+from ..serializers import serializer_for
+from ..services.duplicate_service import DuplicateService
+from ..services.moderation_service import ModerationService
+from ..services.user_list_service import UserListService
+from .users import user_list_response
+from ..utils import APIException
 
 admin_api_bp = Blueprint('admin_api', __name__, url_prefix='/api/admin')
 
+# Admin listing shape: {'id', 'name', 'email'}
+ADMIN_SERIALIZER = serializer_for(User, ('id', 'name', 'email'), aliases={'id': 'user_id'})
+
+# Organizations as shown in the duplicate report
+DUPLICATE_SERIALIZER = serializer_for(
+    Organization, ('org_id', 'name', 'email', 'website', 'address', 'status', 'created_at')
+)
+
+# Pending organizations as shown in the moderation queue
+MODERATION_SERIALIZER = serializer_for(
+    Organization, ('org_id', 'name', 'email', 'website', 'category_id', 'location_id', 'created_at')
+)
+
 # Add admin routes here
 # Test with:
-# curl -X GET http://127.0.0.1:5000/api/admin/
+# curl -X GET "http://127.0.0.1:5000/api/admin/?limit=50"
+# curl -X GET "http://127.0.0.1:5000/api/admin/?q=ali&sort=name&count=exact"
 @admin_api_bp.route('/', methods=['GET'])
 def get_admins():
-    users = User.query.filter_by(role='admin').all()
-    return jsonify([{'id': u.user_id, 'name': u.name, 'email': u.email} for u in users]), 200
+    """Admin users one keyset page at a time; takes the same filters as GET /users/"""
+    try:
+        filters = UserListService.parse_filters(request.args)
+        filters['role'] = ['admin']
+        return user_list_response('admin_api.get_admins', filters, ADMIN_SERIALIZER)
+    except APIException as e:
+        return jsonify({"error": e.message}), e.status_code
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
 # Test with:
 # curl -X GET http://127.0.0.1:5000/api/admin/1
@@ -18,7 +48,7 @@ def get_admins():
 def get_admin(id):
     user = User.query.get(id)
     if user and user.role == 'admin':
-        return jsonify({'id': user.user_id, 'name': user.name, 'email': user.email}), 200
+        return jsonify(ADMIN_SERIALIZER.one(user)), 200
     return jsonify({'error': 'Admin not found'}), 404
 
 # Test with:
@@ -57,4 +87,95 @@ def delete_admin(id):
         db.session.delete(user)
         db.session.commit()
         return jsonify({'msg': 'Admin deleted'}), 200
-    return jsonify({'error': 'Admin not found'}), 404
\ No newline at end of file
+    return jsonify({'error': 'Admin not found'}), 404
+
+# Test with:
+# curl -X GET "http://127.0.0.1:5000/api/admin/duplicates?limit=20" \
+#   -H "Authorization: Bearer YOUR_ADMIN_TOKEN"
+@admin_api_bp.route('/duplicates', methods=['GET'])
+@jwt_required_with_user
+@role_required('admin')
+def duplicate_report():
+    """Clusters of organizations that look like the same charity, largest first"""
+    try:
+        limit = parse_limit(request.args)
+        clusters = DuplicateService.clusters()
+        page = clusters[:limit]
+        org_ids = [org_id for members, _ in page for org_id in members]
+        orgs = {
+            org.org_id: org
+            for org in Organization.query.options(load_only_fields(Organization, DUPLICATE_SERIALIZER.attributes))
+            .filter(Organization.org_id.in_(org_ids))
+        }
+        return jsonify({
+            'data': [
+                {
+                    'reasons': reasons,
+                    'organizations': DUPLICATE_SERIALIZER.many(orgs[org_id] for org_id in members if org_id in orgs)
+                }
+                for members, reasons in page
+            ],
+            'clusters': len(clusters),
+            'limit': limit
+        }), 200
+    except APIException as e:
+        return jsonify({"error": e.message}), e.status_code
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Test with:
+# curl -X GET "http://127.0.0.1:5000/api/admin/moderation?limit=100" \
+#   -H "Authorization: Bearer YOUR_ADMIN_TOKEN"
+@admin_api_bp.route('/moderation', methods=['GET'])
+@jwt_required_with_user
+@role_required('admin')
+def moderation_queue():
+    """Pending organizations, oldest first, one keyset page at a time"""
+    try:
+        limit = parse_limit(request.args)
+        page = keyset_paginate(
+            Organization.query.options(load_only_fields(Organization, MODERATION_SERIALIZER.attributes))
+            .filter(Organization.status == 'pending'),
+            'created_at',
+            Organization.created_at,
+            Organization.org_id,
+            limit=limit,
+            after=request.args.get('after'),
+        )
+        return jsonify({
+            'data': MODERATION_SERIALIZER.many(page.items),
+            'limit': limit,
+            'next_cursor': page.next_cursor,
+            'next': url_for('admin_api.moderation_queue', limit=limit, after=page.next_cursor) if page.next_cursor else None
+        }), 200
+    except APIException as e:
+        return jsonify({"error": e.message}), e.status_code
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Test with:
+# curl -X POST http://127.0.0.1:5000/api/admin/moderation \
+#   -H "Authorization: Bearer YOUR_ADMIN_TOKEN" \
+#   -H "Content-Type: application/json" \
+#   -d '{"decision": "approve", "org_ids": [1, 2, 3]}'
+# curl -X POST http://127.0.0.1:5000/api/admin/moderation \
+#   -H "Authorization: Bearer YOUR_ADMIN_TOKEN" \
+#   -H "Content-Type: application/json" \
+#   -d '{"decision": "reject", "org_ids": [4, 5], "reason": "Missing registration number"}'
+@admin_api_bp.route('/moderation', methods=['POST'])
+@jwt_required_with_user
+@role_required('admin')
+def moderate_organizations():
+    """Approve or reject up to 1000 pending organizations in one transaction"""
+    try:
+        org_ids, status, reason = ModerationService.parse(request.get_json(silent=True))
+        result = ModerationService.moderate(
+            org_ids, status, reviewer=g.current_user, reason=reason, source='api',
+            ip_address=request.remote_addr, user_agent=request.headers.get('User-Agent')
+        )
+        return jsonify(dict(result, status=status)), 200
+    except APIException as e:
+        return jsonify({"error": e.message}), e.status_code
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
@@ -1,8 +1,9 @@
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import create_access_token
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask_jwt_extended import jwt_required
 from app.models.user import User
 from app.db import db
+from app.services.password_service import PasswordService
+from app.services.token_service import TokenService
 
 auth_bp = Blueprint('auth', __name__, url_prefix="/auth")
 
@@ -38,7 +39,7 @@ def signup():
     if User.query.filter_by(email=email).first():
         return jsonify({"msg": "Email already exists"}), 400
 
-    hashed_password = generate_password_hash(password)
+    hashed_password = PasswordService.hash(password)
     new_user = User(name=name, email=email, password_hash=hashed_password)
     db.session.add(new_user)
     db.session.commit()
@@ -77,14 +78,25 @@ def login():
     # Get user from DB by email
     user = User.query.filter_by(email=email).first()
 
-    if user is None:
-        # User not found
+    # Check password (an unknown email costs the same hash check as a known one)
+    old_hash = user.password_hash if user is not None else None
+    if not PasswordService.verify_and_update(user, password):
         return jsonify({"msg": "Invalid credentials"}), 401
 
-    # Check password
-    if not check_password_hash(user.password_hash, password):
-        return jsonify({"msg": "Invalid credentials"}), 401
+    # Save the upgraded hash if the hashing settings changed since the last login
+    if user.password_hash != old_hash:
+        db.session.commit()
 
-    # Create access token with user ID
-    access_token = create_access_token(identity=user.user_id)
+    # Create access token with user ID, role and token version
+    access_token = TokenService.issue(user)
     return jsonify({"token": access_token, "user_id": user.user_id}), 200
+
+# Test with:
+# curl -X POST http://127.0.0.1:5000/auth/logout \
+#   -H "Authorization: Bearer YOUR_JWT_TOKEN_HERE"
+@auth_bp.route("/logout", methods=["POST"])
+@jwt_required()
+def logout():
+    """Revoke every access token issued to the current user"""
+    TokenService.revoke(TokenService.current_user_id())
+    return jsonify({"msg": "Logged out"}), 200
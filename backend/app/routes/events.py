@@ -0,0 +1,50 @@
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from app.serializers import dumps
+from app.services.event_service import EventService, EVENT_TYPES
+
+events_bp = Blueprint('events', __name__, url_prefix='/events')
+
+def _sse(event, data):
+    """One Server-Sent Events message"""
+    return b'event: ' + event.encode() + b'\ndata: ' + dumps(data) + b'\n\n'
+
+# Event stream routes
+# Each open stream holds a worker thread; run threaded or gevent workers.
+# Test with:
+# curl -N http://127.0.0.1:5000/events/orgs
+# curl -N "http://127.0.0.1:5000/events/orgs?types=created,approved"
+@events_bp.route('/orgs', methods=['GET'])
+def organization_events():
+    """Stream organization created/updated/approved/deleted events"""
+    try:
+        types = [name.strip() for name in request.args.get('types', '').split(',') if name.strip()]
+        unknown = sorted(set(types) - set(EVENT_TYPES))
+        if unknown:
+            return jsonify({"error": f"Unknown event type: {unknown[0]}. Allowed: {', '.join(EVENT_TYPES)}"}), 400
+
+        subscription = EventService.subscribe(types)
+        if subscription is None:
+            return jsonify({"error": "Too many event streams open, retry later"}), 503
+
+        def stream():
+            try:
+                yield b'retry: 5000\n\n'
+                while True:
+                    events, dropped = subscription.drain(EventService.heartbeat)
+                    if dropped:
+                        # This client fell behind; it should refetch what it shows
+                        yield _sse('overflow', {'dropped': dropped})
+                    for event in events:
+                        yield b'id: %d\n' % event['id'] + _sse(event['type'], event)
+                    if not events and not dropped:
+                        # Comment line: keeps proxies from closing an idle stream
+                        yield b': keep-alive\n\n'
+            finally:
+                EventService.unsubscribe(subscription)
+
+        return Response(stream_with_context(stream()), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
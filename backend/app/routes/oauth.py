@@ -3,13 +3,23 @@ OAuth authentication routes - Google OAuth integration
 """
 
 from flask import Blueprint, request, jsonify, redirect, url_for, session
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from ..services.auth_service import GoogleOAuthService, AuthService
+from ..services.token_service import TokenService
 from ..models.user import User
 from ..db import db
+from ..serializers import serializer_for
 
 oauth_bp = Blueprint('oauth', __name__, url_prefix='/auth')
 
+# User payloads returned after Google sign-in and account linking
+OAUTH_USER_SERIALIZER = serializer_for(
+    User, ('id', 'name', 'email', 'role', 'profile_picture', 'is_verified'), aliases={'id': 'user_id'}
+)
+LINKED_USER_SERIALIZER = serializer_for(
+    User, ('id', 'name', 'email', 'profile_picture', 'is_verified'), aliases={'id': 'user_id'}
+)
+
 @oauth_bp.route('/google/login', methods=['GET'])
 def google_login():
     """
@@ -85,14 +95,7 @@ def google_callback():
             'success': True,
             'message': 'Successfully authenticated with Google',
             'is_new_user': is_new_user,
-            'user': {
-                'id': user.user_id,
-                'name': user.name,
-                'email': user.email,
-                'role': user.role,
-                'profile_picture': user.profile_picture,
-                'is_verified': user.is_verified
-            },
+            'user': OAUTH_USER_SERIALIZER.one(user),
             'tokens': tokens
         }
 
@@ -112,7 +115,7 @@ def link_google_account():
     Requires existing JWT authentication
     """
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = TokenService.current_user_id()
         user = User.query.get(current_user_id)
 
         if not user:
@@ -164,22 +167,23 @@ def link_google_account():
         user.profile_picture = user_info.get('picture', user.profile_picture)
 
         # If emails match and Google email is verified, verify the user
+        newly_verified = False
         if google_email == user.email and user_info.get('email_verified'):
+            newly_verified = not user.is_verified
             user.is_verified = True
 
         db.session.commit()
 
-        return jsonify({
+        response_data = {
             'success': True,
             'message': 'Google account linked successfully',
-            'user': {
-                'id': user.user_id,
-                'name': user.name,
-                'email': user.email,
-                'profile_picture': user.profile_picture,
-                'is_verified': user.is_verified
-            }
-        })
+            'user': LINKED_USER_SERIALIZER.one(user)
+        }
+        # Verifying the user revoked their tokens (they carry the old claim)
+        if newly_verified:
+            response_data['tokens'] = AuthService.create_tokens(user)
+
+        return jsonify(response_data)
 
     except Exception as e:
         db.session.rollback()
@@ -195,7 +199,7 @@ def unlink_google_account():
     Unlink Google account from current user
     """
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = TokenService.current_user_id()
         user = User.query.get(current_user_id)
 
         if not user:
@@ -1,77 +1,588 @@
-from flask import Blueprint, request, jsonify
+from datetime import datetime
+from flask import Blueprint, current_app, request, jsonify, url_for
+from sqlalchemy import select
 from app.models.organization import Organization
 from app.db import db
+from app.http_cache import make_etag, not_modified, representation_key, with_validators
+from app.pagination import keyset_paginate, parse_limit, parse_sort
+from app.fieldsets import (
+    ORGANIZATION_EXPANSIONS, ORGANIZATION_FIELDS, ORGANIZATION_PROFILES, parse_fieldset, parse_expand,
+    load_only_fields, expand_options, expansion_keys
+)
+from app.serializers import dumps, loads, serializer_for
+from app.utils import APIException
+from app.middleware.security import validate_charity_data
+from app.services.search_service import SearchService
+from app.services.facet_service import FacetService
+from app.services.geo_service import GeoService, MAX_RADIUS_KM
+from app.services.cluster_service import ClusterService
+from app.services.version_service import VersionService
+from app.services.export_service import ExportService, EXPORT_FORMATS
+from app.services.bulk_service import BulkService
+from app.services.counter_service import CounterService, COUNTER_FIELDS
+from app.services.reference_service import ReferenceService
+from app.services.suggest_service import SuggestService, TOP_K as SUGGEST_MAX_LIMIT
+from app.services.trending_service import TrendingService, TOP_K as TRENDING_MAX_LIMIT
+from app.services.change_service import ChangeService, MAX_CHANGES_PAGE
+from app.services.cache_service import (
+    CacheService, FragmentCache, ORG_KEY, ORG_LIST_PREFIX, ROW_VERSION_FIELDS, row_version
+)
 
 orgs_bp = Blueprint('orgs', __name__, url_prefix='/orgs')
 
+# Columns GET /orgs/ can be sorted by; each has a (column, org_id) index
+ORG_SORT_COLUMNS = {
+    'name': Organization.name,
+    'created_at': Organization.created_at,
+    'view_count': Organization.view_count,
+    'bookmark_count': Organization.bookmark_count,
+}
+
+# Expansions resolved from the in-memory reference tables instead of a join
+REFERENCE_EXPANSIONS = {'category': 'categories', 'location': 'locations'}
+
+# Ranked search results are paged by offset; deep pages are not useful
+MAX_SEARCH_OFFSET = 1000
+
+def _bulk_write(mode):
+    """Shared body of POST/PATCH /orgs/bulk"""
+    try:
+        chunk_size = BulkService.chunk_size(request.args.get('chunk_size'), current_app.config['BULK_CHUNK_SIZE'])
+        rows, errors = BulkService.parse_rows(request.get_data(), request.mimetype)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not rows:
+        return jsonify({"error": "No data provided"}), 400
+    if len(rows) > current_app.config['BULK_MAX_ROWS']:
+        return jsonify({"error": f"At most {current_app.config['BULK_MAX_ROWS']} rows per request"}), 413
+    atomic = request.args.get('atomic', 'true').lower() not in ('0', 'false', 'no')
+
+    valid, errors = BulkService.validate(rows, mode, errors)
+    if mode == 'create' and request.args.get('force', '').lower() not in ('1', 'true', 'yes'):
+        # Same near-duplicate check as POST /orgs/, so bulk is no way around it
+        valid, errors = BulkService.flag_duplicates(valid, errors)
+    if errors and atomic:
+        # All-or-nothing: report every bad row and write none of them
+        return jsonify({
+            "error": "Validation failed; nothing was written",
+            "written": 0,
+            "failed": len(errors),
+            "results": BulkService.results(len(rows), {}, errors, unwritten='Valid, but the batch was rejected'),
+        }), 422
+
+    write = BulkService.create if mode == 'create' else BulkService.update
+    written, failed = write(valid, chunk_size, atomic=atomic)
+    errors.update(failed)
+
+    if not written:
+        status = 422
+    elif errors:
+        status = 207
+    else:
+        status = 201 if mode == 'create' else 200
+    return jsonify({
+        "msg": f"{len(written)} organizations {'created' if mode == 'create' else 'updated'}",
+        "written": len(written),
+        "failed": len(errors),
+        "results": BulkService.results(len(rows), written, errors),
+    }), status
+
+def _load_organization(org_id):
+    """Every public field of one org as JSON-ready values, or None if missing"""
+    serializer = serializer_for(Organization, ORGANIZATION_FIELDS)
+    row = db.session.execute(
+        select(*serializer.columns()).where(Organization.org_id == org_id)
+    ).first()
+    return loads(dumps(serializer.tuples([row])[0])) if row else None
+
+def _split_expand(expand):
+    """(expansions loaded from the database, expansions served from memory)"""
+    return (
+        tuple(name for name in expand if name not in REFERENCE_EXPANSIONS),
+        tuple(name for name in expand if name in REFERENCE_EXPANSIONS),
+    )
+
+def _organization_serializer(fields, joined=()):
+    """Serializer for the requested fields, embedding selectin-loaded relationships"""
+    return serializer_for(
+        Organization, fields, nested=[(name, ORGANIZATION_EXPANSIONS[name]) for name in joined]
+    )
+
+def _expanded_query(fields, expand, extra=()):
+    """
+    Organization query for `fields` (plus `extra` and the expansions' foreign
+    keys), with the database-backed expansions selectin-loaded
+    """
+    joined, _ = _split_expand(expand)
+    return Organization.query.options(
+        load_only_fields(Organization, fields, extra=tuple(extra) + expansion_keys(Organization, expand)),
+        *expand_options(Organization, joined, ORGANIZATION_EXPANSIONS)
+    )
+
+def _embed_references(item, values, referenced):
+    """Add category/location objects to a serialized org from the reference cache"""
+    for name in referenced:
+        item[name] = ReferenceService.embed(
+            REFERENCE_EXPANSIONS[name], values(expansion_keys(Organization, (name,))[0]),
+            ORGANIZATION_EXPANSIONS[name]
+        )
+
+def _fragment_fieldset(fields, expand):
+    """Fragment cache key part; served-from-memory expansions carry their table version"""
+    joined, referenced = _split_expand(expand)
+    return fields + tuple(f'+{name}' for name in joined) + tuple(
+        f'+{name}@{ReferenceService.version(REFERENCE_EXPANSIONS[name])}' for name in referenced
+    )
+
+def _serialize_organizations(org_ids, fields, expand, loaded):
+    """
+    {org_id: dict} for fragment misses, from rows already loaded or one IN
+    query (plus one query per database-backed expansion)
+    """
+    joined, referenced = _split_expand(expand)
+    serializer = _organization_serializer(fields, joined)
+    orgs = [loaded[org_id] for org_id in org_ids if org_id in loaded]
+    remaining = [org_id for org_id in org_ids if org_id not in loaded]
+    if remaining and not expand:
+        rows = db.session.execute(
+            select(*serializer.columns()).where(Organization.org_id.in_(remaining))
+        ).all()
+        result = {item['org_id']: item for item in serializer.tuples(rows)}
+    else:
+        result = {}
+        if remaining:
+            orgs.extend(_expanded_query(fields, expand).filter(Organization.org_id.in_(remaining)))
+    for org in orgs:
+        item = serializer.one(org)
+        _embed_references(item, lambda key: getattr(org, key), referenced)
+        result[org.org_id] = item
+    return result
+
+def _merge_pending_counters(fragments):
+    """Re-encode just the fragments of orgs with unflushed counter deltas"""
+    pending = {org_id for org_id, _ in CounterService.pending(org_id for org_id, _ in fragments)}
+    merged = []
+    for org_id, fragment in fragments:
+        if org_id in pending:
+            item = loads(fragment)
+            CounterService.merge_pending([item])
+            fragment = dumps(item)
+        merged.append(fragment)
+    return merged
+
+def _refresh_page_counts(cache_key, page, counter_version):
+    """
+    A cached page skeleton with its rows' counts re-read after counter
+    flushes: one primary-key query instead of reloading the page. The
+    refreshed skeleton replaces the cached one.
+    """
+    counts = {
+        row.org_id: (row.view_count, row.bookmark_count)
+        for row in db.session.execute(
+            select(Organization.org_id, Organization.view_count, Organization.bookmark_count)
+            .where(Organization.org_id.in_([org_id for org_id, *_ in page['rows']]))
+        )
+    }
+    page = dict(page, counters=counter_version, rows=[
+        [org_id, stamp, *counts.get(org_id, (views, bookmarks))]
+        for org_id, stamp, views, bookmarks in page['rows']
+    ])
+    CacheService.put(cache_key, page)
+    return page
+
+def _pending_counters_etag_part(org_ids):
+    """Unflushed counter deltas merged into a body, as an ETag part (None if none)"""
+    pending = CounterService.pending(org_ids)
+    return sorted(pending.items()) if pending else None
+
+def _page_link(cursor_param, cursor):
+    """Build the URL of a neighbouring page, keeping the other query args"""
+    if not cursor:
+        return None
+    args = request.args.to_dict()
+    args.pop('after', None)
+    args.pop('before', None)
+    args[cursor_param] = cursor
+    return url_for('orgs.get_organizations', **args)
+
 # Organization routes
 # Test with:
-# curl -X GET http://127.0.0.1:5000/orgs/
+# curl -X GET "http://127.0.0.1:5000/orgs/?limit=20&sort=-view_count"
+# curl -X GET "http://127.0.0.1:5000/orgs/?limit=20&sort=-view_count&after=CURSOR_FROM_NEXT"
+# curl -X GET "http://127.0.0.1:5000/orgs/?fields=summary,mission&exclude=website"
+# curl -X GET "http://127.0.0.1:5000/orgs/?category_id=1,2&status=approved&facets=true"
+# curl -X GET "http://127.0.0.1:5000/orgs/?expand=category,location"
 @orgs_bp.route('/', methods=['GET'])
 def get_organizations():
-    """Get all organizations"""
+    """Get organizations one keyset page at a time (summary fields by default)"""
     try:
-        organizations = Organization.query.all()
-        orgs_data = []
-        for org in organizations:
-            org_dict = {
-                'org_id': org.org_id,
-                'name': org.name,
-                'mission': org.mission,
-                'description': org.description,
-                'category_id': org.category_id,
-                'location_id': org.location_id,
-                'address': org.address,
-                'phone': org.phone,
-                'email': org.email,
-                'website': org.website,
-                'donation_link': org.donation_link,
-                'logo_url': org.logo_url,
-                'operating_hours': org.operating_hours,
-                'established_year': org.established_year,
-                'status': org.status,
-                'verification_level': org.verification_level,
-                'admin_user_id': org.admin_user_id,
-                'view_count': org.view_count,
-                'bookmark_count': org.bookmark_count
+        limit = parse_limit(request.args)
+        sort_name, descending = parse_sort(request.args, ORG_SORT_COLUMNS, default='name')
+        fields = parse_fieldset(request.args, ORGANIZATION_FIELDS, ORGANIZATION_PROFILES, default='summary')
+        expand = parse_expand(request.args, ORGANIZATION_EXPANSIONS)
+        filters = FacetService.parse_filters(request.args)
+
+        # Any org write bumps the collection version; counter flushes bump
+        # organization_counters, which only matters when the page shows or
+        # sorts by the counts
+        version, version_updated_at = VersionService.get('organizations')
+        counted = sort_name in COUNTER_FIELDS or any(field in fields for field in COUNTER_FIELDS)
+        page_version, updated_at = version, version_updated_at
+        counter_version = None
+        if counted:
+            counter_version, counter_updated_at = VersionService.get('organization_counters')
+            page_version = f'{version}.{counter_version}'
+            updated_at = max(filter(None, (version_updated_at, counter_updated_at)), default=None)
+
+        # Page skeletons (row ids + versions, cursors, facets) are keyed by the
+        # collection version, so any org write makes older pages unreachable.
+        # Flushes only re-key pages ordered by a counter; other pages keep
+        # their rows and have just their counts refreshed below.
+        skeleton_version = page_version if sort_name in COUNTER_FIELDS else version
+        cache_key = f'{ORG_LIST_PREFIX}{skeleton_version}:{representation_key()}'
+        loaded = {}
+
+        def load_page():
+            # One query for the page, plus one per database-backed expansion
+            query = FacetService.apply_filters(
+                _expanded_query(fields, expand, extra=(sort_name,) + ROW_VERSION_FIELDS), filters
+            )
+            result = keyset_paginate(
+                query,
+                sort_name,
+                ORG_SORT_COLUMNS[sort_name],
+                Organization.org_id,
+                descending=descending,
+                limit=limit,
+                after=request.args.get('after'),
+                before=request.args.get('before'),
+            )
+            loaded.update((org.org_id, org) for org in result.items)
+            meta = {
+                'limit': limit,
+                'sort': request.args.get('sort', 'name'),
+                'next_cursor': result.next_cursor,
+                'prev_cursor': result.prev_cursor,
+                'next': _page_link('after', result.next_cursor),
+                'prev': _page_link('before', result.prev_cursor)
             }
-            orgs_data.append(org_dict)
-        return jsonify(orgs_data), 200
+            if request.args.get('facets', '').lower() in ('1', 'true', 'yes'):
+                meta['facets'] = FacetService.counts(filters)
+            return loads(dumps({
+                'rows': [[org.org_id, org.updated_at, org.view_count, org.bookmark_count] for org in result.items],
+                'counters': counter_version,
+                'meta': meta,
+            }))
+
+        # A new version is a new key, so there is never a stale page to serve;
+        # concurrent first requests for it still share one query
+        page = CacheService.get_or_load(cache_key, load_page, stale=False)
+
+        # An unchanged version means an unchanged page: a skeleton cache hit
+        # answers 304 without touching organizations
+        pending = _pending_counters_etag_part(org_id for org_id, *_ in page['rows']) if counted else None
+        etag = make_etag('orgs', page_version, pending, representation_key())
+        unchanged = not_modified(etag, updated_at)
+        if unchanged:
+            return unchanged
+
+        # Each row is pre-encoded JSON; only rows without a current fragment
+        # are serialized, and the page is joined from the bytes. Expanded
+        # admin users are keyed by the org's row version only, so edits to
+        # them show up once the fragment expires (CACHE_TTL).
+        if counted and page['counters'] != counter_version:
+            page = _refresh_page_counts(cache_key, page, counter_version)
+        fragments = FragmentCache.fetch(
+            [(org_id, row_version(*versions)) for org_id, *versions in page['rows']],
+            _fragment_fieldset(fields, expand),
+            lambda org_ids: _serialize_organizations(org_ids, fields, expand, loaded)
+        )
+        fragments = _merge_pending_counters(fragments)
+        body = FragmentCache.assemble('data', fragments, page['meta'])
+        return with_validators(
+            (current_app.response_class(body, mimetype='application/json'), 200), etag, updated_at
+        )
+    except APIException as e:
+        return jsonify({"error": e.message}), e.status_code
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Test with:
+# curl -X GET "http://127.0.0.1:5000/orgs/search?q=food%20bank"
+# curl -X GET "http://127.0.0.1:5000/orgs/search?q=educat*&limit=10&offset=10"
+@orgs_bp.route('/search', methods=['GET'])
+def search_organizations():
+    """Full-text search over name, mission and description, best match first"""
+    try:
+        query_string = request.args.get('q', '').strip()
+        if not query_string:
+            return jsonify({"error": "Query parameter q is required"}), 400
+
+        limit = parse_limit(request.args)
+        try:
+            offset = max(0, min(int(request.args.get('offset', 0)), MAX_SEARCH_OFFSET))
+        except ValueError:
+            return jsonify({"error": "offset must be an integer"}), 400
+        fields = parse_fieldset(request.args, ORGANIZATION_FIELDS, ORGANIZATION_PROFILES, default='summary')
+
+        hits = SearchService.search(query_string, limit=limit, offset=offset)
+        orgs_by_id = {
+            org.org_id: org
+            for org in Organization.query.options(load_only_fields(Organization, fields))
+            .filter(Organization.org_id.in_([hit['org_id'] for hit in hits]))
+        }
+
+        serialize = serializer_for(Organization, fields).one
+        results = []
+        for hit in hits:
+            org = orgs_by_id.get(hit['org_id'])
+            if org is None:
+                continue
+            org_dict = serialize(org)
+            org_dict['rank'] = hit['rank']
+            org_dict['name_highlight'] = hit['name_highlight']
+            org_dict['snippet'] = hit['snippet']
+            results.append(org_dict)
+
+        return jsonify({
+            'data': results,
+            'q': query_string,
+            'limit': limit,
+            'offset': offset
+        }), 200
+    except APIException as e:
+        return jsonify({"error": e.message}), e.status_code
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Test with:
+# curl -X GET "http://127.0.0.1:5000/orgs/suggest?q=food%20ba&limit=5"
+@orgs_bp.route('/suggest', methods=['GET'])
+def suggest_organizations():
+    """Typeahead suggestions: organizations, categories and cities matching a prefix"""
+    try:
+        query_string = request.args.get('q', '')
+        limit = parse_limit(request.args, default=8, maximum=SUGGEST_MAX_LIMIT)
+        suggestions = SuggestService.suggest(query_string, limit)
+        return jsonify(dict(suggestions, q=query_string)), 200
+    except APIException as e:
+        return jsonify({"error": e.message}), e.status_code
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Test with:
+# curl -X GET "http://127.0.0.1:5000/orgs/trending?limit=10"
+# curl -X GET "http://127.0.0.1:5000/orgs/trending?category=3&limit=5"
+@orgs_bp.route('/trending', methods=['GET'])
+def trending_organizations():
+    """Organizations with the most time-decayed views and bookmarks, optionally per category"""
+    try:
+        limit = parse_limit(request.args, default=10, maximum=TRENDING_MAX_LIMIT)
+        category_id = request.args.get('category')
+        if category_id is not None:
+            try:
+                category_id = int(category_id)
+            except ValueError:
+                return jsonify({"error": "category must be an integer"}), 400
+
+        # Scores move with counter flushes, names and categories with org writes
+        version, version_updated_at = VersionService.get('organizations')
+        counter_version, counter_updated_at = VersionService.get('organization_counters')
+        version = f'{version}.{counter_version}'
+        updated_at = max(filter(None, (version_updated_at, counter_updated_at)), default=None)
+        etag = make_etag('trending', version, representation_key())
+        unchanged = not_modified(etag, updated_at)
+        if unchanged:
+            return unchanged
+
+        # Precomputed top-K for this category and version; a hit is a dict read
+        data = TrendingService.top(version, category_id)[:limit]
+        return with_validators((jsonify({
+            'data': data,
+            'category': category_id,
+            'limit': limit
+        }), 200), etag, updated_at)
+    except APIException as e:
+        return jsonify({"error": e.message}), e.status_code
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Test with:
+# curl -X GET "http://127.0.0.1:5000/orgs/changes?limit=500"
+# curl -X GET "http://127.0.0.1:5000/orgs/changes?since=CURSOR_FROM_PREVIOUS_RESPONSE"
+@orgs_bp.route('/changes', methods=['GET'])
+def organization_changes():
+    """Organizations created, updated or deleted since a cursor, for clients that mirror the directory"""
+    try:
+        limit = parse_limit(request.args, default=100, maximum=MAX_CHANGES_PAGE)
+        fields = parse_fieldset(request.args, ORGANIZATION_FIELDS, ORGANIZATION_PROFILES)
+        since = request.args.get('since')
+
+        # Every recorded change bumps the organizations version, so a poll
+        # with nothing new is a 304
+        version, version_updated_at = VersionService.get('organizations')
+        etag = make_etag('changes', version, representation_key())
+        unchanged = not_modified(etag, version_updated_at)
+        if unchanged:
+            return unchanged
+
+        changes, cursor, has_more = ChangeService.page(since, limit, fields)
+        return with_validators((jsonify({
+            'data': changes,
+            'cursor': cursor,
+            'has_more': has_more,
+            'limit': limit
+        }), 200), etag, version_updated_at)
+    except APIException as e:
+        return jsonify({"error": e.message}), e.status_code
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Test with:
+# curl -X GET "http://127.0.0.1:5000/orgs/nearby?lat=40.7128&lng=-74.0060&radius_km=5&limit=10"
+@orgs_bp.route('/nearby', methods=['GET'])
+def nearby_organizations():
+    """Organizations within radius_km of a point, nearest first"""
+    try:
+        try:
+            latitude = float(request.args['lat'])
+            longitude = float(request.args['lng'])
+            radius_km = float(request.args.get('radius_km', 10))
+        except KeyError:
+            return jsonify({"error": "lat and lng are required"}), 400
+        except ValueError:
+            return jsonify({"error": "lat, lng and radius_km must be numbers"}), 400
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return jsonify({"error": "lat must be in [-90, 90] and lng in [-180, 180]"}), 400
+        if not (0 < radius_km <= MAX_RADIUS_KM):
+            return jsonify({"error": f"radius_km must be in (0, {MAX_RADIUS_KM}]"}), 400
+
+        limit = parse_limit(request.args)
+        fields = parse_fieldset(request.args, ORGANIZATION_FIELDS, ORGANIZATION_PROFILES, default='summary')
+        filters = FacetService.parse_filters(request.args)
+        query = FacetService.apply_filters(Organization.query, filters).options(
+            load_only_fields(Organization, fields)
+        )
+
+        serialize = serializer_for(Organization, fields).one
+        results = []
+        for org, location, distance in GeoService.nearby(latitude, longitude, radius_km, limit, query):
+            org_dict = serialize(org)
+            org_dict['location'] = location
+            org_dict['distance_km'] = round(distance, 3)
+            results.append(org_dict)
+
+        return jsonify({
+            'data': results,
+            'lat': latitude,
+            'lng': longitude,
+            'radius_km': radius_km,
+            'limit': limit
+        }), 200
+    except APIException as e:
+        return jsonify({"error": e.message}), e.status_code
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Test with:
+# curl -X GET "http://127.0.0.1:5000/orgs/clusters?bbox=-74.3,40.5,-73.7,40.9&zoom=11"
+@orgs_bp.route('/clusters', methods=['GET'])
+def organization_clusters():
+    """Pre-aggregated map clusters for a viewport (bbox=west,south,east,north)"""
+    try:
+        try:
+            min_lng, min_lat, max_lng, max_lat = (float(v) for v in request.args['bbox'].split(','))
+            zoom = int(request.args.get('zoom', 0))
+        except KeyError:
+            return jsonify({"error": "bbox is required"}), 400
+        except ValueError:
+            return jsonify({"error": "bbox must be four numbers (west,south,east,north) and zoom an integer"}), 400
+        if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lng <= 180 and -180 <= max_lng <= 180):
+            return jsonify({"error": "bbox is out of range"}), 400
+
+        zoom_used, clusters = ClusterService.clusters(min_lng, min_lat, max_lng, max_lat, zoom)
+        return jsonify({
+            'data': clusters,
+            'zoom': zoom_used,
+            'requested_zoom': zoom
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Test with:
+# curl -X GET "http://127.0.0.1:5000/orgs/export?format=ndjson" -o organizations.ndjson
+# curl -X GET "http://127.0.0.1:5000/orgs/export?format=csv&gzip=true&status=approved" --compressed -o organizations.csv
+@orgs_bp.route('/export', methods=['GET'])
+def export_organizations():
+    """Stream the whole directory (optionally facet-filtered) as NDJSON or CSV"""
+    try:
+        fmt = request.args.get('format', 'ndjson')
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        filters = FacetService.parse_filters(request.args)
+        where = [getattr(Organization, facet).in_(values) for facet, values in filters.items()]
+        columns = [getattr(Organization, name).expression for name in ORGANIZATION_FIELDS]
+        return ExportService.response(
+            columns,
+            fmt,
+            'organizations',
+            compress=request.args.get('gzip', '').lower() in ('1', 'true', 'yes'),
+            where=where
+        )
+    except APIException as e:
+        return jsonify({"error": e.message}), e.status_code
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 # Test with:
 # curl -X GET http://127.0.0.1:5000/orgs/1
+# curl -X GET "http://127.0.0.1:5000/orgs/1?exclude=description,operating_hours"
+# curl -X GET "http://127.0.0.1:5000/orgs/1?expand=category,location,admin_user"
+# curl -i http://127.0.0.1:5000/orgs/1 -H 'If-None-Match: "ETAG_FROM_PREVIOUS_RESPONSE"'
 @orgs_bp.route('/<int:id>', methods=['GET'])
 def get_organization(id):
     """Get organization by ID"""
     try:
-        organization = Organization.query.get(id)
-        if not organization:
+        fields = parse_fieldset(request.args, ORGANIZATION_FIELDS, ORGANIZATION_PROFILES)
+        expand = parse_expand(request.args, ORGANIZATION_EXPANSIONS)
+
+        # Cached full representation; a hit answers without touching the database
+        entry = CacheService.get_or_load(ORG_KEY.format(id), lambda: _load_organization(id))
+        if entry is None:
             return jsonify({"error": "Organization not found"}), 404
+        version = entry['updated_at']
+        updated_at = datetime.fromisoformat(version) if version else None
+        # The body carries live counts (cached plus unflushed deltas), so
+        # they are part of the validator
+        org_dict = {name: entry[name] for name in fields}
+        counts = dict({field: org_dict[field] for field in COUNTER_FIELDS if field in org_dict}, org_id=id)
+        CounterService.merge_pending([counts])
+        del counts['org_id']
+        etag = make_etag('org', id, version, *counts.items(), representation_key())
+        unchanged = not_modified(etag, updated_at)
+        if unchanged:
+            return unchanged
 
-        org_dict = {
-            'org_id': organization.org_id,
-            'name': organization.name,
-            'mission': organization.mission,
-            'description': organization.description,
-            'category_id': organization.category_id,
-            'location_id': organization.location_id,
-            'address': organization.address,
-            'phone': organization.phone,
-            'email': organization.email,
-            'website': organization.website,
-            'donation_link': organization.donation_link,
-            'logo_url': organization.logo_url,
-            'operating_hours': organization.operating_hours,
-            'established_year': organization.established_year,
-            'status': organization.status,
-            'verification_level': organization.verification_level,
-            'admin_user_id': organization.admin_user_id,
-            'view_count': organization.view_count,
-            'bookmark_count': organization.bookmark_count
-        }
-        return jsonify(org_dict), 200
+        # Buffered; written by the counter flusher, not on this request.
+        # Only full responses count as views, not revalidations; this view is
+        # in the body, so revalidating it straight away is a 304.
+        CounterService.increment(id, 'view_count')
+        if 'view_count' in counts:
+            counts['view_count'] = (counts['view_count'] or 0) + 1
+            etag = make_etag('org', id, version, *counts.items(), representation_key())
+        org_dict.update(counts)
+        joined, referenced = _split_expand(expand)
+        _embed_references(org_dict, entry.get, referenced)
+        if joined:
+            # Related users are not cached with the org: one query per relationship
+            org = _expanded_query(('org_id',), joined).filter(Organization.org_id == id).first()
+            if org is not None:
+                org_dict.update(_organization_serializer((), joined).one(org))
+        return with_validators((jsonify(org_dict), 200), etag, updated_at)
+    except APIException as e:
+        return jsonify({"error": e.message}), e.status_code
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -79,7 +590,11 @@ def get_organization(id):
 # curl -X POST http://127.0.0.1:5000/orgs/ \
 #   -H "Content-Type: application/json" \
 #   -d '{"name": "Test Charity", "mission": "Help people", "description": "A test organization", "email": "test@charity.com"}'
+# curl -X POST "http://127.0.0.1:5000/orgs/?force=true" \
+#   -H "Content-Type: application/json" \
+#   -d '{"name": "Test Charity", "email": "test@charity.com"}'
 @orgs_bp.route('/', methods=['POST'])
+@validate_charity_data
 def add_organization():
     """Create a new organization"""
     try:
@@ -113,6 +628,36 @@ def add_organization():
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
+# Test with:
+# curl -X POST "http://127.0.0.1:5000/orgs/bulk?chunk_size=1000" \
+#   -H "Content-Type: application/json" \
+#   -d '[{"name": "Charity A", "category_id": 1}, {"name": "Charity B", "email": "b@charity.com"}]'
+# curl -X POST "http://127.0.0.1:5000/orgs/bulk?atomic=false" \
+#   -H "Content-Type: application/x-ndjson" --data-binary @organizations.ndjson
+# curl -X POST "http://127.0.0.1:5000/orgs/bulk?force=true" \
+#   -H "Content-Type: application/json" -d '[{"name": "Charity A"}]'
+@orgs_bp.route('/bulk', methods=['POST'])
+def bulk_add_organizations():
+    """Create many organizations from a JSON array or NDJSON"""
+    try:
+        return _bulk_write('create')
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+# Test with:
+# curl -X PATCH http://127.0.0.1:5000/orgs/bulk \
+#   -H "Content-Type: application/json" \
+#   -d '[{"org_id": 1, "status": "approved"}, {"org_id": 2, "mission": "Updated mission"}]'
+@orgs_bp.route('/bulk', methods=['PATCH'])
+def bulk_edit_organizations():
+    """Update many organizations by org_id from a JSON array or NDJSON"""
+    try:
+        return _bulk_write('update')
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
 # Test with:
 # curl -X PUT http://127.0.0.1:5000/orgs/1 \
 #   -H "Content-Type: application/json" \
@@ -161,6 +706,10 @@ def edit_organization(id):
         if 'verification_level' in data:
             organization.verification_level = data['verification_level']
 
+        # Row version for ETags; set explicitly so it changes even when the
+        # flush has nothing else to write
+        organization.updated_at = datetime.utcnow()
+
         db.session.commit()
         return jsonify({"msg": "Organization updated successfully"}), 200
     except Exception as e:
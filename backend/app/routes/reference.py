@@ -0,0 +1,38 @@
+from flask import Blueprint, current_app, jsonify
+from app.http_cache import make_etag, not_modified, with_validators
+from app.services.reference_service import ReferenceService
+
+reference_bp = Blueprint('reference', __name__)
+
+def _reference_response(name):
+    """Serve a whole reference table from memory, with its version as the ETag"""
+    snapshot = ReferenceService.snapshot(name)
+    etag = make_etag(name, snapshot.version)
+    unchanged = not_modified(etag, snapshot.updated_at)
+    if unchanged:
+        return unchanged
+    return with_validators(
+        (current_app.response_class(snapshot.body, mimetype='application/json'), 200), etag, snapshot.updated_at
+    )
+
+# Reference data routes
+# Test with:
+# curl -X GET http://127.0.0.1:5000/categories
+# curl -i http://127.0.0.1:5000/categories -H 'If-None-Match: "ETAG_FROM_PREVIOUS_RESPONSE"'
+@reference_bp.route('/categories', methods=['GET'])
+def get_categories():
+    """Get every category"""
+    try:
+        return _reference_response('categories')
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Test with:
+# curl -X GET http://127.0.0.1:5000/locations
+@reference_bp.route('/locations', methods=['GET'])
+def get_locations():
+    """Get every location"""
+    try:
+        return _reference_response('locations')
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
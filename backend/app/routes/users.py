@@ -1,11 +1,56 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash
+from datetime import datetime
+from flask import Blueprint, request, jsonify, url_for
+from flask_jwt_extended import jwt_required
 from app.models.user import User
 from app.db import db
+from app.services.password_service import PasswordService
+from app.services.token_service import TokenService
+from app.fieldsets import USER_FIELDS, USER_PROFILES, parse_fieldset, load_only_fields
+from app.http_cache import make_etag, not_modified, representation_key, with_validators
+from app.serializers import serializer_for
+from app.services.user_list_service import UserListService
+from app.services.version_service import VersionService
+from app.utils import APIException
 
 users_bp = Blueprint('users', __name__, url_prefix="/users")
 
+def _conditional_user_response(user_id, fields):
+    """Serve one user, answering 304 from the row version before loading it"""
+    version = db.session.query(User.updated_at).filter_by(user_id=user_id).first()
+    if version is None:
+        return jsonify({"error": "User not found"}), 404
+    updated_at = version.updated_at
+    etag = make_etag('user', user_id, updated_at.isoformat() if updated_at else None, representation_key())
+    unchanged = not_modified(etag, updated_at)
+    if unchanged:
+        return unchanged
+
+    user = User.query.options(load_only_fields(User, fields)).filter_by(user_id=user_id).first()
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+    return with_validators((jsonify(serializer_for(User, fields).one(user)), 200), etag, updated_at)
+
+def user_list_response(endpoint, filters, serializer):
+    """Keyset page of users with prev/next links, 304 while the users version is unchanged"""
+    version, updated_at = VersionService.get('users')
+    # Logins don't bump the users version; pages that show or filter on
+    # last_login also change with the latest login
+    latest_login = None
+    if 'last_login' in serializer.attributes or any(name.startswith('last_login_') for name in filters):
+        latest_login = UserListService.latest_login()
+        updated_at = max(filter(None, (updated_at, latest_login)), default=None)
+    etag = make_etag(endpoint, version, latest_login, representation_key())
+    unchanged = not_modified(etag, updated_at)
+    if unchanged:
+        return unchanged
+
+    page = UserListService.page(request.args, serializer, filters)
+    for link, cursor_param in (('next', 'after'), ('prev', 'before')):
+        cursor = page[f'{link}_cursor']
+        args = {key: value for key, value in request.args.items() if key not in ('after', 'before')}
+        page[link] = url_for(endpoint, **args, **{cursor_param: cursor}) if cursor else None
+    return with_validators((jsonify(page), 200), etag, updated_at)
+
 # User profile routes
 # Test with (requires JWT token from login):
 # curl -X GET http://127.0.0.1:5000/users/profile \
@@ -15,22 +60,11 @@ users_bp = Blueprint('users', __name__, url_prefix="/users")
 def get_profile():
     """Get current user's profile"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        if not user:
-            return jsonify({"error": "User not found"}), 404
-
-        user_dict = {
-            'user_id': user.user_id,
-            'name': user.name,
-            'email': user.email,
-            'role': user.role,
-            'is_verified': user.is_verified,
-            'profile_picture': user.profile_picture,
-            'created_at': user.created_at.isoformat() if user.created_at else None,
-            'last_login': user.last_login.isoformat() if user.last_login else None
-        }
-        return jsonify(user_dict), 200
+        current_user_id = TokenService.current_user_id()
+        fields = parse_fieldset(request.args, USER_FIELDS, USER_PROFILES)
+        return _conditional_user_response(current_user_id, fields)
+    except APIException as e:
+        return jsonify({"error": e.message}), e.status_code
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -44,7 +78,7 @@ def get_profile():
 def update_profile():
     """Update current user's profile"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = TokenService.current_user_id()
         data = request.get_json()
         if not data:
             return jsonify({"error": "No data provided"}), 400
@@ -65,36 +99,34 @@ def update_profile():
         if 'profile_picture' in data:
             user.profile_picture = data['profile_picture']
         if 'password' in data:
-            user.password_hash = generate_password_hash(data['password'])
+            user.password_hash = PasswordService.hash(data['password'])
+        user.updated_at = datetime.utcnow()
 
         db.session.commit()
         return jsonify({"msg": "Profile updated successfully"}), 200
+    except APIException as e:
+        # e.g. 503 from a saturated hashing pool, which clients should retry
+        db.session.rollback()
+        return jsonify({"error": e.message}), e.status_code
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
 # Admin routes for user management
 # Test with:
-# curl -X GET http://127.0.0.1:5000/users/
+# curl -X GET "http://127.0.0.1:5000/users/?limit=50&sort=-created_at"
+# curl -X GET "http://127.0.0.1:5000/users/?fields=summary&after=CURSOR_FROM_NEXT"
+# curl -X GET "http://127.0.0.1:5000/users/?role=admin&is_verified=true&created_after=2024-01-01&last_login_before=2024-06-01"
+# curl -X GET "http://127.0.0.1:5000/users/?q=ali&count=estimate"
 @users_bp.route('/', methods=['GET'])
 def get_users():
-    """Get all users (admin only)"""
+    """Get users one keyset page at a time, filtered and searched by name/email prefix (admin only)"""
     try:
-        users = User.query.all()
-        users_data = []
-        for user in users:
-            user_dict = {
-                'user_id': user.user_id,
-                'name': user.name,
-                'email': user.email,
-                'role': user.role,
-                'is_verified': user.is_verified,
-                'profile_picture': user.profile_picture,
-                'created_at': user.created_at.isoformat() if user.created_at else None,
-                'last_login': user.last_login.isoformat() if user.last_login else None
-            }
-            users_data.append(user_dict)
-        return jsonify(users_data), 200
+        fields = parse_fieldset(request.args, USER_FIELDS, USER_PROFILES)
+        filters = UserListService.parse_filters(request.args)
+        return user_list_response('users.get_users', filters, serializer_for(User, fields))
+    except APIException as e:
+        return jsonify({"error": e.message}), e.status_code
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -104,21 +136,10 @@ def get_users():
 def get_user(id):
     """Get specific user by ID"""
     try:
-        user = User.query.get(id)
-        if not user:
-            return jsonify({"error": "User not found"}), 404
-
-        user_dict = {
-            'user_id': user.user_id,
-            'name': user.name,
-            'email': user.email,
-            'role': user.role,
-            'is_verified': user.is_verified,
-            'profile_picture': user.profile_picture,
-            'created_at': user.created_at.isoformat() if user.created_at else None,
-            'last_login': user.last_login.isoformat() if user.last_login else None
-        }
-        return jsonify(user_dict), 200
+        fields = parse_fieldset(request.args, USER_FIELDS, USER_PROFILES)
+        return _conditional_user_response(id, fields)
+    except APIException as e:
+        return jsonify({"error": e.message}), e.status_code
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -143,7 +164,7 @@ def create_user():
             return jsonify({"error": "Email already exists"}), 400
 
         # Create new user
-        hashed_password = generate_password_hash(data['password'])
+        hashed_password = PasswordService.hash(data['password'])
         new_user = User(
             name=data['name'],
             email=data['email'],
@@ -157,6 +178,9 @@ def create_user():
         db.session.commit()
 
         return jsonify({"msg": "User created successfully", "user_id": new_user.user_id}), 201
+    except APIException as e:
+        db.session.rollback()
+        return jsonify({"error": e.message}), e.status_code
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
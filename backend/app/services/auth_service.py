@@ -6,11 +6,12 @@ Handles Google OAuth authentication, JWT tokens, and user management
 import os
 import secrets
 from datetime import datetime, timedelta
-from werkzeug.security import generate_password_hash, check_password_hash
-from flask_jwt_extended import create_access_token, create_refresh_token
+from flask_jwt_extended import create_refresh_token
 import requests
 from ..models.user import User
 from ..db import db
+from .password_service import PasswordService
+from .token_service import TokenService
 
 class GoogleOAuthService:
     """Service for handling Google OAuth 2.0 authentication"""
@@ -198,19 +199,19 @@ class AuthService:
     @staticmethod
     def hash_password(password):
         """Hash a password for storing in database"""
-        return generate_password_hash(password)
+        return PasswordService.hash(password)
 
     @staticmethod
     def verify_password(password, password_hash):
         """Verify a password against its hash"""
-        return check_password_hash(password_hash, password)
+        return PasswordService.verify(password, password_hash)
 
     @staticmethod
     def authenticate_user(email, password):
         """Authenticate user with email and password"""
         user = User.query.filter_by(email=email.lower().strip()).first()
 
-        if user and user.password_hash and AuthService.verify_password(password, user.password_hash):
+        if PasswordService.verify_and_update(user, password):
             user.last_login = datetime.utcnow()
             db.session.commit()
             return user
@@ -219,8 +220,8 @@ class AuthService:
     @staticmethod
     def create_tokens(user):
         """Create JWT access and refresh tokens for a user"""
-        access_token = create_access_token(
-            identity=user.user_id,
+        access_token = TokenService.issue(
+            user,
             expires_delta=timedelta(hours=24)  # 24 hour access token
         )
 
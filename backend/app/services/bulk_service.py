@@ -0,0 +1,294 @@
+"""
+Bulk Service - Set-based organization imports and updates
+Validates a whole batch in one pass, then writes it with executemany in chunks
+"""
+
+from datetime import datetime
+from sqlalchemy import insert, select, update
+from ..db import db
+from ..models.category import Category
+from ..models.location import Location
+from ..models.organization import Organization
+from ..models.user import User
+from ..serializers import loads
+from .duplicate_service import DuplicateIndex, DuplicateService, fingerprint
+from .org_sync import OrgChange, dispatch
+
+# Columns accepted by POST /orgs/bulk (the same ones POST /orgs/ takes)
+CREATE_FIELDS = (
+    'name', 'mission', 'description', 'category_id', 'location_id', 'address',
+    'phone', 'email', 'website', 'donation_link', 'logo_url', 'operating_hours',
+    'established_year', 'admin_user_id',
+)
+# Columns accepted by PATCH /orgs/bulk (the same ones PUT /orgs/<id> takes)
+UPDATE_FIELDS = tuple(f for f in CREATE_FIELDS if f != 'admin_user_id') + ('status', 'verification_level')
+INTEGER_FIELDS = ('category_id', 'location_id', 'established_year', 'admin_user_id')
+# Referenced rows are checked with one IN query per column, not one per row
+FOREIGN_KEYS = {
+    'category_id': Category.category_id,
+    'location_id': Location.location_id,
+    'admin_user_id': User.user_id,
+}
+# Keeps IN (...) lists within every backend's parameter limits
+LOOKUP_CHUNK_SIZE = 500
+MAX_CHUNK_SIZE = 5000
+
+
+class BulkService:
+    """Batch create/update of organizations with per-row error reporting"""
+
+    @staticmethod
+    def parse_rows(body, mimetype):
+        """
+        Decode a request body holding a JSON array or NDJSON (one object per
+        line). Returns (rows, errors); a line that is not valid JSON becomes
+        None in `rows` and an entry in `errors` keyed by its index.
+        """
+        text = body.decode('utf-8') if isinstance(body, bytes) else body
+        if mimetype in ('application/x-ndjson', 'application/jsonlines', 'application/jsonl'):
+            rows, errors = [], {}
+            for line in text.splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    rows.append(loads(line))
+                except ValueError as e:
+                    errors[len(rows)] = {'_row': f'Invalid JSON: {e}'}
+                    rows.append(None)
+            return rows, errors
+
+        try:
+            rows = loads(text) if text.strip() else None
+        except ValueError as e:
+            raise ValueError(f'Invalid JSON: {e}')
+        if not isinstance(rows, list):
+            raise ValueError('Body must be a JSON array of organizations or NDJSON')
+        return rows, {}
+
+    @staticmethod
+    def validate(rows, mode, errors=None):
+        """
+        Check every row before anything is written. `mode` is 'create' or
+        'update'. Returns (valid, errors): valid is a list of (index, values)
+        and errors maps a row index to {field: message}.
+        """
+        allowed = CREATE_FIELDS if mode == 'create' else UPDATE_FIELDS
+        columns = Organization.__table__.c
+        errors = dict(errors or {})
+        valid = []
+        seen_ids = set()
+
+        for index, row in enumerate(rows):
+            if index in errors:
+                continue
+            if not isinstance(row, dict):
+                errors[index] = {'_row': 'Must be a JSON object'}
+                continue
+
+            row_errors = {}
+            values = {}
+            for key, value in row.items():
+                if key == 'org_id' and mode == 'update':
+                    continue
+                if key not in allowed:
+                    row_errors[key] = 'Unknown or read-only field'
+                elif value is None:
+                    values[key] = None
+                elif key in INTEGER_FIELDS:
+                    if isinstance(value, bool) or not isinstance(value, int):
+                        row_errors[key] = 'Must be an integer'
+                    else:
+                        values[key] = value
+                elif not isinstance(value, str):
+                    row_errors[key] = 'Must be a string'
+                else:
+                    length = getattr(columns[key].type, 'length', None)
+                    if length and len(value) > length:
+                        row_errors[key] = f'Must be at most {length} characters'
+                    else:
+                        values[key] = value
+
+            if mode == 'create' or 'name' in row:
+                name = row.get('name')
+                if not isinstance(name, str) or not name.strip():
+                    row_errors['name'] = 'Name is required'
+
+            if mode == 'update':
+                org_id = row.get('org_id')
+                if isinstance(org_id, bool) or not isinstance(org_id, int):
+                    row_errors['org_id'] = 'org_id is required and must be an integer'
+                elif org_id in seen_ids:
+                    row_errors['org_id'] = 'Duplicate org_id in this batch'
+                else:
+                    seen_ids.add(org_id)
+                    values['org_id'] = org_id
+                if not row_errors and len(values) == 1:
+                    row_errors['_row'] = 'No fields to update'
+
+            if row_errors:
+                errors[index] = row_errors
+            else:
+                valid.append((index, values))
+
+        references = dict(FOREIGN_KEYS)
+        if mode == 'update':
+            references['org_id'] = Organization.org_id
+        for field, column in references.items():
+            wanted = {values[field] for _, values in valid if values.get(field) is not None}
+            missing = wanted - BulkService._existing(column, wanted)
+            if not missing:
+                continue
+            for index, values in valid:
+                if values.get(field) in missing:
+                    label = 'Organization' if field == 'org_id' else field
+                    errors.setdefault(index, {})[field] = f'{label} {values[field]} does not exist'
+
+        valid = [(index, values) for index, values in valid if index not in errors]
+        return valid, errors
+
+    @staticmethod
+    def flag_duplicates(valid, errors):
+        """
+        The near-duplicate check POST /orgs/ applies, per row: rows that look
+        like an existing organization, or like a row kept earlier in the same
+        batch, move from `valid` to `errors` with their suspected matches.
+        Returns (valid, errors).
+        """
+        errors = dict(errors)
+        kept = []
+        # Rows kept so far, keyed by row index; they are not in the
+        # organization index until the batch commits
+        batch = DuplicateIndex(())
+        for index, values in valid:
+            duplicates = DuplicateService.find(values)
+            if duplicates:
+                errors[index] = {
+                    '_row': 'This looks like an organization that is already registered',
+                    'duplicates': duplicates,
+                }
+                continue
+            record = fingerprint(values.get('name'), values.get('email'), values.get('website'),
+                                 values.get('address'))
+            matches = batch.find(record)
+            if matches:
+                errors[index] = {
+                    '_row': 'This looks like another row of this batch',
+                    'duplicates': [{'row': row, 'name': batch.records[row][0], 'score': score, 'reasons': reasons}
+                                   for score, row, reasons in matches],
+                }
+                continue
+            batch.add(index, record)
+            kept.append((index, values))
+        return kept, errors
+
+    @staticmethod
+    def _existing(column, ids):
+        found = set()
+        ids = list(ids)
+        for start in range(0, len(ids), LOOKUP_CHUNK_SIZE):
+            chunk = ids[start:start + LOOKUP_CHUNK_SIZE]
+            found.update(db.session.execute(select(column).where(column.in_(chunk))).scalars())
+        return found
+
+    @staticmethod
+    def create(valid, chunk_size, atomic=True):
+        """
+        Insert validated rows. Returns {index: org_id} for the rows written
+        and {index: {'_row': message}} for chunks that failed (chunked mode
+        only; in atomic mode any failure rolls everything back and raises).
+        """
+        return BulkService._write(valid, chunk_size, atomic, BulkService._insert_chunk)
+
+    @staticmethod
+    def update(valid, chunk_size, atomic=True):
+        """Apply validated partial updates keyed by org_id; same contract as create()"""
+        return BulkService._write(valid, chunk_size, atomic, BulkService._update_chunk)
+
+    @staticmethod
+    def _write(valid, chunk_size, atomic, write_chunk):
+        written = {}
+        failed = {}
+        try:
+            for start in range(0, len(valid), chunk_size):
+                chunk = valid[start:start + chunk_size]
+                try:
+                    written.update(write_chunk(chunk))
+                    if not atomic:
+                        db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    if atomic:
+                        raise
+                    for index, _ in chunk:
+                        failed[index] = {'_row': f'Chunk failed and was rolled back: {e}'}
+            if atomic:
+                db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return written, failed
+
+    @staticmethod
+    def _insert_chunk(chunk):
+        # Every row gets the full column set so the chunk is one executemany
+        rows = [{field: values.get(field) for field in CREATE_FIELDS} for _, values in chunk]
+        org_ids = db.session.execute(
+            insert(Organization).returning(Organization.org_id, sort_by_parameter_order=True),
+            rows
+        ).scalars().all()
+
+        dispatch(db.session.connection(), [
+            OrgChange('insert', org_id, None, dict(row, org_id=org_id))
+            for org_id, row in zip(org_ids, rows)
+        ])
+        return {index: org_id for (index, _), org_id in zip(chunk, org_ids)}
+
+    @staticmethod
+    def _update_chunk(chunk):
+        fields = sorted({field for _, values in chunk for field in values} - {'org_id'})
+        org_ids = [values['org_id'] for _, values in chunk]
+        before = {
+            row.org_id: row._asdict()
+            for row in db.session.execute(
+                select(Organization.org_id, Organization.updated_at,
+                       *(getattr(Organization, field) for field in fields))
+                .where(Organization.org_id.in_(org_ids))
+            )
+        }
+        # Rows deleted since validation are skipped rather than failing the chunk
+        chunk = [(index, values) for index, values in chunk if values['org_id'] in before]
+
+        now = datetime.utcnow()
+        mappings = [dict(values, updated_at=now) for _, values in chunk]
+        if mappings:
+            # ORM bulk UPDATE by primary key: one executemany per distinct key set
+            db.session.execute(update(Organization), mappings)
+
+        changes = []
+        for mapping in mappings:
+            old = before[mapping['org_id']]
+            changed = {field: old[field] for field in mapping
+                       if field != 'org_id' and old[field] != mapping[field]}
+            changes.append(OrgChange('update', mapping['org_id'], changed, dict(old, **mapping)))
+        dispatch(db.session.connection(), changes)
+        return {index: values['org_id'] for index, values in chunk}
+
+    @staticmethod
+    def results(total, written, errors, unwritten='Not written'):
+        """Per-row outcome list, in request order"""
+        results = []
+        for index in range(total):
+            if index in written:
+                results.append({'index': index, 'org_id': written[index]})
+            else:
+                results.append({'index': index, 'errors': errors.get(index, {'_row': unwritten})})
+        return results
+
+    @staticmethod
+    def chunk_size(value, default):
+        """Clamp a requested chunk size to 1..MAX_CHUNK_SIZE"""
+        try:
+            size = int(value) if value is not None else default
+        except (TypeError, ValueError):
+            raise ValueError('chunk_size must be an integer')
+        return max(1, min(size, MAX_CHUNK_SIZE))
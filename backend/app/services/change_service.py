@@ -0,0 +1,99 @@
+"""
+Change Service - Organization change feed
+Records the latest change of every organization under a monotonic sequence,
+with tombstones for deletes, and pages through it for /orgs/changes
+"""
+
+from datetime import datetime
+from sqlalchemy import delete, insert, select, tuple_
+from ..db import db
+from ..models.organization import Organization
+from ..models.organization_change import OrganizationChange
+from ..pagination import decode_cursor, encode_cursor
+from ..serializers import serializer_for
+from ..utils import APIException
+
+# Largest ?limit= for one page of changes
+MAX_CHANGES_PAGE = 1000
+# Keeps IN (...) lists within every backend's parameter limits
+CHUNK_SIZE = 500
+
+
+class ChangeService:
+    """
+    One row per organization holding its latest change. A client that saw
+    everything up to a cursor needs only the rows after it: each changed org
+    once, however often it changed, so a sync costs O(changes).
+    """
+
+    @staticmethod
+    def record(connection, changes, last_seq):
+        """
+        Store a batch of OrgChange tuples inside the writing transaction.
+        The caller has just bumped the organizations version to last_seq for
+        this batch and holds that row's lock until commit, so the batch owns
+        seqs (last_seq - len(changes), last_seq] and no lower seq can commit
+        after it: a reader that has seen seq N never misses a change <= N.
+        """
+        latest = {}
+        first_seq = last_seq - len(changes) + 1
+        for offset, change in enumerate(changes):
+            latest[change.org_id] = (first_seq + offset, 'delete' if change.op == 'delete' else 'upsert')
+
+        table = OrganizationChange.__table__
+        org_ids = list(latest)
+        for start in range(0, len(org_ids), CHUNK_SIZE):
+            connection.execute(delete(table).where(table.c.org_id.in_(org_ids[start:start + CHUNK_SIZE])))
+        now = datetime.utcnow()
+        connection.execute(insert(table), [
+            {'org_id': org_id, 'seq': seq, 'op': op, 'changed_at': now}
+            for org_id, (seq, op) in latest.items()
+        ])
+
+    @staticmethod
+    def parse_cursor(token):
+        """(seq, org_id) from a ?since= cursor; (-1, 0) starts from the beginning"""
+        if not token:
+            return -1, 0
+        cursor = decode_cursor(token)
+        if not isinstance(cursor, dict) or not isinstance(cursor.get('seq'), int) \
+                or not isinstance(cursor.get('id'), int):
+            raise APIException('Invalid cursor', status_code=400)
+        return cursor['seq'], cursor['id']
+
+    @staticmethod
+    def page(since, limit, fields):
+        """
+        Changes after the `since` cursor in seq order:
+        ([{'seq', 'op', 'org_id', 'organization'}], next cursor, has_more).
+        The org columns come from the same statement as the change rows, so
+        each entry shows the org as of its seq; deleted orgs have
+        'organization': None. Keep polling with the returned cursor.
+        """
+        seq, org_id = ChangeService.parse_cursor(since)
+        serializer = serializer_for(Organization, fields)
+        rows = db.session.execute(
+            select(OrganizationChange.seq, OrganizationChange.org_id, OrganizationChange.op, *serializer.columns())
+            .select_from(OrganizationChange.__table__.outerjoin(
+                Organization.__table__, Organization.org_id == OrganizationChange.org_id
+            ))
+            .where(tuple_(OrganizationChange.seq, OrganizationChange.org_id) > tuple_(seq, org_id))
+            .order_by(OrganizationChange.seq, OrganizationChange.org_id)
+            .limit(limit + 1)
+        ).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        organizations = serializer.tuples(row[3:] for row in rows)
+        changes = []
+        for row, organization in zip(rows, organizations):
+            exists = row.op != 'delete' and organization['org_id'] is not None
+            changes.append({
+                'seq': row.seq,
+                'op': 'upsert' if exists else 'delete',
+                'org_id': row.org_id,
+                'organization': organization if exists else None,
+            })
+        if rows:
+            since = encode_cursor({'seq': rows[-1].seq, 'id': rows[-1].org_id})
+        return changes, since, has_more
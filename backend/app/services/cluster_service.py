@@ -0,0 +1,288 @@
+"""
+Cluster Service - Map marker clustering
+Maintains per-zoom grid aggregates of organization coordinates and serves
+the clusters that fall inside a map viewport
+"""
+
+from collections import defaultdict
+from sqlalchemy import and_, bindparam, event, inspect, or_, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from ..geo import CELL_SUBDIVISION_BITS, mercator_cell, mercator_cell_bounds
+from ..models.location import Location
+from ..models.map_cluster_cell import MapClusterCell
+from ..models.organization import Organization
+from .org_sync import register_handler
+
+CLUSTER_MAX_ZOOM = 16
+MAX_REPRESENTATIVES = 3
+# Viewports covering more cells than this are served from a coarser zoom
+MAX_FEATURES = 500
+# Keeps tuple IN (...) lists within every backend's parameter limits
+LOOKUP_CHUNK_SIZE = 300
+
+
+class ClusterService:
+    """Hierarchical grid index of organization coordinates"""
+
+    @staticmethod
+    def cells_for(latitude, longitude):
+        """Every (zoom, x, y) cell containing the coordinate, zoom 0..MAX"""
+        return [(zoom,) + mercator_cell(latitude, longitude, zoom) for zoom in range(CLUSTER_MAX_ZOOM + 1)]
+
+    @staticmethod
+    def clusters(min_lng, min_lat, max_lng, max_lat, zoom):
+        """
+        Clusters inside the bounding box at (at most) `zoom`. A box crossing the
+        antimeridian has min_lng > max_lng. Returns (zoom used, list of dicts).
+        """
+        zoom = max(0, min(zoom, CLUSTER_MAX_ZOOM))
+        while True:
+            x_ranges, y_range = ClusterService._cell_ranges(min_lng, min_lat, max_lng, max_lat, zoom)
+            cell_count = sum(hi - lo + 1 for lo, hi in x_ranges) * (y_range[1] - y_range[0] + 1)
+            if cell_count <= MAX_FEATURES or zoom == 0:
+                break
+            zoom -= 1
+
+        table = MapClusterCell
+        cells = (
+            table.query
+            .filter(table.zoom == zoom, table.count > 0)
+            .filter(table.cell_y.between(*y_range))
+            .filter(or_(*(table.cell_x.between(lo, hi) for lo, hi in x_ranges)))
+            .all()
+        )
+        return zoom, [
+            {
+                'zoom': cell.zoom,
+                'x': cell.cell_x,
+                'y': cell.cell_y,
+                'count': cell.count,
+                'latitude': cell.sum_latitude / cell.count,
+                'longitude': cell.sum_longitude / cell.count,
+                'org_ids': cell.representative_org_ids or [],
+            }
+            for cell in cells
+        ]
+
+    @staticmethod
+    def _cell_ranges(min_lng, min_lat, max_lng, max_lat, zoom):
+        left, top = mercator_cell(max_lat, min_lng, zoom)
+        right, bottom = mercator_cell(min_lat, max_lng, zoom)
+        if min_lng <= max_lng:
+            x_ranges = [(left, right)]
+        else:
+            edge = (1 << (zoom + CELL_SUBDIVISION_BITS)) - 1
+            x_ranges = [(left, edge), (0, right)]
+        return x_ranges, (top, bottom)
+
+    @staticmethod
+    def sync_changes(connection, changes):
+        """Turn organization writes into grid moves"""
+        current_ids = [change.org_id for change in changes
+                       if change.op == 'insert' or (change.op == 'update' and 'location_id' in change.old)]
+        current = {}
+        if current_ids:
+            rows = connection.execute(
+                select(Organization.org_id, Organization.location_id)
+                .where(Organization.org_id.in_(current_ids))
+            )
+            current = dict(rows.all())
+
+        pairs = []
+        for change in changes:
+            if change.op == 'delete':
+                pairs.append((change.org_id, change.old.get('location_id'), None))
+            elif change.org_id in current:
+                old_location = change.old.get('location_id') if change.op == 'update' else None
+                pairs.append((change.org_id, old_location, current[change.org_id]))
+
+        location_ids = {loc for _, old, new in pairs for loc in (old, new) if loc is not None}
+        if not location_ids:
+            return
+        coordinates = {
+            row.location_id: (float(row.latitude), float(row.longitude))
+            for row in connection.execute(
+                select(Location.location_id, Location.latitude, Location.longitude)
+                .where(Location.location_id.in_(location_ids))
+                .where(Location.latitude.isnot(None), Location.longitude.isnot(None))
+            )
+        }
+        ClusterService.apply_moves(connection, [
+            (org_id, coordinates.get(old), coordinates.get(new)) for org_id, old, new in pairs
+        ])
+
+    @staticmethod
+    def apply_moves(connection, moves):
+        """
+        Apply (org_id, old (lat, lng) or None, new (lat, lng) or None) moves to
+        every zoom level: counts and coordinate sums first, then the
+        representative id lists of the touched cells.
+        """
+        deltas = defaultdict(lambda: [0, 0.0, 0.0])
+        added = defaultdict(list)
+        removed = defaultdict(set)
+        for org_id, old, new in moves:
+            if old == new:
+                continue
+            if old is not None:
+                for cell in ClusterService.cells_for(*old):
+                    delta = deltas[cell]
+                    delta[0] -= 1
+                    delta[1] -= old[0]
+                    delta[2] -= old[1]
+                    removed[cell].add(org_id)
+            if new is not None:
+                for cell in ClusterService.cells_for(*new):
+                    delta = deltas[cell]
+                    delta[0] += 1
+                    delta[1] += new[0]
+                    delta[2] += new[1]
+                    added[cell].append(org_id)
+        if not deltas:
+            return
+
+        ClusterService._apply_aggregates(connection, deltas)
+        ClusterService._update_representatives(connection, added, removed)
+
+    @staticmethod
+    def _apply_aggregates(connection, deltas):
+        table = MapClusterCell.__table__
+        rows = [
+            {'zoom': zoom, 'cell_x': x, 'cell_y': y, 'count': count,
+             'sum_latitude': sum_lat, 'sum_longitude': sum_lng}
+            for (zoom, x, y), (count, sum_lat, sum_lng) in deltas.items()
+        ]
+        dialect = connection.dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+            statement = insert(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.zoom, table.c.cell_x, table.c.cell_y],
+                set_={
+                    'count': table.c.count + statement.excluded.count,
+                    'sum_latitude': table.c.sum_latitude + statement.excluded.sum_latitude,
+                    'sum_longitude': table.c.sum_longitude + statement.excluded.sum_longitude,
+                }
+            )
+            connection.execute(statement, rows)
+        else:
+            for row in rows:
+                result = connection.execute(
+                    update(table)
+                    .where(table.c.zoom == row['zoom'], table.c.cell_x == row['cell_x'],
+                           table.c.cell_y == row['cell_y'])
+                    .values(count=table.c.count + row['count'],
+                            sum_latitude=table.c.sum_latitude + row['sum_latitude'],
+                            sum_longitude=table.c.sum_longitude + row['sum_longitude'])
+                )
+                if result.rowcount == 0:
+                    connection.execute(table.insert().values(**row))
+
+        # Drop cells that just emptied so viewport queries never see them
+        shrunk = [{'z': zoom, 'x': x, 'y': y} for (zoom, x, y), delta in deltas.items() if delta[0] < 0]
+        if shrunk:
+            connection.execute(
+                table.delete().where(
+                    table.c.zoom == bindparam('z'), table.c.cell_x == bindparam('x'),
+                    table.c.cell_y == bindparam('y'), table.c.count <= 0
+                ),
+                shrunk
+            )
+
+    @staticmethod
+    def _update_representatives(connection, added, removed):
+        table = MapClusterCell.__table__
+        touched = list(set(added) | set(removed))
+        updates = []
+        for start in range(0, len(touched), LOOKUP_CHUNK_SIZE):
+            chunk = touched[start:start + LOOKUP_CHUNK_SIZE]
+            rows = connection.execute(
+                select(table.c.zoom, table.c.cell_x, table.c.cell_y, table.c.count,
+                       table.c.representative_org_ids)
+                .where(tuple_(table.c.zoom, table.c.cell_x, table.c.cell_y).in_(chunk))
+            )
+            for zoom, x, y, count, current in rows:
+                cell = (zoom, x, y)
+                representatives = [org_id for org_id in (current or []) if org_id not in removed[cell]]
+                for org_id in added.get(cell, ()):
+                    if len(representatives) >= MAX_REPRESENTATIVES:
+                        break
+                    if org_id not in representatives:
+                        representatives.append(org_id)
+                if len(representatives) < min(count, MAX_REPRESENTATIVES):
+                    representatives = ClusterService._refill(connection, cell, representatives)
+                if representatives != (current or []):
+                    updates.append({'z': zoom, 'x': x, 'y': y, 'ids': representatives})
+
+        if updates:
+            connection.execute(
+                update(table)
+                .where(table.c.zoom == bindparam('z'), table.c.cell_x == bindparam('x'),
+                       table.c.cell_y == bindparam('y'))
+                .values(representative_org_ids=bindparam('ids', type_=table.c.representative_org_ids.type)),
+                updates
+            )
+
+    @staticmethod
+    def _refill(connection, cell, representatives):
+        """Top up a cell whose representatives were deleted or moved away"""
+        min_lat, max_lat, min_lng, max_lng = mercator_cell_bounds(cell[1], cell[2], cell[0])
+        query = (
+            select(Organization.org_id)
+            .join(Location, Organization.location_id == Location.location_id)
+            .where(and_(Location.latitude >= min_lat, Location.latitude < max_lat,
+                        Location.longitude >= min_lng, Location.longitude < max_lng))
+            .order_by(Organization.org_id)
+            .limit(MAX_REPRESENTATIVES)
+        )
+        if representatives:
+            query = query.where(Organization.org_id.notin_(representatives))
+        extra = [row[0] for row in connection.execute(query)]
+        return (representatives + extra)[:MAX_REPRESENTATIVES]
+
+    @staticmethod
+    def rebuild(connection):
+        """Recompute the whole grid from organizations joined to locations"""
+        connection.execute(MapClusterCell.__table__.delete())
+        rows = connection.execute(
+            select(Organization.org_id, Location.latitude, Location.longitude)
+            .join(Location, Organization.location_id == Location.location_id)
+            .where(Location.latitude.isnot(None), Location.longitude.isnot(None))
+        ).all()
+        ClusterService.apply_moves(connection, [
+            (org_id, None, (float(lat), float(lng))) for org_id, lat, lng in rows
+        ])
+
+
+# Load the coordinates being replaced even when they were expired by a
+# commit, so _location_moved can take the org out of its old cells
+@event.listens_for(Location.latitude, 'set', active_history=True)
+@event.listens_for(Location.longitude, 'set', active_history=True)
+def _load_previous_coordinate(target, value, oldvalue, initiator):
+    pass
+
+
+@event.listens_for(Location, 'after_update')
+def _location_moved(mapper, connection, target):
+    state = inspect(target)
+    lat_history = state.attrs.latitude.history
+    lng_history = state.attrs.longitude.history
+    if not (lat_history.has_changes() or lng_history.has_changes()):
+        return
+
+    def previous(history, current):
+        return history.deleted[0] if history.deleted else current
+
+    old_lat = previous(lat_history, target.latitude)
+    old_lng = previous(lng_history, target.longitude)
+    old = (float(old_lat), float(old_lng)) if old_lat is not None and old_lng is not None else None
+    new = (float(target.latitude), float(target.longitude)) \
+        if target.latitude is not None and target.longitude is not None else None
+
+    org_ids = connection.execute(
+        select(Organization.org_id).where(Organization.location_id == target.location_id)
+    ).scalars().all()
+    ClusterService.apply_moves(connection, [(org_id, old, new) for org_id in org_ids])
+
+
+register_handler(ClusterService.sync_changes)
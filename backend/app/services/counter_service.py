@@ -0,0 +1,267 @@
+"""
+Counter Service - Write-behind view and bookmark counters
+Increments are buffered (per worker, or in Redis when configured) and flushed
+to organizations in periodic batched UPDATEs, so hot rows see one write per
+flush instead of one per request
+"""
+
+import atexit
+import os
+import threading
+from collections import Counter
+from sqlalchemy import bindparam, update
+from ..db import db
+from ..models.organization import Organization
+from .cache_service import COUNTER_FIELDS
+from .org_sync import OrgChange, notify_committed
+from .trending_service import TrendingService
+from .version_service import VersionService
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class LocalCounterStore:
+    """Pending deltas held in this process; lost if the worker crashes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._deltas = Counter()
+
+    def incr(self, org_id, field, by=1):
+        """Add to a pending delta and return the number of pending keys"""
+        with self._lock:
+            self._deltas[(org_id, field)] += by
+            return len(self._deltas)
+
+    def pending(self, org_ids):
+        with self._lock:
+            return {key: delta for key, delta in self._deltas.items() if key[0] in org_ids}
+
+    def drain(self):
+        """Take every pending delta, leaving the store empty"""
+        with self._lock:
+            deltas, self._deltas = self._deltas, Counter()
+        return deltas
+
+    def restore(self, deltas):
+        """Put back deltas whose flush failed"""
+        with self._lock:
+            self._deltas.update(deltas)
+
+
+class RedisCounterStore:
+    """
+    Pending deltas in one Redis hash shared by every worker, so a worker
+    crash loses nothing that was not already being flushed
+    """
+
+    KEY = 'counters:organizations:pending'
+
+    def __init__(self, client):
+        self.client = client
+
+    @staticmethod
+    def _field(org_id, field):
+        return f'{org_id}:{field}'
+
+    def incr(self, org_id, field, by=1):
+        pipe = self.client.pipeline()
+        pipe.hincrby(self.KEY, self._field(org_id, field), by)
+        pipe.hlen(self.KEY)
+        return pipe.execute()[1]
+
+    def pending(self, org_ids):
+        keys = [(org_id, field) for org_id in org_ids for field in COUNTER_FIELDS]
+        if not keys:
+            return {}
+        values = self.client.hmget(self.KEY, [self._field(*key) for key in keys])
+        return {key: int(value) for key, value in zip(keys, values) if value}
+
+    def drain(self):
+        # HGETALL + DEL in one MULTI so concurrent increments land in the next batch
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hgetall(self.KEY)
+        pipe.delete(self.KEY)
+        raw = pipe.execute()[0]
+        deltas = Counter()
+        for name, value in raw.items():
+            name = name.decode() if isinstance(name, bytes) else name
+            org_id, field = name.split(':', 1)
+            deltas[(int(org_id), field)] += int(value)
+        return deltas
+
+    def restore(self, deltas):
+        pipe = self.client.pipeline()
+        for (org_id, field), delta in deltas.items():
+            pipe.hincrby(self.KEY, self._field(org_id, field), delta)
+        pipe.execute()
+
+
+class CounterService:
+    """
+    Buffered counters for Organization.view_count and bookmark_count.
+
+    Crash-loss bound: with the local store a worker that dies loses at most
+    COUNTER_FLUSH_INTERVAL seconds or COUNTER_FLUSH_THRESHOLD distinct keys
+    of increments, whichever comes first; with Redis only a batch that was
+    mid-flush can be lost. Normal shutdown flushes via atexit.
+    """
+
+    _app = None
+    _store = None
+    _interval = 5.0
+    _threshold = 1000
+    _wake = threading.Event()
+    _stopping = threading.Event()
+    _thread = None
+    _pid = None
+    _start_lock = threading.Lock()
+
+    @staticmethod
+    def init_app(app):
+        """Configure the store from COUNTER_BACKEND / REDIS_URL and register shutdown flushing"""
+        CounterService._app = app
+        CounterService._interval = float(app.config.get('COUNTER_FLUSH_INTERVAL') or 5.0)
+        CounterService._threshold = int(app.config.get('COUNTER_FLUSH_THRESHOLD') or 1000)
+        CounterService._store = CounterService._make_store(app.config)
+        atexit.register(CounterService.shutdown)
+
+    @staticmethod
+    def _make_store(config):
+        if config.get('COUNTER_BACKEND') == 'redis':
+            if redis is None or not config.get('REDIS_URL'):
+                print("Warning: redis counters need the redis package and REDIS_URL; using local counters")
+            else:
+                return RedisCounterStore(redis.Redis.from_url(config['REDIS_URL']))
+        return LocalCounterStore()
+
+    @staticmethod
+    def store():
+        if CounterService._store is None:
+            CounterService._store = LocalCounterStore()
+        return CounterService._store
+
+    @staticmethod
+    def increment(org_id, field='view_count', by=1):
+        """Count an event without touching the database on the request path"""
+        if field not in COUNTER_FIELDS:
+            raise ValueError(f'Unknown counter: {field}')
+        pending = CounterService.store().incr(org_id, field, by)
+        CounterService._ensure_flusher()
+        if pending >= CounterService._threshold:
+            CounterService._wake.set()
+
+    @staticmethod
+    def pending(org_ids):
+        """{(org_id, field): delta} not yet written to the database"""
+        return CounterService.store().pending(set(org_ids))
+
+    @staticmethod
+    def merge_pending(items):
+        """Add pending deltas to serialized organization dicts, in place"""
+        items = [item for item in items if 'org_id' in item]
+        if not items:
+            return
+        deltas = CounterService.pending(item['org_id'] for item in items)
+        if not deltas:
+            return
+        for item in items:
+            for field in COUNTER_FIELDS:
+                delta = deltas.get((item['org_id'], field))
+                if delta and field in item:
+                    item[field] = (item[field] or 0) + delta
+
+    @staticmethod
+    def flush():
+        """
+        Write every pending delta in one transaction: one executemany UPDATE
+        per counter column. Failed flushes put their deltas back. Returns the
+        number of (org, counter) pairs written.
+        """
+        store = CounterService.store()
+        deltas = store.drain()
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return 0
+        try:
+            if CounterService._app is not None:
+                with CounterService._app.app_context():
+                    CounterService._write(deltas)
+            else:
+                CounterService._write(deltas)
+        except Exception:
+            store.restore(deltas)
+            raise
+        return len(deltas)
+
+    @staticmethod
+    def _write(deltas):
+        table = Organization.__table__
+        with db.engine.begin() as connection:
+            for field in COUNTER_FIELDS:
+                rows = [{'id': org_id, 'delta': delta}
+                        for (org_id, name), delta in sorted(deltas.items()) if name == field]
+                if rows:
+                    column = table.c[field]
+                    connection.execute(
+                        update(table)
+                        .where(table.c.org_id == bindparam('id'))
+                        # Keeps updated_at: a view is not an edit, and row versions
+                        # already cover the counts
+                        .values({field: column + bindparam('delta'), 'updated_at': table.c.updated_at}),
+                        rows
+                    )
+            # Same deltas, time-decayed, feed /orgs/trending
+            TrendingService.record(connection, deltas)
+            # Counts have their own version: only representations that show or
+            # sort by them revalidate, not every organizations ETag and cache
+            VersionService.bump(connection, 'organization_counters')
+
+        # Committed outside the ORM session, so tell commit handlers directly.
+        # old names the counters that moved; their previous values are unknown.
+        touched = {}
+        for org_id, field in deltas:
+            touched.setdefault(org_id, {})[field] = None
+        notify_committed([OrgChange('update', org_id, old, None) for org_id, old in touched.items()])
+
+    @staticmethod
+    def _ensure_flusher():
+        # Started lazily and per process, so forked workers each get their own
+        if CounterService._thread is not None and CounterService._pid == os.getpid():
+            return
+        with CounterService._start_lock:
+            if CounterService._thread is not None and CounterService._pid == os.getpid():
+                return
+            CounterService._pid = os.getpid()
+            CounterService._stopping.clear()
+            CounterService._thread = threading.Thread(
+                target=CounterService._run, name='counter-flusher', daemon=True
+            )
+            CounterService._thread.start()
+
+    @staticmethod
+    def _run():
+        while not CounterService._stopping.is_set():
+            CounterService._wake.wait(CounterService._interval)
+            CounterService._wake.clear()
+            try:
+                CounterService.flush()
+            except Exception as e:
+                print(f"Warning: counter flush failed, will retry: {e}")
+
+    @staticmethod
+    def shutdown():
+        """Stop the flusher thread and write whatever is still pending"""
+        CounterService._stopping.set()
+        CounterService._wake.set()
+        thread = CounterService._thread
+        if thread is not None and thread.is_alive() and CounterService._pid == os.getpid():
+            thread.join(timeout=CounterService._interval + 5)
+        CounterService._thread = None
+        try:
+            CounterService.flush()
+        except Exception as e:
+            print(f"Warning: final counter flush failed: {e}")
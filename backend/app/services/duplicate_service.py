@@ -0,0 +1,358 @@
+"""
+Duplicate Service - Near-duplicate organization detection
+Exact keys for email and website plus MinHash/LSH buckets over name and
+address trigrams, so a submission is compared with a handful of candidates
+instead of every organization
+"""
+
+import threading
+import time
+from collections import defaultdict
+from random import Random
+from urllib.parse import urlsplit
+from sqlalchemy import select
+from ..db import db
+from ..models.organization import Organization
+from .org_sync import register_commit_handler
+from .suggest_service import normalize
+
+# 6 bands of 3 rows: pairs with trigram Jaccard above ~0.55 very likely share a band
+BANDS = 6
+ROWS_PER_BAND = 3
+# MinHash "permutations" as XOR masks over hash(), cut to 30 bits so the
+# ints stay small. The index never leaves this process, so the per-process
+# string hash seed does not matter.
+_HASH_BITS = (1 << 30) - 1
+_MASKS = [Random(1729 + i).getrandbits(30) for i in range(BANDS * ROWS_PER_BAND)]
+
+# A name this similar is a duplicate on its own...
+NAME_THRESHOLD = 0.8
+# ...a weaker name match needs the address to agree too
+NAME_WITH_ADDRESS_THRESHOLD = 0.5
+ADDRESS_THRESHOLD = 0.7
+# Buckets bigger than this are common words, not duplicates; the report skips them
+MAX_BUCKET = 50
+# Lookups compare against at most this many members of any one bucket
+FIND_BUCKET_LIMIT = 16
+MATCH_FIELDS = ('name', 'email', 'website', 'address')
+
+NAME_NOISE = {'the', 'of', 'and', 'inc', 'incorporated', 'llc', 'ltd', 'limited', 'co', 'corp', 'corporation'}
+ADDRESS_ABBREVIATIONS = {
+    'street': 'st', 'avenue': 'ave', 'road': 'rd', 'boulevard': 'blvd', 'drive': 'dr',
+    'lane': 'ln', 'suite': 'ste', 'apartment': 'apt', 'north': 'n', 'south': 's',
+    'east': 'e', 'west': 'w', 'floor': 'fl',
+}
+
+
+def name_key(name):
+    return ' '.join(word for word in normalize(name).split(' ') if word not in NAME_NOISE)
+
+
+def address_key(address):
+    return ' '.join(ADDRESS_ABBREVIATIONS.get(word, word) for word in normalize(address).split(' '))
+
+
+def email_key(email):
+    """Lower-cased address without a +tag"""
+    email = (email or '').strip().lower()
+    local, at, domain = email.partition('@')
+    if not at or not local or not domain:
+        return None
+    return f"{local.split('+', 1)[0]}@{domain}"
+
+
+def website_key(website):
+    """Host and path without scheme, www., query or trailing slash"""
+    website = (website or '').strip().lower()
+    if not website:
+        return None
+    parts = urlsplit(website if '://' in website else f'http://{website}')
+    host = parts.hostname or ''
+    if host.startswith('www.'):
+        host = host[4:]
+    return (host + parts.path.rstrip('/')) or None
+
+
+def trigrams(text):
+    text = f' {text} '
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def jaccard(a, b):
+    """Similarity of two trigram sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def lsh_buckets(text, kind):
+    """Band keys of text's MinHash signature; similar texts share at least one"""
+    if not text:
+        return []
+    hashes = [hash(gram) & _HASH_BITS for gram in trigrams(text)]
+    signature = [min(map(mask.__xor__, hashes)) for mask in _MASKS]
+    return [
+        (kind, band, hash(tuple(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND])))
+        for band in range(BANDS)
+    ]
+
+
+def fingerprint(name, email, website, address):
+    """(display name, name key, address key, email key, website key)"""
+    return (name, name_key(name), address_key(address), email_key(email), website_key(website))
+
+
+def shingles(record):
+    """(name trigrams, address trigrams) of a fingerprint"""
+    return (trigrams(record[1]) if record[1] else set(),
+            trigrams(record[2]) if record[2] else set())
+
+
+def compare(a, b, a_shingles=None, b_shingles=None):
+    """
+    (score, reasons) for two fingerprints; score 0 means not a duplicate.
+    Pass precomputed shingles() when comparing one record many times.
+    """
+    a_names, a_addresses = a_shingles or shingles(a)
+    b_names, b_addresses = b_shingles or shingles(b)
+    reasons = []
+    if a[3] and a[3] == b[3]:
+        reasons.append('email')
+    if a[4] and a[4] == b[4]:
+        reasons.append('website')
+    name_similarity = jaccard(a_names, b_names)
+    if name_similarity >= NAME_THRESHOLD:
+        reasons.append('name')
+    if name_similarity >= NAME_WITH_ADDRESS_THRESHOLD and jaccard(a_addresses, b_addresses) >= ADDRESS_THRESHOLD:
+        reasons.append('address')
+    if not reasons:
+        return 0.0, reasons
+    score = 1.0 if {'email', 'website'} & set(reasons) else round(name_similarity, 3)
+    return score, reasons
+
+
+class DuplicateIndex:
+    """
+    Fingerprints with exact-key and LSH bucket maps. Not thread-safe on its
+    own; DuplicateService serializes access.
+    """
+
+    def __init__(self, rows):
+        self.records = {}
+        self.buckets = defaultdict(list)
+        for row in rows:
+            self.add(row[0], fingerprint(*row[1:]))
+
+    def _keys(self, record):
+        keys = lsh_buckets(record[1], 'name') + lsh_buckets(record[2], 'address')
+        if record[3]:
+            keys.append(('email', record[3]))
+        if record[4]:
+            keys.append(('website', record[4]))
+        return keys
+
+    def add(self, org_id, record):
+        self.records[org_id] = record
+        for key in self._keys(record):
+            self.buckets[key].append(org_id)
+
+    def remove(self, org_id):
+        record = self.records.pop(org_id, None)
+        if record is None:
+            return
+        for key in self._keys(record):
+            bucket = self.buckets.get(key)
+            if bucket and org_id in bucket:
+                bucket.remove(org_id)
+                if not bucket:
+                    del self.buckets[key]
+
+    def find(self, record, exclude=None, limit=5):
+        """Best matches for a fingerprint: [(score, org_id, reasons)]"""
+        candidates = set()
+        for key in self._keys(record):
+            candidates.update(self.buckets.get(key, ())[:FIND_BUCKET_LIMIT])
+        candidates.discard(exclude)
+        record_shingles = shingles(record)
+        matches = []
+        for org_id in candidates:
+            score, reasons = compare(record, self.records[org_id], record_shingles)
+            if score:
+                matches.append((score, org_id, reasons))
+        matches.sort(key=lambda match: (-match[0], match[1]))
+        return matches[:limit]
+
+    def clusters(self):
+        """
+        Groups of suspected duplicates: each bucket's pairs are verified and
+        joined with union-find, so the work grows with the number of rows,
+        not their square
+        """
+        parent = {}
+
+        def root(org_id):
+            while parent.get(org_id, org_id) != org_id:
+                parent[org_id] = parent.get(parent[org_id], parent[org_id])
+                org_id = parent[org_id]
+            return org_id
+
+        reasons = defaultdict(set)
+        checked = set()
+        cache = {}
+
+        def cached_shingles(org_id):
+            if org_id not in cache:
+                cache[org_id] = shingles(self.records[org_id])
+            return cache[org_id]
+
+        for bucket in self.buckets.values():
+            if len(bucket) < 2 or len(bucket) > MAX_BUCKET:
+                continue
+            for i, a in enumerate(bucket):
+                for b in bucket[i + 1:]:
+                    pair = (a, b) if a < b else (b, a)
+                    if pair in checked:
+                        continue
+                    checked.add(pair)
+                    score, why = compare(self.records[a], self.records[b], cached_shingles(a), cached_shingles(b))
+                    if score:
+                        parent.setdefault(a, a)
+                        parent.setdefault(b, b)
+                        ra, rb = root(a), root(b)
+                        if ra != rb:
+                            parent[max(ra, rb)] = min(ra, rb)
+                        reasons[pair].update(why)
+
+        groups = defaultdict(list)
+        for org_id in parent:
+            groups[root(org_id)].append(org_id)
+        cluster_reasons = defaultdict(set)
+        for (a, _), why in reasons.items():
+            cluster_reasons[root(a)].update(why)
+        return [
+            (sorted(members), sorted(cluster_reasons[group]))
+            for group, members in sorted(groups.items(), key=lambda item: (-len(item[1]), item[0]))
+        ]
+
+
+class DuplicateService:
+    """
+    Per-process duplicate index, built on first use in one pass over
+    organizations and kept current by this worker's commits; a periodic
+    rebuild (DUPLICATE_REBUILD_INTERVAL) picks up other workers' writes
+    """
+
+    _app = None
+    _index = None
+    _built_at = 0.0
+    _rebuild_interval = 300.0
+    _lock = threading.Lock()
+    _build_lock = threading.Lock()
+    _changed_during_build = None
+
+    @staticmethod
+    def init_app(app):
+        DuplicateService._app = app
+        DuplicateService._rebuild_interval = float(app.config.get('DUPLICATE_REBUILD_INTERVAL') or 300.0)
+
+    @staticmethod
+    def _rows(connection, org_ids=None):
+        query = select(Organization.org_id, Organization.name, Organization.email,
+                       Organization.website, Organization.address)
+        if org_ids is not None:
+            query = query.where(Organization.org_id.in_(org_ids))
+        return connection.execute(query).all()
+
+    @staticmethod
+    def _build():
+        with DuplicateService._lock:
+            DuplicateService._changed_during_build = set()
+        try:
+            with db.engine.connect() as connection:
+                index = DuplicateIndex(DuplicateService._rows(connection))
+        except Exception:
+            with DuplicateService._lock:
+                DuplicateService._changed_during_build = None
+            raise
+        with DuplicateService._lock:
+            changed, DuplicateService._changed_during_build = DuplicateService._changed_during_build, None
+            DuplicateService._index = index
+            DuplicateService._built_at = time.monotonic()
+        if changed:
+            DuplicateService._reload(changed)
+
+    @staticmethod
+    def _rebuild_in_background():
+        def rebuild():
+            try:
+                with DuplicateService._app.app_context():
+                    DuplicateService._build()
+            except Exception as e:
+                print(f"Warning: duplicate index rebuild failed: {e}")
+            finally:
+                DuplicateService._build_lock.release()
+
+        if DuplicateService._build_lock.acquire(blocking=False):
+            threading.Thread(target=rebuild, name='duplicate-rebuild', daemon=True).start()
+
+    @staticmethod
+    def index():
+        """The duplicate index, building it on first use"""
+        if DuplicateService._index is None:
+            with DuplicateService._build_lock:
+                if DuplicateService._index is None:
+                    DuplicateService._build()
+        elif (DuplicateService._app is not None
+              and time.monotonic() - DuplicateService._built_at > DuplicateService._rebuild_interval):
+            DuplicateService._rebuild_in_background()
+        return DuplicateService._index
+
+    @staticmethod
+    def find(data, exclude=None, limit=5):
+        """
+        Existing organizations that look like the submitted one, best first:
+        [{'org_id', 'name', 'score', 'reasons'}]
+        """
+        record = fingerprint(data.get('name'), data.get('email'), data.get('website'), data.get('address'))
+        index = DuplicateService.index()
+        with DuplicateService._lock:
+            return [
+                {'org_id': org_id, 'name': index.records[org_id][0], 'score': score, 'reasons': reasons}
+                for score, org_id, reasons in index.find(record, exclude=exclude, limit=limit)
+            ]
+
+    @staticmethod
+    def clusters():
+        """[(org_ids, reasons)] for every group of suspected duplicates, largest first"""
+        index = DuplicateService.index()
+        with DuplicateService._lock:
+            return index.clusters()
+
+    @staticmethod
+    def _reload(org_ids):
+        with db.engine.connect() as connection:
+            rows = DuplicateService._rows(connection, list(org_ids))
+        with DuplicateService._lock:
+            for org_id in org_ids:
+                DuplicateService._index.remove(org_id)
+            for row in rows:
+                DuplicateService._index.add(row[0], fingerprint(*row[1:]))
+
+    @staticmethod
+    def sync_changes(changes):
+        """Commit handler: re-index orgs whose name, email, website or address changed"""
+        org_ids = {
+            change.org_id for change in changes
+            if change.op != 'update' or any(field in change.old for field in MATCH_FIELDS)
+        }
+        if not org_ids:
+            return
+        with DuplicateService._lock:
+            if DuplicateService._changed_during_build is not None:
+                DuplicateService._changed_during_build.update(org_ids)
+            if DuplicateService._index is None:
+                return
+        DuplicateService._reload(org_ids)
+
+
+register_commit_handler(DuplicateService.sync_changes)
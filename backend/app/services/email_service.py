@@ -3,8 +3,11 @@ Email Service - User Registration and Organization Approval Notifications
 Handles email sending for various platform notifications
 """
 
+import atexit
 import os
+import queue
 import smtplib
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
@@ -19,6 +22,13 @@ class EmailService:
     SMTP_USERNAME = os.getenv('SMTP_USERNAME')
     SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
     FROM_EMAIL = os.getenv('FROM_EMAIL', SMTP_USERNAME)
+    # Emails waiting for the background sender; enqueue() refuses more
+    QUEUE_SIZE = int(os.getenv('EMAIL_QUEUE_SIZE', '10000'))
+
+    _outbox = queue.Queue(maxsize=QUEUE_SIZE)
+    _thread = None
+    _pid = None
+    _start_lock = threading.Lock()
 
     @staticmethod
     def _send_email(to_email, subject, html_content, text_content=None):
@@ -55,6 +65,56 @@ class EmailService:
         except Exception as e:
             return False, str(e)
 
+    @staticmethod
+    def enqueue(send, *args):
+        """
+        Run send(*args), e.g. EmailService.send_welcome_email, on the
+        background sender thread so SMTP round trips stay off the request.
+        Returns False if the outbox is full and the email was not queued.
+        """
+        try:
+            EmailService._outbox.put_nowait((send, args))
+        except queue.Full:
+            print(f"Warning: email outbox full, dropped {send.__name__}")
+            return False
+        EmailService._ensure_sender()
+        return True
+
+    @staticmethod
+    def _ensure_sender():
+        # Started lazily and per process, so forked workers each get their own
+        if EmailService._thread is not None and EmailService._pid == os.getpid():
+            return
+        with EmailService._start_lock:
+            if EmailService._thread is not None and EmailService._pid == os.getpid():
+                return
+            EmailService._pid = os.getpid()
+            EmailService._thread = threading.Thread(target=EmailService._run, name='email-sender', daemon=True)
+            EmailService._thread.start()
+
+    @staticmethod
+    def _run():
+        while True:
+            send, args = EmailService._outbox.get()
+            try:
+                success, error = send(*args)
+                if not success:
+                    print(f"Warning: {send.__name__} failed: {error}")
+            except Exception as e:
+                print(f"Warning: {send.__name__} failed: {e}")
+            finally:
+                EmailService._outbox.task_done()
+
+    @staticmethod
+    def drain(timeout=10.0):
+        """Wait up to `timeout` seconds for queued emails to go out (called at exit)"""
+        if EmailService._thread is None or EmailService._pid != os.getpid():
+            return
+        with EmailService._outbox.all_tasks_done:
+            EmailService._outbox.all_tasks_done.wait_for(
+                lambda: not EmailService._outbox.unfinished_tasks, timeout
+            )
+
     @staticmethod
     def send_welcome_email(user_name, user_email):
         """
@@ -206,6 +266,8 @@ class EmailService:
 
         return EmailService._send_email(contact_email, subject, html_content, text_content)
 
+atexit.register(EmailService.drain)
+
 # TODO: Implement additional email services
 # TODO: Password reset emails with secure tokens
 # TODO: Admin notification emails for new organization applications
@@ -228,3 +290,4 @@ class EmailService:
 # Usage examples:
 # success, error = EmailService.send_welcome_email("John Doe", "john@example.com")
 # success, error = EmailService.send_organization_approval_email("My Charity", "contact@mycharity.org", "Admin Name", "approved")
+# EmailService.enqueue(EmailService.send_organization_approval_email, "My Charity", "contact@mycharity.org", "Admin Name", "approved")
@@ -0,0 +1,251 @@
+"""
+Event Service - Live organization change events
+Committed org writes become compact events fanned out to Server-Sent Events
+subscribers through an in-process hub; with Redis pub/sub every worker's
+subscribers see every worker's writes
+"""
+
+import threading
+import time
+from collections import deque
+from ..serializers import dumps, loads
+from .cache_service import CacheMetrics
+from .org_sync import register_commit_handler
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+EVENT_TYPES = ('created', 'updated', 'approved', 'deleted')
+# Written by counter flushes; not worth waking every live page for
+COUNTER_FIELDS = ('view_count', 'bookmark_count')
+
+
+def change_events(changes):
+    """Compact event dicts for a batch of OrgChange tuples"""
+    events = []
+    for change in changes:
+        if change.op == 'insert':
+            kind, values = 'created', change.new
+        elif change.op == 'delete':
+            kind, values = 'deleted', change.old
+        else:
+            fields = [field for field in change.old if field not in COUNTER_FIELDS]
+            if not fields or change.new is None:
+                continue
+            values = change.new
+            approved = 'status' in change.old and values.get('status') == 'approved'
+            kind = 'approved' if approved else 'updated'
+        event = {'type': kind, 'org_id': change.org_id,
+                 'name': values.get('name'), 'status': values.get('status')}
+        if change.op == 'update':
+            event['fields'] = sorted(fields)
+        events.append(event)
+    return events
+
+
+class Subscription:
+    """
+    One client's queue. Bounded: when a slow client falls `maxsize` events
+    behind, the oldest are dropped and counted so the stream can tell the
+    client to refetch instead of stalling the publisher.
+    """
+
+    def __init__(self, maxsize, types=None):
+        self.types = set(types) if types else None
+        self.dropped = 0
+        self._events = deque(maxlen=maxsize)
+        self._ready = threading.Condition()
+
+    def push(self, event):
+        """Queue an event without blocking; returns True if an older one was dropped"""
+        with self._ready:
+            full = len(self._events) == self._events.maxlen
+            if full:
+                self.dropped += 1
+            self._events.append(event)
+            self._ready.notify()
+        return full
+
+    def drain(self, timeout):
+        """
+        Wait up to `timeout` seconds for events; returns (events, dropped
+        since the last call)
+        """
+        with self._ready:
+            if not self._events:
+                self._ready.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            dropped, self.dropped = self.dropped, 0
+        return events, dropped
+
+
+class BroadcastHub:
+    """Fans events out to this process's subscriptions"""
+
+    def __init__(self, queue_size=256, max_subscribers=1000):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.metrics = CacheMetrics(('published', 'delivered', 'dropped', 'rejected'))
+        self._lock = threading.Lock()
+        # Serializes publishers so every client sees events in id order
+        self._publish_lock = threading.Lock()
+        self._subscriptions = set()
+        self._next_id = 0
+
+    def subscribe(self, types=None):
+        """A new Subscription, or None when the process is at max_subscribers"""
+        with self._lock:
+            if len(self._subscriptions) >= self.max_subscribers:
+                self.metrics.incr('rejected')
+                return None
+            subscription = Subscription(self.queue_size, types)
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def connections(self):
+        with self._lock:
+            return len(self._subscriptions)
+
+    def publish(self, events):
+        """Deliver events to every subscription; never blocks on a slow client"""
+        delivered = dropped = 0
+        with self._publish_lock:
+            with self._lock:
+                subscriptions = list(self._subscriptions)
+            for event in events:
+                # Ids are per process: good for ordering, not for resuming elsewhere
+                self._next_id += 1
+                event['id'] = self._next_id
+                for subscription in subscriptions:
+                    if subscription.types is None or event['type'] in subscription.types:
+                        dropped += subscription.push(event)
+                        delivered += 1
+        self.metrics.incr('published', len(events))
+        self.metrics.incr('delivered', delivered)
+        if dropped:
+            self.metrics.incr('dropped', dropped)
+
+
+class LocalEventBackend:
+    """Single-process stand-in for pub/sub: publishing is delivering"""
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def publish(self, events):
+        self.hub.publish(events)
+
+    def start(self):
+        pass
+
+
+class RedisEventBackend:
+    """
+    Redis pub/sub between workers. Every worker publishes its commits to one
+    channel and relays the channel, its own messages included, to its hub,
+    so each event reaches each subscriber exactly once.
+    """
+
+    def __init__(self, hub, client, channel='events:orgs'):
+        self.hub = hub
+        self.client = client
+        self.channel = channel
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def publish(self, events):
+        try:
+            self.client.publish(self.channel, dumps(events))
+        except Exception as e:
+            print(f"Warning: event publish failed, delivering locally only: {e}")
+            self.hub.publish(events)
+
+    def start(self):
+        """Start the relay thread, once per process, on the first subscriber"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._relay, name='event-relay', daemon=True)
+                self._thread.start()
+
+    def _relay(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        self.hub.publish(loads(message['data']))
+            except Exception as e:
+                print(f"Warning: event relay lost its Redis subscription: {e}")
+                time.sleep(1.0)
+
+
+class EventService:
+    """
+    Entry point for /events/orgs. Events are best effort: a client that
+    reconnects, or is told events were dropped, catches up from
+    /orgs/changes rather than from this stream.
+    """
+
+    _hub = BroadcastHub()
+    _backend = LocalEventBackend(_hub)
+    heartbeat = 15.0
+
+    @staticmethod
+    def init_app(app, client=None):
+        """
+        Configure from EVENTS_* settings. Pass `client` (e.g. a FakeRedis) to
+        use it for pub/sub regardless of EVENTS_BACKEND.
+        """
+        config = app.config
+        EventService.heartbeat = float(config.get('EVENTS_HEARTBEAT') or 15.0)
+        EventService._hub = BroadcastHub(
+            queue_size=int(config.get('EVENTS_QUEUE_SIZE') or 256),
+            max_subscribers=int(config.get('EVENTS_MAX_SUBSCRIBERS') or 1000),
+        )
+        if client is None and config.get('EVENTS_BACKEND') == 'redis':
+            if redis is None or not config.get('REDIS_URL'):
+                print("Warning: redis events need the redis package and REDIS_URL; using local events")
+            else:
+                client = redis.Redis.from_url(config['REDIS_URL'])
+        if client is not None:
+            EventService._backend = RedisEventBackend(EventService._hub, client)
+        else:
+            EventService._backend = LocalEventBackend(EventService._hub)
+
+    @staticmethod
+    def subscribe(types=None):
+        EventService._backend.start()
+        return EventService._hub.subscribe(types)
+
+    @staticmethod
+    def unsubscribe(subscription):
+        EventService._hub.unsubscribe(subscription)
+
+    @staticmethod
+    def publish(events):
+        if events:
+            EventService._backend.publish(events)
+
+    @staticmethod
+    def metrics():
+        hub = EventService._hub
+        return dict(hub.metrics.snapshot(), connections=hub.connections(),
+                    backend='redis' if isinstance(EventService._backend, RedisEventBackend) else 'local')
+
+    @staticmethod
+    def sync_changes(changes):
+        """Commit handler: publish what just became visible"""
+        EventService.publish(change_events(changes))
+
+
+register_commit_handler(EventService.sync_changes)
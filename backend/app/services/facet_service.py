@@ -0,0 +1,147 @@
+"""
+Facet Service - Filter counts for the organization directory
+Keeps organization_facet_counts in step with writes and answers facet queries
+"""
+
+from collections import Counter
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from ..db import db
+from ..models.organization import Organization
+from ..models.organization_facet_count import OrganizationFacetCount
+from ..utils import APIException
+from .org_sync import register_handler
+
+# Organization columns that can be filtered and counted, in key order
+FACETS = ('category_id', 'location_id', 'status', 'verification_level')
+INTEGER_FACETS = ('category_id', 'location_id')
+
+
+class FacetService:
+    """Incrementally maintained facet counts over Organization"""
+
+    @staticmethod
+    def combo_key(values):
+        """Stable primary key for one (category, location, status, level) tuple"""
+        return '|'.join('' if value is None else str(value) for value in values)
+
+    @staticmethod
+    def parse_filters(args):
+        """
+        Read facet filters from request args. Each accepts a comma-separated
+        list of values: ?category_id=1,2&status=approved
+        Returns {facet: [values]} for the facets present.
+        """
+        filters = {}
+        for facet in FACETS:
+            raw = args.get(facet)
+            if not raw:
+                continue
+            values = [value.strip() for value in raw.split(',') if value.strip()]
+            if facet in INTEGER_FACETS:
+                try:
+                    values = [int(value) for value in values]
+                except ValueError:
+                    raise APIException(f'{facet} must be a comma-separated list of integers', status_code=400)
+            filters[facet] = values
+        return filters
+
+    @staticmethod
+    def apply_filters(query, filters, model=Organization):
+        """Restrict a query on `model` to the given facet filters"""
+        for facet, values in filters.items():
+            query = query.filter(getattr(model, facet).in_(values))
+        return query
+
+    @staticmethod
+    def counts(filters):
+        """
+        Facet counts for the current filters. Each facet is counted with every
+        filter applied except its own, so the UI can show how many results
+        each alternative value would give.
+        """
+        result = {}
+        for facet in FACETS:
+            column = getattr(OrganizationFacetCount, facet)
+            query = db.session.query(column, func.sum(OrganizationFacetCount.count))
+            other_filters = {name: values for name, values in filters.items() if name != facet}
+            query = FacetService.apply_filters(query, other_filters, model=OrganizationFacetCount)
+            rows = query.filter(OrganizationFacetCount.count > 0).group_by(column).all()
+            result[facet] = sorted(
+                ({'value': value, 'count': int(count)} for value, count in rows if count),
+                key=lambda item: -item['count']
+            )
+        return result
+
+    @staticmethod
+    def sync_changes(connection, changes):
+        """Translate organization writes into +1/-1 deltas on the count table"""
+        deltas = Counter()
+        current_ids = [change.org_id for change in changes if change.op != 'delete'
+                       and (change.op == 'insert' or any(f in change.old for f in FACETS))]
+
+        current = {}
+        if current_ids:
+            rows = connection.execute(
+                select(Organization.org_id, *(getattr(Organization, f) for f in FACETS))
+                .where(Organization.org_id.in_(current_ids))
+            )
+            current = {row[0]: tuple(row[1:]) for row in rows}
+
+        for change in changes:
+            if change.op == 'delete':
+                deltas[tuple(change.old.get(f) for f in FACETS)] -= 1
+            elif change.org_id in current:
+                new_values = current[change.org_id]
+                deltas[new_values] += 1
+                if change.op == 'update':
+                    old_values = tuple(
+                        change.old[f] if f in change.old else new_values[i]
+                        for i, f in enumerate(FACETS)
+                    )
+                    deltas[old_values] -= 1
+
+        FacetService.apply_deltas(connection, deltas)
+
+    @staticmethod
+    def apply_deltas(connection, deltas):
+        """Upsert count += delta for each facet combination"""
+        rows = [
+            dict(zip(FACETS, values), combo_key=FacetService.combo_key(values), count=delta)
+            for values, delta in deltas.items() if delta
+        ]
+        if not rows:
+            return
+
+        dialect = connection.dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+            for row in rows:
+                statement = insert(OrganizationFacetCount).values(**row)
+                statement = statement.on_conflict_do_update(
+                    index_elements=[OrganizationFacetCount.combo_key],
+                    set_={'count': OrganizationFacetCount.count + statement.excluded.count}
+                )
+                connection.execute(statement)
+            return
+
+        table = OrganizationFacetCount.__table__
+        for row in rows:
+            result = connection.execute(
+                update(table)
+                .where(table.c.combo_key == row['combo_key'])
+                .values(count=table.c.count + row['count'])
+            )
+            if result.rowcount == 0:
+                connection.execute(table.insert().values(**row))
+
+    @staticmethod
+    def rebuild(connection):
+        """Recompute every count from organizations (one GROUP BY)"""
+        columns = [getattr(Organization, f) for f in FACETS]
+        rows = connection.execute(select(*columns, func.count()).group_by(*columns)).all()
+        connection.execute(OrganizationFacetCount.__table__.delete())
+        FacetService.apply_deltas(connection, {tuple(row[:-1]): row[-1] for row in rows})
+
+
+register_handler(FacetService.sync_changes)
@@ -0,0 +1,93 @@
+"""
+Geo Service - "Charities near me"
+Geohash prefilter on Location followed by exact haversine distance
+"""
+
+import heapq
+from sqlalchemy import and_, event, or_
+from ..db import db
+from ..geo import (
+    GEOHASH_RANGE_END, bounding_box, encode_geohash, geohash_neighbors,
+    haversine_km, precision_for_radius
+)
+from ..models.location import Location
+from ..models.organization import Organization
+
+MAX_RADIUS_KM = 500
+
+
+class GeoService:
+    """Nearby-organization queries over Location coordinates"""
+
+    @staticmethod
+    def geohash_for(location):
+        """Geohash of a Location's coordinates, or None when it has none"""
+        if location.latitude is None or location.longitude is None:
+            return None
+        return encode_geohash(float(location.latitude), float(location.longitude))
+
+    @staticmethod
+    def candidate_filter(latitude, longitude, radius_km):
+        """
+        WHERE clause that narrows locations to the 3x3 block of geohash cells
+        around the point (index range scans on locations.geohash), tightened
+        by a lat/lng bounding box. Returns None if nothing can be pruned.
+        """
+        clauses = []
+        precision = precision_for_radius(latitude, radius_km)
+        if precision:
+            center = encode_geohash(latitude, longitude, precision)
+            clauses.append(or_(*(
+                and_(Location.geohash >= cell, Location.geohash < cell + GEOHASH_RANGE_END)
+                for cell in geohash_neighbors(center)
+            )))
+
+        min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+        clauses.append(Location.latitude.between(min_lat, max_lat))
+        if min_lng is not None:
+            clauses.append(Location.longitude.between(min_lng, max_lng))
+        return and_(*clauses)
+
+    @staticmethod
+    def nearby(latitude, longitude, radius_km, limit=20, query=None):
+        """
+        Organizations within `radius_km` of the point, nearest first.
+        `query` may pre-filter organizations (e.g. facet filters or load_only).
+        Returns a list of (organization, location, distance_km).
+        """
+        query = query if query is not None else Organization.query
+        # Rank on ids and coordinates only: a dense area can have thousands
+        # of candidates, and only `limit` of them need full rows
+        candidates = (
+            query.join(Location, Organization.location_id == Location.location_id)
+            .filter(GeoService.candidate_filter(latitude, longitude, radius_km))
+            .with_entities(Organization.org_id, Location.location_id, Location.latitude,
+                           Location.longitude, Location.city)
+            .all()
+        )
+
+        ranked = []
+        for org_id, location_id, lat, lng, city in candidates:
+            distance = haversine_km(latitude, longitude, float(lat), float(lng))
+            if distance <= radius_km:
+                ranked.append((distance, org_id, location_id, float(lat), float(lng), city))
+        nearest = heapq.nsmallest(limit, ranked, key=lambda item: (item[0], item[1]))
+        if not nearest:
+            return []
+
+        orgs = {org.org_id: org for org in query.filter(Organization.org_id.in_([item[1] for item in nearest]))}
+        return [
+            (orgs[org_id], {
+                'location_id': location_id,
+                'latitude': lat,
+                'longitude': lng,
+                'city': city,
+            }, distance)
+            for distance, org_id, location_id, lat, lng, city in nearest
+            if org_id in orgs
+        ]
+
+@event.listens_for(Location, 'before_insert')
+@event.listens_for(Location, 'before_update')
+def _set_geohash(mapper, connection, target):
+    target.geohash = GeoService.geohash_for(target)
@@ -0,0 +1,127 @@
+"""
+Moderation Service - Batched approval and rejection of pending organizations
+One SELECT, one set-based UPDATE and one bulk AuditLog insert per batch;
+notification emails are queued once the batch has committed
+"""
+
+from datetime import datetime
+from sqlalchemy import insert, select, update
+from ..db import db
+from ..models.audit_log import AuditLog
+from ..models.organization import Organization
+from ..utils import APIException
+from .email_service import EmailService
+from .org_sync import OrgChange, dispatch
+
+# Request decision -> resulting Organization.status
+DECISIONS = {'approve': 'approved', 'reject': 'rejected'}
+# Largest batch; also keeps the IN (...) list within every backend's limits
+MAX_BATCH = 1000
+# Columns a decision writes, recorded as the old values of each change
+MODERATED_FIELDS = ('status', 'approved_by', 'approval_date', 'rejection_reason', 'updated_at')
+# Signs notification emails when the reviewer is unknown (e.g. the admin dashboard)
+DEFAULT_REVIEWER_NAME = 'Charity Directory Admin'
+
+
+class ModerationService:
+    """Moderation of the pending-organization queue"""
+
+    @staticmethod
+    def parse(data):
+        """(org_ids, status, reason) from a moderation request body, or APIException(400)"""
+        if not isinstance(data, dict):
+            raise APIException('Body must be a JSON object', status_code=400)
+        decision = data.get('decision')
+        if decision not in DECISIONS:
+            raise APIException(f"decision must be one of: {', '.join(DECISIONS)}", status_code=400)
+        org_ids = data.get('org_ids')
+        if (not isinstance(org_ids, list) or not org_ids
+                or any(isinstance(org_id, bool) or not isinstance(org_id, int) for org_id in org_ids)):
+            raise APIException('org_ids must be a non-empty list of integers', status_code=400)
+        org_ids = list(dict.fromkeys(org_ids))
+        if len(org_ids) > MAX_BATCH:
+            raise APIException(f'At most {MAX_BATCH} organizations per request', status_code=400)
+        reason = data.get('reason')
+        if reason is not None and not isinstance(reason, str):
+            raise APIException('reason must be a string', status_code=400)
+        return org_ids, DECISIONS[decision], reason
+
+    @staticmethod
+    def moderate(org_ids, status, reviewer=None, reason=None, source=None, ip_address=None, user_agent=None):
+        """
+        Approve or reject the pending organizations among org_ids in one
+        transaction. The UPDATE only matches rows still pending, so two
+        reviewers racing on the same org cannot both decide it. `source`
+        ('api', 'admin_dashboard') is recorded in each audit row, so
+        decisions stay traceable when the reviewer is unknown. Returns
+        {'moderated': [org_id], 'skipped': {org_id: reason}, 'emails_queued': n}.
+        """
+        if not org_ids:
+            return {'moderated': [], 'skipped': {}, 'emails_queued': 0}
+        table = Organization.__table__
+        before = {
+            row.org_id: row._asdict()
+            for row in db.session.execute(
+                select(table.c.org_id, table.c.name, table.c.email, *(table.c[field] for field in MODERATED_FIELDS))
+                .where(table.c.org_id.in_(org_ids))
+            )
+        }
+
+        now = datetime.utcnow()
+        values = {
+            'status': status,
+            'approved_by': reviewer.user_id if reviewer is not None else None,
+            'approval_date': now,
+            'rejection_reason': reason if status == 'rejected' else None,
+            'updated_at': now,
+        }
+        pending = [org_id for org_id in org_ids if org_id in before and before[org_id]['status'] == 'pending']
+        moderated = []
+        if pending:
+            moderated = set(db.session.execute(
+                update(table)
+                .where(table.c.org_id.in_(pending), table.c.status == 'pending')
+                .values(values)
+                .returning(table.c.org_id)
+            ).scalars())
+            moderated = [org_id for org_id in pending if org_id in moderated]
+
+        if moderated:
+            dispatch(db.session.connection(), [
+                OrgChange('update', org_id,
+                          {field: before[org_id][field] for field in MODERATED_FIELDS},
+                          dict(before[org_id], **values))
+                for org_id in moderated
+            ])
+            db.session.execute(insert(AuditLog), [
+                {
+                    'user_id': values['approved_by'],
+                    'action_type': f'organization_{status}',
+                    'target_type': 'organization',
+                    'target_id': org_id,
+                    'old_values': {'status': before[org_id]['status'],
+                                   'rejection_reason': before[org_id]['rejection_reason']},
+                    'new_values': {'status': status, 'rejection_reason': values['rejection_reason'], 'source': source},
+                    'ip_address': ip_address,
+                    'user_agent': user_agent,
+                    'timestamp': now,
+                }
+                for org_id in moderated
+            ])
+        db.session.commit()
+
+        # Only after commit, so a rolled-back batch never emails anyone
+        reviewer_name = reviewer.name if reviewer is not None else DEFAULT_REVIEWER_NAME
+        queued = sum(
+            EmailService.enqueue(EmailService.send_organization_approval_email,
+                                 before[org_id]['name'], before[org_id]['email'], reviewer_name, status)
+            for org_id in moderated if before[org_id]['email']
+        )
+        done, raced = set(moderated), set(pending)
+        skipped = {
+            org_id: 'not found' if org_id not in before
+            else 'decided by another reviewer' if org_id in raced
+            else f"already {before[org_id]['status']}"
+            for org_id in org_ids if org_id not in done
+        }
+        return {'moderated': moderated, 'skipped': skipped, 'emails_queued': queued}
@@ -0,0 +1,130 @@
+"""
+Organization Change Hooks
+Fans organization writes out to the services that keep derived data in sync
+"""
+
+from collections import namedtuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from ..db import db
+from ..models.organization import Organization
+
+# op:  'insert' | 'update' | 'delete'
+# old: column values before the write (only the changed columns for updates)
+# new: column values after the write (None for deletes)
+OrgChange = namedtuple('OrgChange', ['op', 'org_id', 'old', 'new'])
+
+_handlers = []
+_commit_handlers = []
+
+
+def register_handler(handler):
+    """
+    Register handler(connection, changes). Handlers run inside the writing
+    transaction, so anything they write commits or rolls back with the org.
+    """
+    if handler not in _handlers:
+        _handlers.append(handler)
+    return handler
+
+
+def register_commit_handler(handler):
+    """
+    Register handler(changes), called after the writing transaction commits.
+    For consumers outside the database (caches, in-memory indexes) that must
+    never see a write that was rolled back.
+    """
+    if handler not in _commit_handlers:
+        _commit_handlers.append(handler)
+    return handler
+
+
+def dispatch(connection, changes, session=None):
+    """
+    Run every registered handler for a batch of OrgChange tuples. ORM writes
+    arrive here one row at a time; set-based writes (bulk endpoints, Core
+    UPDATEs) must call this themselves with the whole batch. The changes are
+    also queued on `session` (default: db.session) for the commit handlers.
+    """
+    if not changes:
+        return
+    for handler in _handlers:
+        handler(connection, changes)
+    if _commit_handlers:
+        session = session if session is not None else db.session()
+        session.info.setdefault('org_changes', []).extend(changes)
+
+
+def notify_committed(changes):
+    """
+    Run the commit handlers directly, for writers that commit outside the
+    ORM session (e.g. the counter flusher's engine transaction)
+    """
+    if not changes:
+        return
+    for handler in _commit_handlers:
+        try:
+            handler(changes)
+        except Exception as e:
+            # The write is already durable; a failing consumer must not undo it
+            print(f"Warning: org commit handler {handler.__qualname__} failed: {e}")
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    notify_committed(session.info.pop('org_changes', None))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('org_changes', None)
+
+
+def _loaded_values(target):
+    state = inspect(target)
+    return {
+        attr.key: state.dict[attr.key]
+        for attr in state.mapper.column_attrs
+        if attr.key in state.dict
+    }
+
+
+def _load_previous(target, value, oldvalue, initiator):
+    pass
+
+
+# An assignment to an expired attribute (e.g. after a commit) records no
+# previous value unless the attribute asks for it; handlers need the old
+# values to undo what they derived from them
+for _column in Organization.__table__.columns:
+    event.listen(getattr(Organization, _column.key), 'set', _load_previous, active_history=True)
+
+
+def _previous_values(target):
+    state = inspect(target)
+    old = {}
+    for attr in state.mapper.column_attrs:
+        history = state.attrs[attr.key].history
+        if history.added or history.deleted:
+            old[attr.key] = history.deleted[0] if history.deleted else None
+    return old
+
+
+@event.listens_for(Organization, 'after_insert')
+def _after_insert(mapper, connection, target):
+    dispatch(connection, [OrgChange('insert', target.org_id, None, _loaded_values(target))],
+             object_session(target))
+
+
+@event.listens_for(Organization, 'after_update')
+def _after_update(mapper, connection, target):
+    old = _previous_values(target)
+    if old:
+        dispatch(connection, [OrgChange('update', target.org_id, old, _loaded_values(target))],
+                 object_session(target))
+
+
+@event.listens_for(Organization, 'after_delete')
+def _after_delete(mapper, connection, target):
+    dispatch(connection, [OrgChange('delete', target.org_id, _loaded_values(target), None)],
+             object_session(target))
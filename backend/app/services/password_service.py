@@ -0,0 +1,177 @@
+"""
+Password Service - Password hashing off the request threads
+Hashes and checks passwords on a bounded process pool with a configurable
+algorithm and cost, and upgrades old hashes when their owners log in
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import check_password_hash, generate_password_hash
+from ..utils import APIException
+
+try:
+    import argon2
+except ImportError:
+    argon2 = None
+
+# argon2-cffi's defaults: time cost, memory cost (KiB), parallelism
+ARGON2_DEFAULTS = (3, 65536, 4)
+
+
+class PasswordService:
+    """
+    PASSWORD_HASH_METHOD is a Werkzeug method ('scrypt:32768:8:1',
+    'pbkdf2:sha256:600000') or 'argon2[:time_cost:memory_kib:parallelism]'
+    (needs argon2-cffi). Hashes made with any earlier setting still verify
+    and are replaced on the next successful login.
+
+    Work runs in PASSWORD_HASH_WORKERS spawned processes per web worker
+    process (0 runs it inline), so gunicorn's worker count multiplies it.
+    Under gunicorn or `flask run`, spawned workers import only the hashing
+    library. Started as a script (`python -m app.wsgi`), spawn re-imports
+    that __main__ module, and with it the whole app, in every worker. At most
+    PASSWORD_HASH_MAX_PENDING hashes are in flight per process; past that,
+    or when one takes longer than PASSWORD_HASH_TIMEOUT, the request gets
+    503 rather than queueing behind a login burst.
+    """
+
+    _method = 'scrypt:32768:8:1'
+    _prefix = None
+    _argon2 = None
+    _dummy_hash = None
+    _workers = 0
+    _timeout = 10.0
+    _slots = threading.BoundedSemaphore(64)
+    _pool = None
+    _pid = None
+    _pool_lock = threading.Lock()
+
+    @staticmethod
+    def init_app(app):
+        config = app.config
+        method = config.get('PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1'
+        if method.startswith('argon2'):
+            if argon2 is None:
+                raise RuntimeError('PASSWORD_HASH_METHOD=argon2 needs the argon2-cffi package')
+            params = [int(part) for part in method.split(':')[1:]] or list(ARGON2_DEFAULTS)
+            time_cost, memory_cost, parallelism = params
+            PasswordService._argon2 = argon2.PasswordHasher(
+                time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism
+            )
+        else:
+            PasswordService._argon2 = None
+        PasswordService._method = method
+        PasswordService._workers = int(config.get('PASSWORD_HASH_WORKERS') or 0)
+        PasswordService._timeout = float(config.get('PASSWORD_HASH_TIMEOUT') or 10.0)
+        PasswordService._slots = threading.BoundedSemaphore(int(config.get('PASSWORD_HASH_MAX_PENDING') or 64))
+        # One hash up front: Werkzeug's normalized method prefix (e.g. 'scrypt'
+        # becomes 'scrypt:32768:8:1') and a stand-in for users without one
+        PasswordService._dummy_hash = PasswordService._hash_inline('not a real password')
+        PasswordService._prefix = None if PasswordService._argon2 else PasswordService._dummy_hash.split('$', 1)[0]
+        atexit.register(PasswordService.shutdown)
+
+    @staticmethod
+    def _hash_inline(password):
+        if PasswordService._argon2 is not None:
+            return PasswordService._argon2.hash(password)
+        return generate_password_hash(password, method=PasswordService._method)
+
+    @staticmethod
+    def _executor():
+        # Created lazily and per process, so forked web workers each get their own
+        if PasswordService._pool is not None and PasswordService._pid == os.getpid():
+            return PasswordService._pool
+        with PasswordService._pool_lock:
+            if PasswordService._pool is None or PasswordService._pid != os.getpid():
+                PasswordService._pid = os.getpid()
+                PasswordService._pool = ProcessPoolExecutor(
+                    max_workers=PasswordService._workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+        return PasswordService._pool
+
+    @staticmethod
+    def _run(fn, *args):
+        """fn(*args) on the pool (or inline with no workers), within the pending limit"""
+        if not PasswordService._workers:
+            return fn(*args)
+        if not PasswordService._slots.acquire(blocking=False):
+            raise APIException('Too many sign-ins in progress, retry shortly', status_code=503)
+        try:
+            future = PasswordService._executor().submit(fn, *args)
+            try:
+                return future.result(timeout=PasswordService._timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                raise APIException('Sign-in is taking too long, retry shortly', status_code=503)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool on the next call
+            PasswordService.shutdown()
+            raise
+        finally:
+            PasswordService._slots.release()
+
+    @staticmethod
+    def hash(password):
+        """Hash a password for storing with the configured method"""
+        if PasswordService._argon2 is not None:
+            return PasswordService._run(PasswordService._argon2.hash, password)
+        return PasswordService._run(generate_password_hash, password, PasswordService._method)
+
+    @staticmethod
+    def verify(password, password_hash):
+        """
+        Check a password against a stored hash of any supported method. With
+        no hash (unknown user, Google-only account) a dummy hash is still
+        checked, so response time does not reveal which emails exist.
+        """
+        if not password_hash:
+            if PasswordService._dummy_hash is None:
+                # init_app not run: hash one lazily rather than recurse
+                PasswordService._dummy_hash = PasswordService._hash_inline('not a real password')
+            PasswordService.verify(password or '', PasswordService._dummy_hash)
+            return False
+        if password_hash.startswith('$argon2'):
+            if argon2 is None:
+                return False
+            hasher = PasswordService._argon2 or argon2.PasswordHasher()
+            try:
+                return PasswordService._run(hasher.verify, password_hash, password)
+            except (argon2.exceptions.VerificationError, argon2.exceptions.InvalidHashError):
+                return False
+        return PasswordService._run(check_password_hash, password_hash, password)
+
+    @staticmethod
+    def needs_rehash(password_hash):
+        """True if a hash was made with another method or cost than the configured one"""
+        if PasswordService._argon2 is not None:
+            if not password_hash.startswith('$argon2'):
+                return True
+            try:
+                return PasswordService._argon2.check_needs_rehash(password_hash)
+            except argon2.exceptions.InvalidHashError:
+                return True
+        return password_hash.split('$', 1)[0] != PasswordService._prefix
+
+    @staticmethod
+    def verify_and_update(user, password):
+        """
+        Check a user's password and, when it matches an outdated hash,
+        replace the hash on `user`. The caller commits.
+        """
+        if not PasswordService.verify(password, user.password_hash if user is not None else None):
+            return False
+        if PasswordService.needs_rehash(user.password_hash):
+            user.password_hash = PasswordService.hash(password)
+        return True
+
+    @staticmethod
+    def shutdown():
+        pool = PasswordService._pool
+        if pool is not None and PasswordService._pid == os.getpid():
+            pool.shutdown(wait=False, cancel_futures=True)
+        PasswordService._pool = None
@@ -0,0 +1,145 @@
+"""
+Reference Service - In-memory categories and locations
+Small, read-mostly lookup tables held per process as immutable id -> record
+maps, reloaded only when their version counter has moved
+"""
+
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+from ..db import db
+from ..fieldsets import CATEGORY_FIELDS, LOCATION_FIELDS
+from ..models.category import Category
+from ..models.location import Location
+from ..serializers import dumps
+from .version_service import VersionService
+
+# One immutable load of a table: records maps primary key -> namedtuple
+# (slotted, so a row costs a tuple, not a dict); body is the encoded list
+Snapshot = namedtuple('Snapshot', ['version', 'updated_at', 'records', 'body'])
+
+
+class ReferenceTable:
+    """
+    A whole table cached as one Snapshot. Readers take the current snapshot
+    without locking; a reload builds a new one and swaps the reference.
+    """
+
+    def __init__(self, name, model, fields):
+        self.name = name
+        self.model = model
+        self.fields = fields
+        self.record = namedtuple(f'{model.__name__}Record', fields)
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._stale = False
+        self._lock = threading.Lock()
+
+    def snapshot(self, max_age):
+        """
+        The cached snapshot, after checking the version counter if the last
+        check is older than max_age seconds or a local commit touched the table
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and not self._stale and time.monotonic() - self._checked_at < max_age:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and not self._stale and time.monotonic() - self._checked_at < max_age:
+                return snapshot
+            self._stale = False
+            self._checked_at = time.monotonic()
+            # Version first: rows read afterwards are at least that new, so a
+            # write landing in between only costs one extra reload later
+            version, updated_at = VersionService.get(self.name)
+            if snapshot is None or snapshot.version != version:
+                snapshot = self._snapshot = self._load(version, updated_at)
+            return snapshot
+
+    def _load(self, version, updated_at):
+        columns = [getattr(self.model, field) for field in self.fields]
+        rows = db.session.execute(select(*columns).order_by(columns[0])).all()
+        records = {row[0]: self.record(*row) for row in rows}
+        body = dumps({'data': [record._asdict() for record in records.values()], 'version': version})
+        return Snapshot(version, updated_at, MappingProxyType(records), body)
+
+    def mark_stale(self):
+        self._stale = True
+
+
+class ReferenceService:
+    """
+    Categories and locations served from memory. Writes through the ORM bump
+    the table's version; the writing process reloads on its next read and
+    other workers within REFERENCE_CHECK_INTERVAL seconds.
+    """
+
+    _tables = {
+        'categories': ReferenceTable('categories', Category, CATEGORY_FIELDS),
+        'locations': ReferenceTable('locations', Location, LOCATION_FIELDS),
+    }
+    _check_interval = 5.0
+
+    @staticmethod
+    def init_app(app):
+        """Load every table up front so the first requests are served from memory"""
+        ReferenceService._check_interval = float(app.config.get('REFERENCE_CHECK_INTERVAL') or 5.0)
+        with app.app_context():
+            try:
+                for name in ReferenceService._tables:
+                    ReferenceService.snapshot(name)
+            except Exception as e:
+                # e.g. before the first migration; tables load on first use instead
+                print(f"Warning: reference data not preloaded: {e}")
+            finally:
+                db.session.remove()
+                # Don't hand pooled connections to forked workers
+                db.engine.dispose()
+
+    @staticmethod
+    def snapshot(name):
+        return ReferenceService._tables[name].snapshot(ReferenceService._check_interval)
+
+    @staticmethod
+    def version(name):
+        return ReferenceService.snapshot(name).version
+
+    @staticmethod
+    def get(name, record_id):
+        """The cached record for a primary key, or None"""
+        return ReferenceService.snapshot(name).records.get(record_id)
+
+    @staticmethod
+    def embed(name, record_id, fields):
+        """{field: value} of one record for embedding in another resource, or None"""
+        record = ReferenceService.get(name, record_id) if record_id is not None else None
+        if record is None:
+            return None
+        return {field: getattr(record, field) for field in fields}
+
+
+def _after_write(mapper, connection, target):
+    name = mapper.local_table.name
+    VersionService.bump(connection, name)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('reference_changes', set()).add(name)
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    for name in session.info.pop('reference_changes', ()):
+        ReferenceService._tables[name].mark_stale()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('reference_changes', None)
+
+
+for _model in (Category, Location):
+    for _event in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event, _after_write)
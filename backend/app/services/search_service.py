@@ -0,0 +1,213 @@
+"""
+Search Service - Full-text search over organizations
+SQLite FTS5 or a Postgres tsvector/GIN column, depending on DATABASE_URL
+"""
+
+import re
+from sqlalchemy import bindparam, inspect, text
+from ..db import db
+from .org_sync import register_handler
+
+# Columns covered by the index; changes to anything else skip re-indexing
+INDEXED_COLUMNS = ('name', 'mission', 'description')
+TOKEN_PATTERN = re.compile(r'\w+\*?', re.UNICODE)
+# Rows per IN (...) list when syncing a batch of writes
+SYNC_CHUNK_SIZE = 500
+
+
+class SearchService:
+    """Ranked, highlighted search backed by the database's own inverted index"""
+
+    FTS_TABLE = 'organizations_fts'
+    HIGHLIGHT_OPEN = '<mark>'
+    HIGHLIGHT_CLOSE = '</mark>'
+
+    # Engine URL -> whether the index table/column exists. Checked once so a
+    # database that was never migrated keeps working without search.
+    _available = {}
+
+    @staticmethod
+    def backend(connection):
+        """Return 'sqlite', 'postgresql' or None when no index is installed"""
+        dialect = connection.dialect.name
+        key = str(connection.engine.url)
+        if key not in SearchService._available:
+            inspector = inspect(connection)
+            if dialect == 'sqlite':
+                ready = inspector.has_table(SearchService.FTS_TABLE)
+            elif dialect == 'postgresql':
+                columns = inspector.get_columns('organizations')
+                ready = any(column['name'] == 'search_vector' for column in columns)
+            else:
+                ready = False
+            SearchService._available[key] = ready
+        return dialect if SearchService._available[key] else None
+
+    @staticmethod
+    def parse_terms(query_string):
+        """
+        Split a user query into (term, is_prefix) pairs. Only word characters
+        survive, so the result is safe to hand to FTS5 or to_tsquery.
+        """
+        terms = []
+        for token in TOKEN_PATTERN.findall(query_string or ''):
+            is_prefix = token.endswith('*')
+            term = token.rstrip('*').lower()
+            if term:
+                terms.append((term, is_prefix))
+        return terms
+
+    @staticmethod
+    def sync_changes(connection, changes):
+        """
+        Keep the SQLite FTS5 table in step with organization writes.
+        Postgres needs nothing here: search_vector is a generated column.
+        """
+        if SearchService.backend(connection) != 'sqlite':
+            return
+
+        removed = []
+        reindex = []
+        for change in changes:
+            if change.op == 'delete':
+                removed.append(change.org_id)
+            elif change.op == 'insert':
+                reindex.append(change.org_id)
+            elif any(col in change.old for col in INDEXED_COLUMNS):
+                removed.append(change.org_id)
+                reindex.append(change.org_id)
+
+        # Set-based in chunks, so bulk writes cost a few statements, not two per row
+        fts = SearchService.FTS_TABLE
+        for start in range(0, len(removed), SYNC_CHUNK_SIZE):
+            connection.execute(
+                text(f"DELETE FROM {fts} WHERE rowid IN :org_ids")
+                .bindparams(bindparam('org_ids', expanding=True)),
+                {'org_ids': removed[start:start + SYNC_CHUNK_SIZE]}
+            )
+        for start in range(0, len(reindex), SYNC_CHUNK_SIZE):
+            connection.execute(
+                text(
+                    f"INSERT INTO {fts} (rowid, name, mission, description) "
+                    "SELECT org_id, name, mission, description FROM organizations WHERE org_id IN :org_ids"
+                ).bindparams(bindparam('org_ids', expanding=True)),
+                {'org_ids': reindex[start:start + SYNC_CHUNK_SIZE]}
+            )
+
+    @staticmethod
+    def install(connection):
+        """
+        Create and fill the SQLite index when it is missing, as the migration
+        does; for databases built with create_all (tests, scripts)
+        """
+        if connection.dialect.name != 'sqlite':
+            return
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SearchService.FTS_TABLE} USING fts5("
+            "name, mission, description, "
+            "tokenize = 'unicode61 remove_diacritics 2', "
+            "prefix = '2 3')"
+        ))
+        SearchService._available.pop(str(connection.engine.url), None)
+        SearchService.rebuild(connection)
+
+    @staticmethod
+    def rebuild(connection):
+        """Repopulate the SQLite index from scratch (e.g. after a raw import)"""
+        if SearchService.backend(connection) != 'sqlite':
+            return
+        connection.execute(text(f"DELETE FROM {SearchService.FTS_TABLE}"))
+        connection.execute(text(
+            f"INSERT INTO {SearchService.FTS_TABLE} (rowid, name, mission, description) "
+            "SELECT org_id, name, mission, description FROM organizations"
+        ))
+
+    @staticmethod
+    def search(query_string, limit=20, offset=0):
+        """
+        Search organizations. Returns a list of dicts with org_id, rank,
+        name_highlight and snippet, best match first. Raises RuntimeError
+        when the database has no search index.
+        """
+        terms = SearchService.parse_terms(query_string)
+        if not terms:
+            return []
+
+        connection = db.session.connection()
+        backend = SearchService.backend(connection)
+        if backend == 'sqlite':
+            return SearchService._search_sqlite(connection, terms, limit, offset)
+        if backend == 'postgresql':
+            return SearchService._search_postgres(connection, terms, limit, offset)
+        raise RuntimeError('Search index is not installed; run the database migrations')
+
+    @staticmethod
+    def _search_sqlite(connection, terms, limit, offset):
+        # Quoting each term keeps FTS5 operators (NEAR, OR, -) out of user input
+        match = ' '.join(f'"{term}"' + ('*' if is_prefix else '') for term, is_prefix in terms)
+        fts = SearchService.FTS_TABLE
+        rows = connection.execute(
+            text(
+                f"SELECT rowid AS org_id, "
+                f"bm25({fts}, 10.0, 3.0, 1.0) AS rank, "
+                f"highlight({fts}, 0, :open, :close) AS name_highlight, "
+                f"snippet({fts}, -1, :open, :close, '…', 16) AS snippet "
+                f"FROM {fts} WHERE {fts} MATCH :match "
+                "ORDER BY rank LIMIT :limit OFFSET :offset"
+            ),
+            {
+                'match': match,
+                'open': SearchService.HIGHLIGHT_OPEN,
+                'close': SearchService.HIGHLIGHT_CLOSE,
+                'limit': limit,
+                'offset': offset,
+            }
+        )
+        # bm25() is "lower is better"; flip it so both backends rank high-to-low
+        return [
+            {
+                'org_id': row.org_id,
+                'rank': -row.rank,
+                'name_highlight': row.name_highlight,
+                'snippet': row.snippet,
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def _search_postgres(connection, terms, limit, offset):
+        tsquery = ' & '.join(term + (':*' if is_prefix else '') for term, is_prefix in terms)
+        options = (
+            f"StartSel={SearchService.HIGHLIGHT_OPEN}, StopSel={SearchService.HIGHLIGHT_CLOSE}, "
+            "MaxWords=30, MinWords=10"
+        )
+        # Rank and limit first; ts_headline re-parses documents, so only run
+        # it on the rows that are actually returned.
+        rows = connection.execute(
+            text(
+                "SELECT hits.org_id, hits.rank, "
+                "ts_headline('english', o.name, hits.query, :options) AS name_highlight, "
+                "ts_headline('english', coalesce(o.mission, '') || ' ' || coalesce(o.description, ''), "
+                "hits.query, :options) AS snippet "
+                "FROM ("
+                "  SELECT org_id, ts_rank_cd(search_vector, query) AS rank, query "
+                "  FROM organizations, to_tsquery('english', :tsquery) AS query "
+                "  WHERE search_vector @@ query "
+                "  ORDER BY rank DESC, org_id LIMIT :limit OFFSET :offset"
+                ") AS hits JOIN organizations o ON o.org_id = hits.org_id "
+                "ORDER BY hits.rank DESC, hits.org_id"
+            ),
+            {'tsquery': tsquery, 'options': options, 'limit': limit, 'offset': offset}
+        )
+        return [
+            {
+                'org_id': row.org_id,
+                'rank': float(row.rank),
+                'name_highlight': row.name_highlight,
+                'snippet': row.snippet,
+            }
+            for row in rows
+        ]
+
+
+register_handler(SearchService.sync_changes)
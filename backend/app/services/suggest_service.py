@@ -0,0 +1,332 @@
+"""
+Suggest Service - Typeahead over organization, category and city names
+Normalized names live in sorted arrays searched with bisect. Organizations
+are ranked by verification level, then views, with the top results of busy
+prefixes cached and patched as orgs change.
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, bisect_right
+from heapq import nlargest
+from sqlalchemy import select
+from ..db import db
+from ..models.organization import Organization
+from .org_sync import register_commit_handler
+from .reference_service import ReferenceService
+
+# Higher ranks first; unknown levels rank with 'basic'
+VERIFICATION_RANK = {'premium': 2, 'verified': 1, 'basic': 0}
+# Prefixes matching more entries than this get their top results cached
+SCAN_LIMIT = 1000
+# Length of a cached top list, and so the largest ?limit=
+TOP_K = 20
+# Later words shorter than this are not indexed as starting points
+MIN_WORD_LENGTH = 2
+# Changes that affect an organization's keys or rank
+INDEXED_FIELDS = ('name', 'view_count', 'verification_level')
+
+_WORDS = re.compile(r'\w+')
+# Sorts after any character a key can contain, so [prefix, prefix + _END) is the prefix range
+_END = '\U0010ffff'
+
+
+def normalize(text):
+    """Case-folded, accent-stripped words joined by single spaces"""
+    if not text:
+        return ''
+    text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    return ' '.join(_WORDS.findall(text.casefold()))
+
+
+def index_keys(text):
+    """
+    The normalized name plus its suffixes starting at each later word, so
+    'bank' finds 'City Food Bank'
+    """
+    words = normalize(text).split(' ')
+    if not words[0]:
+        return set()
+    return {
+        ' '.join(words[i:]) for i in range(len(words))
+        if i == 0 or len(words[i]) >= MIN_WORD_LENGTH
+    }
+
+
+class PrefixIndex:
+    """Parallel sorted key / id arrays; all ids whose key starts with a prefix form one slice"""
+
+    def __init__(self, pairs=()):
+        pairs = sorted(pairs)
+        self.keys = [key for key, _ in pairs]
+        self.ids = [record_id for _, record_id in pairs]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def range(self, prefix):
+        lo = bisect_left(self.keys, prefix)
+        return lo, bisect_left(self.keys, prefix + _END, lo)
+
+    def matches(self, prefix):
+        lo, hi = self.range(prefix)
+        return self.ids[lo:hi]
+
+    def add(self, key, record_id):
+        i = bisect_right(self.keys, key)
+        self.keys.insert(i, key)
+        self.ids.insert(i, record_id)
+
+    def remove(self, key, record_id):
+        lo, hi = bisect_left(self.keys, key), bisect_right(self.keys, key)
+        for i in range(lo, hi):
+            if self.ids[i] == record_id:
+                del self.keys[i]
+                del self.ids[i]
+                return
+
+
+class OrganizationIndex:
+    """
+    Organization names by prefix, ranked. Not thread-safe on its own;
+    SuggestService serializes access.
+    """
+
+    def __init__(self, rows):
+        # org_id -> (name, verification_level, view_count)
+        self.records = {}
+        pairs = []
+        for org_id, name, level, views in rows:
+            self.records[org_id] = (name, level, views or 0)
+            pairs.extend((key, org_id) for key in index_keys(name))
+        self.index = PrefixIndex(pairs)
+        # prefix -> [(score, org_id)], best first, for prefixes over SCAN_LIMIT
+        self.top = {}
+
+    def _score(self, org_id):
+        _, level, views = self.records[org_id]
+        return (VERIFICATION_RANK.get(level, 0), views), -org_id
+
+    def search(self, prefix, limit):
+        """org_ids of the best `limit` organizations with a key starting with prefix"""
+        lo, hi = self.index.range(prefix)
+        if hi - lo <= SCAN_LIMIT:
+            ids = set(self.index.ids[lo:hi])
+            return [org_id for _, org_id in nlargest(limit, ((self._score(i), i) for i in ids))]
+        top = self.top.get(prefix)
+        if top is None:
+            ids = set(self.index.ids[lo:hi])
+            top = self.top[prefix] = nlargest(TOP_K, ((self._score(i), i) for i in ids))
+        return [org_id for _, org_id in top[:limit]]
+
+    def warm(self, prefixes):
+        """Compute the top lists for prefixes up front, e.g. the ones the previous index had cached"""
+        for prefix in prefixes:
+            self.search(prefix, TOP_K)
+
+    def _cached_prefixes(self, name):
+        """Cached prefixes that one of name's keys starts with"""
+        if not self.top:
+            return set()
+        return {
+            key[:i] for key in index_keys(name)
+            for i in range(1, len(key) + 1) if key[:i] in self.top
+        }
+
+    def upsert(self, org_id, name, level, views):
+        views = views or 0
+        old = self.records.get(org_id)
+        if old == (name, level, views):
+            return
+        if old is not None and old[0] != name:
+            self.remove(org_id)
+            old = None
+        if old is None:
+            for key in index_keys(name):
+                self.index.add(key, org_id)
+        lowered = old is not None and (VERIFICATION_RANK.get(level, 0), views) < (VERIFICATION_RANK.get(old[1], 0), old[2])
+        self.records[org_id] = (name, level, views)
+
+        # Patch cached top lists instead of dropping them: views only grow,
+        # so an org can usually just move up
+        entry = (self._score(org_id), org_id)
+        for prefix in self._cached_prefixes(name):
+            top = self.top[prefix]
+            present = any(i == org_id for _, i in top)
+            if lowered and present:
+                # Whoever should replace it is unknown; recompute on next use
+                del self.top[prefix]
+            elif present or entry > top[-1]:
+                top = [item for item in top if item[1] != org_id]
+                top.append(entry)
+                top.sort(reverse=True)
+                self.top[prefix] = top[:TOP_K]
+
+    def remove(self, org_id):
+        old = self.records.pop(org_id, None)
+        if old is None:
+            return
+        for prefix in self._cached_prefixes(old[0]):
+            if any(i == org_id for _, i in self.top[prefix]):
+                del self.top[prefix]
+        for key in index_keys(old[0]):
+            self.index.remove(key, org_id)
+
+
+class SuggestService:
+    """
+    Per-process typeahead indexes. Writes in this process are applied as
+    they commit; a full rebuild every SUGGEST_REBUILD_INTERVAL seconds picks
+    up other workers' writes.
+    """
+
+    _app = None
+    _index = None
+    _built_at = 0.0
+    _rebuild_interval = 300.0
+    _lock = threading.Lock()
+    _build_lock = threading.Lock()
+    # org_ids changed while a rebuild was reading, replayed onto the new index
+    _changed_during_build = None
+    # reference table name -> (version, PrefixIndex)
+    _reference = {}
+
+    @staticmethod
+    def init_app(app):
+        SuggestService._app = app
+        SuggestService._rebuild_interval = float(app.config.get('SUGGEST_REBUILD_INTERVAL') or 300.0)
+
+    @staticmethod
+    def _rows(connection, org_ids=None):
+        query = select(Organization.org_id, Organization.name,
+                       Organization.verification_level, Organization.view_count)
+        if org_ids is not None:
+            query = query.where(Organization.org_id.in_(org_ids))
+        return connection.execute(query).all()
+
+    @staticmethod
+    def _build():
+        with SuggestService._lock:
+            SuggestService._changed_during_build = set()
+            hot = list(SuggestService._index.top) if SuggestService._index is not None else []
+        try:
+            with db.engine.connect() as connection:
+                index = OrganizationIndex(SuggestService._rows(connection))
+            # Busy prefixes stay fast across rebuilds
+            index.warm(hot)
+        except Exception:
+            with SuggestService._lock:
+                SuggestService._changed_during_build = None
+            raise
+        with SuggestService._lock:
+            changed, SuggestService._changed_during_build = SuggestService._changed_during_build, None
+            SuggestService._index = index
+            SuggestService._built_at = time.monotonic()
+        if changed:
+            SuggestService._reload(changed)
+
+    @staticmethod
+    def _rebuild_in_background():
+        def rebuild():
+            try:
+                with SuggestService._app.app_context():
+                    SuggestService._build()
+            except Exception as e:
+                print(f"Warning: suggest index rebuild failed: {e}")
+            finally:
+                SuggestService._build_lock.release()
+
+        if SuggestService._build_lock.acquire(blocking=False):
+            threading.Thread(target=rebuild, name='suggest-rebuild', daemon=True).start()
+
+    @staticmethod
+    def _organizations():
+        """The organization index, building it on first use"""
+        if SuggestService._index is None:
+            with SuggestService._build_lock:
+                if SuggestService._index is None:
+                    SuggestService._build()
+        elif (SuggestService._app is not None
+              and time.monotonic() - SuggestService._built_at > SuggestService._rebuild_interval):
+            # Keep serving the current index while the new one is built
+            SuggestService._rebuild_in_background()
+        return SuggestService._index
+
+    @staticmethod
+    def _reference_index(name, keys):
+        """PrefixIndex over a reference table, rebuilt when its version moves"""
+        snapshot = ReferenceService.snapshot(name)
+        cached = SuggestService._reference.get(name)
+        if cached is None or cached[0] != snapshot.version:
+            pairs = [
+                (key, record_id)
+                for record_id, record in snapshot.records.items() if record.is_active is not False
+                for key in index_keys(keys(record))
+            ]
+            cached = SuggestService._reference[name] = (snapshot.version, PrefixIndex(pairs))
+        return snapshot, cached[1]
+
+    @staticmethod
+    def suggest(q, limit):
+        """{'organizations', 'categories', 'cities'} whose names have a word starting with q"""
+        prefix = normalize(q)
+        limit = max(1, min(limit, TOP_K))
+        if not prefix:
+            return {'organizations': [], 'categories': [], 'cities': []}
+
+        index = SuggestService._organizations()
+        with SuggestService._lock:
+            organizations = []
+            for org_id in index.search(prefix, limit):
+                name, level, views = index.records[org_id]
+                organizations.append({'org_id': org_id, 'name': name,
+                                      'verification_level': level, 'view_count': views})
+
+        snapshot, categories = SuggestService._reference_index('categories', lambda record: record.name)
+        matched = sorted({snapshot.records[i] for i in categories.matches(prefix)},
+                         key=lambda record: (record.sort_order or 0, record.name))
+        categories = [{'category_id': record.category_id, 'name': record.name} for record in matched[:limit]]
+
+        snapshot, cities = SuggestService._reference_index('locations', lambda record: record.city)
+        places = {(record.city, record.state_province, record.country)
+                  for record in (snapshot.records[i] for i in cities.matches(prefix))}
+        cities = [{'city': city, 'state_province': state, 'country': country}
+                  for city, state, country in sorted(places, key=lambda place: tuple(p or '' for p in place))[:limit]]
+
+        return {'organizations': organizations, 'categories': categories, 'cities': cities}
+
+    @staticmethod
+    def _reload(org_ids):
+        with db.engine.connect() as connection:
+            rows = SuggestService._rows(connection, list(org_ids))
+        found = set()
+        with SuggestService._lock:
+            for org_id, name, level, views in rows:
+                found.add(org_id)
+                SuggestService._index.upsert(org_id, name, level, views)
+            for org_id in set(org_ids) - found:
+                SuggestService._index.remove(org_id)
+
+    @staticmethod
+    def sync_changes(changes):
+        """
+        Commit handler: re-read the orgs whose name, level or views changed
+        (counter flushes report views without values) and patch the index
+        """
+        org_ids = {
+            change.org_id for change in changes
+            if change.op != 'update' or any(field in change.old for field in INDEXED_FIELDS)
+        }
+        if not org_ids:
+            return
+        with SuggestService._lock:
+            if SuggestService._changed_during_build is not None:
+                SuggestService._changed_during_build.update(org_ids)
+            if SuggestService._index is None:
+                return
+        SuggestService._reload(org_ids)
+
+
+register_commit_handler(SuggestService.sync_changes)
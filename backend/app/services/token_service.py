@@ -0,0 +1,156 @@
+"""
+Token Service - Access token claims and revocation
+Access tokens carry the user's role and verification status, so authorizing
+a request needs no users row; a per-user token_version, cached briefly in
+each worker, lets logouts and role changes revoke tokens already issued
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from flask_jwt_extended import create_access_token, get_jwt_identity
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session, object_session
+from ..db import db
+from ..models.user import User
+
+# Copied into every access token, so changing one revokes the user's tokens
+CLAIM_FIELDS = ('role', 'is_verified')
+# Cached "no such user" (deleted since the token was issued)
+_MISSING = object()
+
+
+class TokenVersionCache:
+    """
+    user_id -> token_version for TTL seconds, least recently used entries
+    evicted past maxsize. Entries are dropped on this worker's own commits;
+    other workers pick changes up when theirs expire.
+    """
+
+    def __init__(self, ttl=30.0, maxsize=10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        """The cached version (None for a deleted user), or _MISSING"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return _MISSING
+            version, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return _MISSING
+            self._entries.move_to_end(user_id)
+            return version
+
+    def set(self, user_id, version):
+        with self._lock:
+            self._entries[user_id] = (version, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+class TokenService:
+    """Issuing, checking and revoking access tokens"""
+
+    _cache = TokenVersionCache()
+
+    @staticmethod
+    def init_app(app, jwt=None):
+        """Configure from TOKEN_VERSION_CACHE_*; with `jwt`, every @jwt_required rejects revoked tokens"""
+        config = app.config
+        TokenService._cache = TokenVersionCache(
+            ttl=float(config.get('TOKEN_VERSION_CACHE_TTL') or 30.0),
+            maxsize=int(config.get('TOKEN_VERSION_CACHE_SIZE') or 10000),
+        )
+        if jwt is not None:
+            jwt.token_in_blocklist_loader(TokenService.is_revoked)
+
+    @staticmethod
+    def claims(user):
+        return {'role': user.role, 'verified': bool(user.is_verified), 'tv': user.token_version or 0}
+
+    @staticmethod
+    def issue(user, expires_delta=None):
+        """An access token for `user` carrying its role, verification and token version"""
+        # PyJWT requires a string subject; current_user_id() turns it back into an int
+        return create_access_token(identity=str(user.user_id), additional_claims=TokenService.claims(user),
+                                   expires_delta=expires_delta)
+
+    @staticmethod
+    def current_user_id():
+        """The authenticated user's id, inside a @jwt_required request"""
+        return int(get_jwt_identity())
+
+    @staticmethod
+    def token_version(user_id):
+        """The user's current token_version (None if deleted), from the cache when fresh"""
+        version = TokenService._cache.get(user_id)
+        if version is _MISSING:
+            version = db.session.execute(
+                select(User.token_version).where(User.user_id == user_id)
+            ).scalar_one_or_none()
+            TokenService._cache.set(user_id, version)
+        return version
+
+    @staticmethod
+    def is_revoked(jwt_header, jwt_payload):
+        """
+        Blocklist check for flask-jwt-extended. Tokens issued before token
+        versions existed count as version 0, so they stay valid until the
+        user's first logout or role change.
+        """
+        try:
+            user_id = int(jwt_payload['sub'])
+        except (KeyError, TypeError, ValueError):
+            return True
+        version = TokenService.token_version(user_id)
+        return version is None or version != jwt_payload.get('tv', 0)
+
+    @staticmethod
+    def revoke(user_id):
+        """Invalidate every token issued to a user so far (logout everywhere)"""
+        db.session.execute(
+            update(User).where(User.user_id == user_id).values(token_version=User.token_version + 1)
+        )
+        db.session.commit()
+        TokenService._cache.discard(user_id)
+
+
+def _revoked_on_commit(target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('revoked_user_ids', set()).add(target.user_id)
+
+
+@event.listens_for(User, 'before_update')
+def _before_update(mapper, connection, target):
+    # Tokens carry these fields as claims; a changed role must not keep its old powers
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in CLAIM_FIELDS):
+        target.token_version = User.token_version + 1
+        _revoked_on_commit(target)
+
+
+@event.listens_for(User, 'after_delete')
+def _after_delete(mapper, connection, target):
+    _revoked_on_commit(target)
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    for user_id in session.info.pop('revoked_user_ids', ()):
+        TokenService._cache.discard(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('revoked_user_ids', None)
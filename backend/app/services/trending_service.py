@@ -0,0 +1,179 @@
+"""
+Trending Service - Time-decayed organization popularity
+Counter flushes fold view/bookmark deltas into a per-org score that halves
+every TRENDING_HALF_LIFE_HOURS; the top-K per category is one index range
+read, cached per organizations version
+"""
+
+import math
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import bindparam, delete, insert, select, update
+from ..db import db
+from ..fieldsets import ORGANIZATION_PROFILES
+from ..models.organization import Organization
+from ..models.organization_trend import OrganizationTrend
+from ..serializers import dumps, loads, serializer_for
+from .cache_service import CacheService
+from .org_sync import register_handler
+
+# Scores are stored relative to this instant; see OrganizationTrend
+EPOCH = datetime(2020, 1, 1)
+# Length of the precomputed list per category, and so the largest ?limit=
+TOP_K = 100
+TRENDING_KEY = 'orgs:trending:{}:{}'
+# Keeps IN (...) lists within every backend's parameter limits
+CHUNK_SIZE = 500
+
+
+def _logaddexp(a, b):
+    """log(exp(a) + exp(b)) without overflow"""
+    high, low = (a, b) if a >= b else (b, a)
+    return high + math.log1p(math.exp(low - high))
+
+
+class TrendingService:
+    """
+    Exponentially decayed views/bookmarks. Each event adds
+    weight * exp(decay * (t - EPOCH)) to the org's running sum, kept as its
+    log (score_log); the decayed score at time now is
+    exp(score_log - decay * (now - EPOCH)). Changing the half-life needs the
+    table reseeded.
+    """
+
+    _decay = math.log(2) / (24 * 3600)
+    _weights = {'view_count': 1.0, 'bookmark_count': 5.0}
+
+    @staticmethod
+    def init_app(app):
+        TrendingService._decay = math.log(2) / (float(app.config.get('TRENDING_HALF_LIFE_HOURS') or 24.0) * 3600)
+        TrendingService._weights['bookmark_count'] = float(app.config.get('TRENDING_BOOKMARK_WEIGHT') or 5.0)
+
+    @staticmethod
+    def _age(now):
+        return TrendingService._decay * (now - EPOCH).total_seconds()
+
+    @staticmethod
+    def score(score_log, now=None):
+        """Decayed score at `now` for a stored score_log"""
+        return math.exp(score_log - TrendingService._age(now or datetime.utcnow()))
+
+    @staticmethod
+    def record(connection, deltas, now=None):
+        """
+        Fold {(org_id, counter): delta} into trend scores inside the caller's
+        transaction. The caller has already UPDATEd these organizations rows,
+        so concurrent flushes for the same org are serialized on those row
+        locks and this read-modify-write cannot lose an update. Returns the
+        number of orgs scored.
+        """
+        weights = defaultdict(float)
+        for (org_id, field), delta in deltas.items():
+            if delta > 0:
+                weights[org_id] += delta * TrendingService._weights.get(field, 0.0)
+        org_ids = sorted(org_id for org_id, weight in weights.items() if weight > 0)
+        if not org_ids:
+            return 0
+
+        now = now or datetime.utcnow()
+        age = TrendingService._age(now)
+        trends = OrganizationTrend.__table__
+        orgs = Organization.__table__
+        categories, existing = {}, {}
+        for start in range(0, len(org_ids), CHUNK_SIZE):
+            rows = connection.execute(
+                select(orgs.c.org_id, orgs.c.category_id, trends.c.score_log)
+                .select_from(orgs.outerjoin(trends, trends.c.org_id == orgs.c.org_id))
+                .where(orgs.c.org_id.in_(org_ids[start:start + CHUNK_SIZE]))
+            )
+            for org_id, category_id, score_log in rows:
+                categories[org_id] = category_id
+                if score_log is not None:
+                    existing[org_id] = score_log
+
+        updates, inserts = [], []
+        for org_id in org_ids:
+            if org_id not in categories:
+                continue
+            term = age + math.log(weights[org_id])
+            if org_id in existing:
+                updates.append({'id': org_id, 'score': _logaddexp(existing[org_id], term),
+                                'category': categories[org_id], 'now': now})
+            else:
+                inserts.append({'org_id': org_id, 'category_id': categories[org_id],
+                                'score_log': term, 'updated_at': now})
+        if updates:
+            connection.execute(
+                update(trends)
+                .where(trends.c.org_id == bindparam('id'))
+                .values(score_log=bindparam('score'), category_id=bindparam('category'), updated_at=bindparam('now')),
+                updates
+            )
+        if inserts:
+            connection.execute(insert(trends), inserts)
+        return len(updates) + len(inserts)
+
+    @staticmethod
+    def sync_changes(connection, changes):
+        """Keep the copied category_id current and drop rows of deleted orgs"""
+        trends = OrganizationTrend.__table__
+        deleted = [change.org_id for change in changes if change.op == 'delete']
+        moved = [
+            {'id': change.org_id, 'category': change.new['category_id']}
+            for change in changes
+            if change.op == 'update' and 'category_id' in change.old
+            and change.new is not None and 'category_id' in change.new
+        ]
+        for start in range(0, len(deleted), CHUNK_SIZE):
+            connection.execute(delete(trends).where(trends.c.org_id.in_(deleted[start:start + CHUNK_SIZE])))
+        if moved:
+            connection.execute(
+                update(trends).where(trends.c.org_id == bindparam('id')).values(category_id=bindparam('category')),
+                moved
+            )
+
+    @staticmethod
+    def top(version, category_id=None):
+        """
+        Up to TOP_K summary dicts (plus trend_score) of approved
+        organizations, best first. Trend writes come with a counter flush
+        (organization_counters) or an org write (category and status changes,
+        deletes), so `version` must cover both versions.
+        """
+        return CacheService.get_or_load(
+            TRENDING_KEY.format(version, 'all' if category_id is None else category_id),
+            lambda: TrendingService._load_top(category_id),
+            stale=False
+        )
+
+    @staticmethod
+    def _load_top(category_id):
+        # Only approved orgs are public; filtering in the ranking query keeps
+        # the list full when pending or rejected orgs score highly
+        query = (
+            select(OrganizationTrend.org_id, OrganizationTrend.score_log)
+            .join(Organization, Organization.org_id == OrganizationTrend.org_id)
+            .where(Organization.status == 'approved')
+        )
+        if category_id is not None:
+            query = query.where(OrganizationTrend.category_id == category_id)
+        ranked = db.session.execute(query.order_by(OrganizationTrend.score_log.desc()).limit(TOP_K)).all()
+        if not ranked:
+            return []
+
+        serializer = serializer_for(Organization, ORGANIZATION_PROFILES['summary'])
+        rows = db.session.execute(
+            select(*serializer.columns()).where(Organization.org_id.in_([org_id for org_id, _ in ranked]))
+        ).all()
+        items = {item['org_id']: item for item in serializer.tuples(rows)}
+        now = datetime.utcnow()
+        result = []
+        for org_id, score_log in ranked:
+            item = items.get(org_id)
+            if item is not None:
+                item['trend_score'] = round(TrendingService.score(score_log, now), 3)
+                result.append(item)
+        return loads(dumps(result))
+
+
+register_handler(TrendingService.sync_changes)
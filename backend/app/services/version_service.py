@@ -0,0 +1,74 @@
+"""
+Version Service - Collection version counters
+Bumps resource_versions on every write so readers can detect change cheaply
+"""
+
+from datetime import datetime
+from sqlalchemy import event, inspect, select, update
+from ..db import db
+from ..fieldsets import USER_FIELDS
+from ..models.resource_version import ResourceVersion
+from ..models.user import User
+from .change_service import ChangeService
+from .org_sync import register_handler
+
+# User columns whose changes user listings must see. last_login is left out:
+# bumping on every login would serialize logins on the version row, so the
+# listings that show it follow max(last_login) instead (see users.py).
+LISTED_USER_COLUMNS = tuple(name for name in USER_FIELDS if name != 'last_login')
+
+
+class VersionService:
+    """Read and bump per-collection version counters"""
+
+    @staticmethod
+    def bump(connection, name, by=1):
+        """
+        Increment a collection's version inside the caller's transaction and
+        return the new value. The UPDATE takes a row lock that is held until
+        commit, so concurrent writers are serialized on this row and versions
+        are handed out in commit order.
+        """
+        table = ResourceVersion.__table__
+        now = datetime.utcnow()
+        result = connection.execute(
+            update(table)
+            .where(table.c.name == name)
+            .values(version=table.c.version + by, updated_at=now)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(name=name, version=by, updated_at=now))
+        return connection.execute(select(table.c.version).where(table.c.name == name)).scalar()
+
+    @staticmethod
+    def get(name):
+        """Return (version, updated_at) for a collection; (0, None) if never written"""
+        row = db.session.execute(
+            select(ResourceVersion.version, ResourceVersion.updated_at)
+            .where(ResourceVersion.name == name)
+        ).first()
+        return (row.version, row.updated_at) if row else (0, None)
+
+    @staticmethod
+    def sync_organization_changes(connection, changes):
+        # The new versions double as the change feed's sequence numbers
+        version = VersionService.bump(connection, 'organizations', by=len(changes))
+        ChangeService.record(connection, changes, version)
+
+
+def _bump_users(mapper, connection, target):
+    VersionService.bump(connection, 'users')
+
+
+def _bump_users_if_listed(mapper, connection, target):
+    # Password, token version and login writes change nothing a listing shows
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in LISTED_USER_COLUMNS):
+        VersionService.bump(connection, 'users')
+
+
+event.listen(User, 'after_insert', _bump_users)
+event.listen(User, 'after_update', _bump_users_if_listed)
+event.listen(User, 'after_delete', _bump_users)
+
+register_handler(VersionService.sync_organization_changes)
@@ -20,6 +20,8 @@ def generate_sitemap(app):
     endpoints = {
         "API Documentation": {
             "Health Check": "/health",
+            "Cache Metrics": "/health/cache",
+            "Event Stream Metrics": "/health/events",
             "Admin Dashboard": "/admin/"
         },
         "Authentication": {
@@ -37,11 +39,28 @@ def generate_sitemap(app):
         },
         "Organizations": {
             "All Organizations": "/orgs/",
+            "Search Organizations": "/orgs/search?q=",
+            "Suggest Organizations": "/orgs/suggest?q=",
+            "Trending Organizations": "/orgs/trending?category=&limit=",
+            "Organization Changes": "/orgs/changes?since=",
+            "Nearby Organizations": "/orgs/nearby?lat=&lng=&radius_km=",
+            "Map Clusters": "/orgs/clusters?bbox=&zoom=",
+            "Export Organizations": "/orgs/export?format=ndjson",
+            "Bulk Create/Update Organizations": "/orgs/bulk",
             "Organization by ID": "/orgs/<id>"
         },
+        "Events": {
+            "Organization Change Stream (SSE)": "/events/orgs?types="
+        },
+        "Reference Data": {
+            "Categories": "/categories",
+            "Locations": "/locations"
+        },
         "Admin API": {
             "All Admin Users": "/api/admin/",
-            "Admin User by ID": "/api/admin/<id>"
+            "Admin User by ID": "/api/admin/<id>",
+            "Duplicate Organization Report": "/api/admin/duplicates",
+            "Moderation Queue": "/api/admin/moderation"
         }
     }
 
@@ -0,0 +1,78 @@
+"""
+Bulk write benchmark
+Compares one POST /orgs/ per organization with POST /orgs/bulk, and one
+PUT /orgs/<id> per organization with PATCH /orgs/bulk.
+
+Usage (from backend/):
+    python -m benchmarks.bench_bulk --rows 2000 --chunk-sizes 100 500 2000
+"""
+
+import argparse
+import time
+from .common import create_app, sentence
+import random
+
+
+def payload(rng, index):
+    return {
+        'name': f'Bulk Charity {index}',
+        'mission': sentence(rng, 8),
+        'description': sentence(rng, 30),
+        'category_id': rng.randint(1, 20),
+        'email': f'bulk{index}@charity.org',
+    }
+
+
+def timed(label, rows, fn):
+    started = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - started
+    print(f"{label:<40} {rows / seconds:>10,.0f} rows/s  ({seconds:.2f}s)")
+    return rows / seconds
+
+
+def run(rows, chunk_sizes):
+    app = create_app()
+    from app.db import db
+    from app.models import Category
+
+    with app.app_context():
+        db.session.add_all(Category(name=f'Category {i}') for i in range(20))
+        db.session.commit()
+
+    rng = random.Random(42)
+    client = app.test_client()
+    batch = [payload(rng, i) for i in range(rows)]
+
+    def one_by_one():
+        for row in batch:
+            assert client.post('/orgs/', json=row).status_code == 201
+
+    baseline = timed('POST /orgs/ x N', rows, one_by_one)
+    for chunk_size in chunk_sizes:
+        rate = timed(f'POST /orgs/bulk chunk_size={chunk_size}', rows, lambda: client.post(
+            '/orgs/bulk', query_string={'chunk_size': chunk_size}, json=batch
+        ))
+        print(f"{'':<40} {rate / baseline:>10.1f}x")
+
+    updates = [{'org_id': org_id, 'status': 'approved'} for org_id in range(1, rows + 1)]
+
+    def put_one_by_one():
+        for row in updates:
+            assert client.put(f"/orgs/{row['org_id']}", json={'status': 'approved'}).status_code == 200
+
+    baseline = timed('PUT /orgs/<id> x N', rows, put_one_by_one)
+    for chunk_size in chunk_sizes:
+        rate = timed(f'PATCH /orgs/bulk chunk_size={chunk_size}', rows, lambda: client.patch(
+            '/orgs/bulk', query_string={'chunk_size': chunk_size},
+            json=[dict(row, status='pending') for row in updates]
+        ))
+        print(f"{'':<40} {rate / baseline:>10.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[100, 500, 2000])
+    args = parser.parse_args()
+    run(args.rows, args.chunk_sizes)
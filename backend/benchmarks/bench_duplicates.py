@@ -0,0 +1,54 @@
+"""
+Duplicate detection benchmark
+Times building the duplicate index (one pass over organizations, so it
+should grow linearly) and DuplicateService.find() for near-copies of
+existing names and for unseen names, plus the duplicate cluster report.
+
+Usage (from backend/):
+    python -m benchmarks.bench_duplicates --orgs 100000 200000 400000
+"""
+
+import argparse
+import random
+import time
+from .common import create_app, seed_organizations, measure, report
+
+
+def run(sizes, iterations):
+    app = create_app()
+    from sqlalchemy import select
+    from app.db import db
+    from app.models import Organization
+    from app.services.duplicate_service import DuplicateService
+
+    rng = random.Random(11)
+    seeded = 0
+    with app.app_context():
+        for size in sizes:
+            seed_organizations(size - seeded, seed=size)
+            seeded = size
+            started = time.perf_counter()
+            DuplicateService._build()
+            elapsed = time.perf_counter() - started
+            print(f"\n{size} orgs: index built in {elapsed:.2f}s ({elapsed / size * 1e6:.1f}us per org)")
+
+            names = db.session.execute(select(Organization.name).limit(5000)).scalars().all()
+            near = [{'name': name.lower() + 's'} for name in rng.sample(names, 200)]
+            unseen = [{'name': f'Unseen Charity {rng.random()}'} for _ in range(200)]
+            for label, submissions in (('near-copy', near), ('unseen name', unseen)):
+                cycle = iter(submissions * (iterations // len(submissions) + 2))
+                report(f'find(), {label}', measure(
+                    lambda: DuplicateService.find(next(cycle)), iterations=iterations
+                ))
+
+            started = time.perf_counter()
+            clusters = DuplicateService.clusters()
+            print(f"cluster report: {len(clusters)} clusters in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orgs', type=int, nargs='+', default=[100000, 200000, 400000])
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+    run(args.orgs, args.iterations)
@@ -0,0 +1,82 @@
+"""
+Event fan-out benchmark
+Opens N /events/orgs subscriptions on this worker's broadcast hub, each
+drained by its own thread as a streaming request would be, publishes
+events as commits would, and reports the publisher's cost per event and
+the publish-to-delivery latency seen by subscribers.
+
+Usage (from backend/):
+    python -m benchmarks.bench_events --connections 1000 --events 200
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from .common import create_app, report
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {
+        'p50': statistics.median(samples),
+        'p95': samples[int(len(samples) * 0.95) - 1],
+        'p99': samples[int(len(samples) * 0.99) - 1],
+        'max': samples[-1],
+    }
+
+
+def run(connections, events, interval):
+    create_app()
+    from app.services.event_service import EventService
+
+    latencies = []
+    latencies_lock = threading.Lock()
+    stop = threading.Event()
+
+    def client(subscription):
+        try:
+            while not stop.is_set():
+                batch, _ = subscription.drain(0.1)
+                received = time.perf_counter()
+                if batch:
+                    with latencies_lock:
+                        latencies.extend((received - event['sent']) * 1000 for event in batch)
+        finally:
+            EventService.unsubscribe(subscription)
+
+    threads = []
+    for _ in range(connections):
+        subscription = EventService.subscribe()
+        thread = threading.Thread(target=client, args=(subscription,), daemon=True)
+        thread.start()
+        threads.append(thread)
+    print(f"open connections: {EventService.metrics()['connections']}")
+
+    publish = []
+    for i in range(events):
+        event = {'type': 'updated', 'org_id': i, 'name': f'Org {i}', 'status': 'approved',
+                 'sent': time.perf_counter()}
+        started = time.perf_counter()
+        EventService.publish([event])
+        publish.append((time.perf_counter() - started) * 1000)
+        time.sleep(interval)
+
+    time.sleep(0.5)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    report(f'publish, {connections} subscribers', percentiles(publish))
+    report('publish -> subscriber latency', percentiles(latencies))
+    metrics = EventService.metrics()
+    print(f"delivered {metrics['delivered']} of {connections * events}, dropped {metrics['dropped']}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--events', type=int, default=200)
+    parser.add_argument('--interval', type=float, default=0.005, help='seconds between published events')
+    args = parser.parse_args()
+    run(args.connections, args.events, args.interval)
@@ -0,0 +1,45 @@
+"""
+Nearby-search benchmark
+Seeds N locations (one organization each) and times GeoService.nearby
+around busy city centres and random points.
+
+Usage (from backend/):
+    python -m benchmarks.bench_nearby --size 1000000
+"""
+
+import argparse
+import random
+from .common import create_app, seed_locations, seed_organizations, measure, report
+
+RADII_KM = (1, 5, 25)
+
+
+def run(size, iterations):
+    app = create_app()
+    from app.services.geo_service import GeoService
+
+    with app.app_context():
+        seconds, centres = seed_locations(size)
+        print(f"{size:,} locations seeded in {seconds:.1f}s")
+        seconds = seed_organizations(size, locations=size)
+        print(f"{size:,} organizations seeded in {seconds:.1f}s")
+
+        rng = random.Random(3)
+        for radius in RADII_KM:
+            points = [rng.choice(centres) for _ in range(iterations)]
+            stats = measure(lambda: GeoService.nearby(*points[rng.randrange(len(points))], radius, limit=20),
+                            iterations=iterations)
+            report(f"city centre radius={radius}km", stats)
+
+            points = [(rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in range(iterations)]
+            stats = measure(lambda: GeoService.nearby(*points[rng.randrange(len(points))], radius, limit=20),
+                            iterations=iterations)
+            report(f"random point radius={radius}km", stats)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=1000000)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+    run(args.size, args.iterations)
@@ -0,0 +1,81 @@
+"""
+Password hashing benchmark
+Logs one user in repeatedly through POST /auth/login from several request
+threads and reports logins/sec, logins/sec per core, and how long a cheap
+pure-Python request takes meanwhile (what hashing on the request threads
+costs everything else in the worker).
+
+Usage (from backend/):
+    python -m benchmarks.bench_passwords --method scrypt:32768:8:1 --workers 4 --threads 8
+    python -m benchmarks.bench_passwords --method pbkdf2:sha256:600000 --workers 0
+    python -m benchmarks.bench_passwords --method argon2:3:65536:4   # needs argon2-cffi
+"""
+
+import argparse
+import os
+import threading
+import time
+from .common import create_app, measure, report
+
+
+def run(method, workers, threads, logins):
+    os.environ['PASSWORD_HASH_METHOD'] = method
+    os.environ['PASSWORD_HASH_WORKERS'] = str(workers)
+    os.environ['PASSWORD_HASH_MAX_PENDING'] = str(max(threads, 1) * 2)
+    app = create_app()
+    from app.db import db
+    from app.models import User
+    from app.services.password_service import PasswordService
+
+    with app.app_context():
+        db.session.add(User(name='Bench User', email='bench@example.com',
+                            password_hash=PasswordService.hash('correct horse battery staple')))
+        db.session.commit()
+
+    body = {'email': 'bench@example.com', 'password': 'correct horse battery staple'}
+    # Start the pool's processes before timing
+    app.test_client().post('/auth/login', json=body)
+
+    remaining = [logins]
+    remaining_lock = threading.Lock()
+    failures = []
+
+    def client():
+        http = app.test_client()
+        while True:
+            with remaining_lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            response = http.post('/auth/login', json=body)
+            if response.status_code != 200:
+                failures.append(response.status_code)
+
+    pool = [threading.Thread(target=client) for _ in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    # A cheap request's worth of Python, timed while the logins run
+    other = measure(lambda: sum(i * i for i in range(2000)), iterations=100, warmup=0)
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    cores = min(workers or 1, os.cpu_count() or 1)
+    rate = logins / elapsed
+    print(f"{method}, {workers} hashing processes, {threads} request threads, {os.cpu_count()} CPUs")
+    print(f"{logins} logins in {elapsed:.2f}s: {rate:.1f} logins/sec, {rate / cores:.1f} per core"
+          + (f", {len(failures)} failed ({sorted(set(failures))})" if failures else ''))
+    report('other request work during logins', other)
+    PasswordService.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--method', default='scrypt:32768:8:1')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='hashing processes (0 hashes on the request threads)')
+    parser.add_argument('--threads', type=int, default=8, help='concurrent login requests')
+    parser.add_argument('--logins', type=int, default=200)
+    args = parser.parse_args()
+    run(args.method, args.workers, args.threads, args.logins)
@@ -0,0 +1,52 @@
+"""
+Full-text search benchmark
+Seeds N organizations, builds the FTS index and times /orgs/search queries.
+Each size runs in its own process, against its own database.
+
+Usage (from backend/):
+    python -m benchmarks.bench_search --sizes 100000 1000000
+"""
+
+import argparse
+import subprocess
+import sys
+from .common import create_app, seed_organizations, measure, report
+
+QUERIES = ('food', 'children education', 'anim*', 'clean water community', 'mental health support')
+
+
+def run(size, iterations):
+    app = create_app()
+    from app.db import db
+    from app.services.search_service import SearchService
+
+    with app.app_context():
+        seconds = seed_organizations(size)
+        print(f"\n{size:,} organizations seeded in {seconds:.1f}s")
+        SearchService.rebuild(db.session.connection())
+        db.session.commit()
+
+        for query in QUERIES:
+            report(f"service  q={query!r}", measure(
+                lambda: SearchService.search(query, limit=20), iterations=iterations
+            ))
+
+    client = app.test_client()
+    for query in QUERIES:
+        report(f"endpoint q={query!r}", measure(
+            lambda: client.get('/orgs/search', query_string={'q': query}), iterations=iterations
+        ))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--iterations', type=int, default=100)
+    args = parser.parse_args()
+    if len(args.sizes) == 1:
+        run(args.sizes[0], args.iterations)
+    else:
+        # The app binds its database on import, so every size needs a fresh process
+        for size in args.sizes:
+            subprocess.run([sys.executable, '-m', 'benchmarks.bench_search', '--sizes', str(size),
+                            '--iterations', str(args.iterations)], check=True)
@@ -0,0 +1,95 @@
+"""
+Serializer micro-benchmark
+Times turning a page of organizations into JSON bytes: the old hand-built
+dicts + stdlib json (Flask's default provider) against the compiled
+serializers + orjson, for ORM objects and for Core result tuples, and
+against joining cached per-row fragments (all fragment-cache hits).
+
+Usage (from backend/):
+    python -m benchmarks.bench_serializers --rows 20 100 1000
+"""
+
+import argparse
+import json
+from datetime import date, datetime
+from .common import create_app, seed_organizations, measure, report
+
+
+def hand_built(org):
+    # The per-route dict construction this replaced
+    return {
+        'org_id': org.org_id,
+        'name': org.name,
+        'mission': org.mission,
+        'description': org.description,
+        'category_id': org.category_id,
+        'location_id': org.location_id,
+        'address': org.address,
+        'phone': org.phone,
+        'email': org.email,
+        'website': org.website,
+        'donation_link': org.donation_link,
+        'logo_url': org.logo_url,
+        'operating_hours': org.operating_hours,
+        'established_year': org.established_year,
+        'status': org.status,
+        'verification_level': org.verification_level,
+        'view_count': org.view_count,
+        'bookmark_count': org.bookmark_count,
+        'created_at': org.created_at.isoformat() if org.created_at else None,
+        'updated_at': org.updated_at.isoformat() if org.updated_at else None,
+    }
+
+
+def stdlib_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(type(value).__name__)
+
+
+def run(sizes, iterations):
+    app = create_app()
+    from sqlalchemy import select
+    from app.db import db
+    from app.fieldsets import ORGANIZATION_FIELDS
+    from app.models import Organization
+    from app.serializers import dumps, orjson, serializer_for
+    from app.services.cache_service import FragmentCache, row_version
+
+    print(f"orjson {'available' if orjson else 'NOT installed (stdlib fallback)'}")
+    with app.app_context():
+        seed_organizations(max(sizes), categories=20)
+        serializer = serializer_for(Organization, ORGANIZATION_FIELDS)
+        for size in sizes:
+            orgs = Organization.query.order_by(Organization.org_id).limit(size).all()
+            rows = db.session.execute(
+                select(*serializer.columns()).order_by(Organization.org_id).limit(size)
+            ).all()
+            print(f"\n{size} rows")
+            report('hand-built dicts + json.dumps', measure(
+                lambda: json.dumps([hand_built(org) for org in orgs], default=stdlib_default).encode(),
+                iterations=iterations
+            ))
+            report('compiled serializer + dumps()', measure(
+                lambda: dumps(serializer.many(orgs)), iterations=iterations
+            ))
+            report('Core tuples + dumps()', measure(
+                lambda: dumps(serializer.tuples(rows)), iterations=iterations
+            ))
+            page = [(org.org_id, row_version(org.updated_at, org.view_count, org.bookmark_count)) for org in orgs]
+            by_id = {org.org_id: org for org in orgs}
+            FragmentCache.fetch(page, ORGANIZATION_FIELDS,
+                                lambda ids: {i: serializer.one(by_id[i]) for i in ids})
+            report('cached fragments joined', measure(
+                lambda: FragmentCache.assemble('data', [fragment for _, fragment in FragmentCache.fetch(
+                    page, ORGANIZATION_FIELDS, lambda ids: {}
+                )], {'limit': size}), iterations=iterations
+            ))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[20, 100, 1000])
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+    run(args.rows, args.iterations)
@@ -0,0 +1,72 @@
+"""
+Typeahead benchmark
+Times /orgs/suggest lookups (sorted-array prefix index with cached top-K
+lists) against the LIKE 'abc%' query it replaces, for prefixes of 1-6
+characters taken from real names, plus the index build time.
+
+Usage (from backend/):
+    python -m benchmarks.bench_suggest --orgs 1000000
+"""
+
+import argparse
+import random
+import time
+from .common import create_app, seed_organizations, measure, report
+
+
+def run(orgs, iterations):
+    app = create_app()
+    from sqlalchemy import select
+    from app.db import db
+    from app.models import Organization
+    from app.services.suggest_service import SuggestService, normalize
+
+    with app.app_context():
+        print(f"seeded {orgs} organizations in {seed_organizations(orgs):.1f}s")
+        names = db.session.execute(select(Organization.name).limit(10000)).scalars().all()
+
+        started = time.perf_counter()
+        SuggestService.suggest('warm', 8)
+        index = SuggestService._index
+        print(f"index built in {time.perf_counter() - started:.1f}s: "
+              f"{len(index.records)} orgs, {len(index.index)} keys")
+
+        rng = random.Random(3)
+        for length in (1, 2, 3, 4, 6):
+            prefixes = []
+            for name in rng.sample(names, 200):
+                words = normalize(name).split(' ')
+                prefixes.append(rng.choice(words)[:length])
+            # First use of a busy prefix computes and caches its top list
+            cold = []
+            for prefix in prefixes:
+                started = time.perf_counter()
+                SuggestService.suggest(prefix, 8)
+                cold.append((time.perf_counter() - started) * 1000)
+            cold.sort()
+            print(f"{f'suggest, {length}-char, first use':<40} p50={cold[len(cold) // 2]:.3f}ms "
+                  f"p99={cold[int(len(cold) * 0.99) - 1]:.3f}ms max={cold[-1]:.3f}ms")
+
+            cycle = iter(prefixes * (iterations // len(prefixes) + 2))
+            report(f'suggest, {length}-char prefix', measure(
+                lambda: SuggestService.suggest(next(cycle), 8), iterations=iterations
+            ))
+
+            like = iter(prefixes * 4)
+            report(f"LIKE 'x%' + ORDER BY, {length}-char", measure(
+                lambda: db.session.execute(
+                    select(Organization.org_id, Organization.name)
+                    .where(Organization.name.ilike(next(like) + '%'))
+                    .order_by(Organization.view_count.desc())
+                    .limit(8)
+                ).all(),
+                iterations=min(iterations, 20), warmup=1
+            ))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orgs', type=int, default=1000000)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+    run(args.orgs, args.iterations)
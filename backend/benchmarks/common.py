@@ -0,0 +1,146 @@
+"""
+Benchmark Helpers
+Shared setup for the scripts in this package: a throwaway SQLite database
+migrated to head, synthetic data, and latency percentiles.
+"""
+
+import os
+import random
+import sys
+import statistics
+import tempfile
+import time
+
+WORDS = (
+    'food bank shelter children education health animal rescue water clean '
+    'community youth elderly care hospice cancer research literacy school '
+    'housing homeless refugee relief disaster medical mental support family '
+    'environment ocean forest wildlife climate arts music library sports '
+    'veterans women girls equality justice legal aid hunger nutrition farm'
+).split()
+STATUSES = ('pending', 'approved', 'rejected', 'suspended')
+VERIFICATION_LEVELS = ('basic', 'verified', 'premium')
+
+
+def create_app(db_path=None):
+    """
+    Import the Flask app against a fresh SQLite file and run the migrations.
+    Must be called before anything else imports `app`, and only once per
+    process: the app binds its engine on first import, so a second call
+    would silently reuse the first database.
+    """
+    if 'app' in sys.modules:
+        raise RuntimeError('create_app() runs once per process; start a new process for each database')
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='charity-bench-'), 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ.setdefault('JWT_SECRET_KEY', 'benchmark-secret-key-not-for-production')
+
+    from flask_migrate import upgrade
+    from app import app
+
+    migrations = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+    with app.app_context():
+        upgrade(directory=migrations)
+    return app
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed_organizations(count, categories=20, locations=0, chunk_size=20000, seed=42):
+    """
+    Insert `count` synthetic organizations with Core executemany, bypassing the
+    ORM hooks, and return the elapsed seconds. Call inside an app context.
+    """
+    from sqlalchemy import insert
+    from datetime import datetime, timedelta
+    from app.db import db
+    from app.models import Organization, Category
+
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    if categories and not Category.query.count():
+        db.session.execute(insert(Category), [
+            {'name': f'Category {i}', 'is_active': True, 'sort_order': i} for i in range(categories)
+        ])
+    base = datetime(2020, 1, 1)
+    for start in range(0, count, chunk_size):
+        rows = []
+        for i in range(start, min(start + chunk_size, count)):
+            rows.append({
+                'name': f'{sentence(rng, 2).title()} {i}',
+                'mission': sentence(rng, 8),
+                'description': sentence(rng, 30),
+                'category_id': rng.randint(1, categories) if categories else None,
+                'location_id': rng.randint(1, locations) if locations else None,
+                'status': rng.choice(STATUSES),
+                'verification_level': rng.choice(VERIFICATION_LEVELS),
+                'view_count': rng.randint(0, 100000),
+                'bookmark_count': rng.randint(0, 5000),
+                'created_at': base + timedelta(minutes=i),
+                'updated_at': base + timedelta(minutes=i),
+            })
+        db.session.execute(insert(Organization), rows)
+        db.session.commit()
+    return time.perf_counter() - started
+
+
+def seed_locations(count, cities=200, chunk_size=20000, seed=7):
+    """
+    Insert `count` synthetic locations, clustered around `cities` random
+    centres with a uniform background, and return (elapsed seconds, centres).
+    Call inside an app context.
+    """
+    from sqlalchemy import insert
+    from app.db import db
+    from app.geo import encode_geohash
+    from app.models import Location
+
+    rng = random.Random(seed)
+    centres = [(rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in range(cities)]
+    started = time.perf_counter()
+    for start in range(0, count, chunk_size):
+        rows = []
+        for i in range(start, min(start + chunk_size, count)):
+            if rng.random() < 0.7:
+                lat, lng = rng.choice(centres)
+                lat = max(-89.9, min(89.9, rng.gauss(lat, 0.3)))
+                lng = (rng.gauss(lng, 0.3) + 180) % 360 - 180
+            else:
+                lat, lng = rng.uniform(-60, 70), rng.uniform(-180, 180)
+            rows.append({
+                'country': 'Benchland',
+                'city': f'City {i % cities}',
+                'latitude': round(lat, 6),
+                'longitude': round(lng, 6),
+                'geohash': encode_geohash(lat, lng),
+                'is_active': True,
+            })
+        db.session.execute(insert(Location), rows)
+        db.session.commit()
+    return time.perf_counter() - started, centres
+
+
+def measure(fn, iterations=200, warmup=10):
+    """Call fn repeatedly and return latency percentiles in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'p50': statistics.median(samples),
+        'p95': samples[int(len(samples) * 0.95) - 1],
+        'p99': samples[int(len(samples) * 0.99) - 1],
+        'max': samples[-1],
+    }
+
+
+def report(label, stats):
+    print(f"{label:<40} p50={stats['p50']:.3f}ms p95={stats['p95']:.3f}ms "
+          f"p99={stats['p99']:.3f}ms max={stats['max']:.3f}ms")
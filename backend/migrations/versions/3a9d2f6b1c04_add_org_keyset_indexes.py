@@ -0,0 +1,44 @@
+"""Add keyset pagination indexes on organizations
+
+Revision ID: 3a9d2f6b1c04
+Revises: c17958af5660
+Create Date: 2026-10-18 09:12:40.318201
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a9d2f6b1c04'
+down_revision = 'c17958af5660'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keyset cursors compare (sort key, org_id) row values, so sort keys
+    # must not be NULL. Backfill before tightening the columns.
+    op.execute("UPDATE organizations SET view_count = 0 WHERE view_count IS NULL")
+    op.execute("UPDATE organizations SET bookmark_count = 0 WHERE bookmark_count IS NULL")
+    op.execute("UPDATE organizations SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL")
+
+    with op.batch_alter_table('organizations', schema=None) as batch_op:
+        batch_op.alter_column('view_count', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('bookmark_count', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_index('ix_organizations_name_org_id', ['name', 'org_id'], unique=False)
+        batch_op.create_index('ix_organizations_created_at_org_id', ['created_at', 'org_id'], unique=False)
+        batch_op.create_index('ix_organizations_view_count_org_id', ['view_count', 'org_id'], unique=False)
+        batch_op.create_index('ix_organizations_bookmark_count_org_id', ['bookmark_count', 'org_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('organizations', schema=None) as batch_op:
+        batch_op.drop_index('ix_organizations_bookmark_count_org_id')
+        batch_op.drop_index('ix_organizations_view_count_org_id')
+        batch_op.drop_index('ix_organizations_created_at_org_id')
+        batch_op.drop_index('ix_organizations_name_org_id')
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
+        batch_op.alter_column('bookmark_count', existing_type=sa.Integer(), nullable=True)
+        batch_op.alter_column('view_count', existing_type=sa.Integer(), nullable=True)
@@ -0,0 +1,57 @@
+"""Add full-text search index on organizations
+
+Revision ID: 7be41c9a2d58
+Revises: 3a9d2f6b1c04
+Create Date: 2026-10-18 10:03:11.902547
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7be41c9a2d58'
+down_revision = '3a9d2f6b1c04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        # Standalone FTS5 table keyed by rowid = org_id; kept in sync by the
+        # ORM hooks in app/services/search_service.py
+        op.execute(
+            "CREATE VIRTUAL TABLE organizations_fts USING fts5("
+            "name, mission, description, "
+            "tokenize = 'unicode61 remove_diacritics 2', "
+            "prefix = '2 3')"
+        )
+        op.execute(
+            "INSERT INTO organizations_fts (rowid, name, mission, description) "
+            "SELECT org_id, name, mission, description FROM organizations"
+        )
+    elif dialect == 'postgresql':
+        op.execute(
+            "ALTER TABLE organizations ADD COLUMN search_vector tsvector "
+            "GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(mission, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+            ") STORED"
+        )
+        op.create_index(
+            'ix_organizations_search_vector',
+            'organizations',
+            ['search_vector'],
+            postgresql_using='gin'
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS organizations_fts")
+    elif dialect == 'postgresql':
+        op.drop_index('ix_organizations_search_vector', table_name='organizations')
+        op.drop_column('organizations', 'search_vector')
@@ -0,0 +1,60 @@
+"""Add time-decayed organization trend scores
+
+Revision ID: a83c5d1e6f42
+Revises: f19a6c2e7b30
+Create Date: 2026-10-18 16:45:12.204318
+
+"""
+import math
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a83c5d1e6f42'
+down_revision = 'f19a6c2e7b30'
+branch_labels = None
+depends_on = None
+
+# Must match the defaults in app/services/trending_service.py
+EPOCH = datetime(2020, 1, 1)
+HALF_LIFE_HOURS = 24.0
+BOOKMARK_WEIGHT = 5.0
+
+
+def upgrade():
+    trends = op.create_table('organization_trends',
+    sa.Column('org_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=True),
+    sa.Column('score_log', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.org_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('org_id')
+    )
+    with op.batch_alter_table('organization_trends', schema=None) as batch_op:
+        batch_op.create_index('ix_organization_trends_category_score', ['category_id', 'score_log'], unique=False)
+        batch_op.create_index('ix_organization_trends_score', ['score_log'], unique=False)
+
+    # Seed from the all-time counters, as if every past event happened now,
+    # so the list is not empty until the first views arrive
+    now = datetime.utcnow()
+    decay = math.log(2) / (HALF_LIFE_HOURS * 3600)
+    age = decay * (now - EPOCH).total_seconds()
+    rows = op.get_bind().execute(sa.text(
+        "SELECT org_id, category_id, view_count, bookmark_count FROM organizations "
+        "WHERE view_count > 0 OR bookmark_count > 0"
+    )).all()
+    if rows:
+        op.bulk_insert(trends, [
+            {'org_id': org_id, 'category_id': category_id, 'updated_at': now,
+             'score_log': age + math.log((views or 0) + BOOKMARK_WEIGHT * (bookmarks or 0))}
+            for org_id, category_id, views, bookmarks in rows
+        ])
+
+
+def downgrade():
+    with op.batch_alter_table('organization_trends', schema=None) as batch_op:
+        batch_op.drop_index('ix_organization_trends_score')
+        batch_op.drop_index('ix_organization_trends_category_score')
+    op.drop_table('organization_trends')
@@ -0,0 +1,66 @@
+"""Add organization facet count table and filter indexes
+
+Revision ID: b2e8f05d4a17
+Revises: 7be41c9a2d58
+Create Date: 2026-10-18 11:27:45.116093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2e8f05d4a17'
+down_revision = '7be41c9a2d58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('organization_facet_counts',
+    sa.Column('combo_key', sa.String(length=120), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=True),
+    sa.Column('location_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('verification_level', sa.String(length=20), nullable=True),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('combo_key')
+    )
+    with op.batch_alter_table('organization_facet_counts', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_organization_facet_counts_category_id'), ['category_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_organization_facet_counts_location_id'), ['location_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_organization_facet_counts_status'), ['status'], unique=False)
+        batch_op.create_index(batch_op.f('ix_organization_facet_counts_verification_level'), ['verification_level'], unique=False)
+
+    with op.batch_alter_table('organizations', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_organizations_category_id'), ['category_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_organizations_location_id'), ['location_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_organizations_status'), ['status'], unique=False)
+
+    # Seed the counts from existing rows; FacetService maintains them from here
+    op.execute(
+        "INSERT INTO organization_facet_counts "
+        "(combo_key, category_id, location_id, status, verification_level, count) "
+        "SELECT "
+        "COALESCE(CAST(category_id AS VARCHAR), '') || '|' || "
+        "COALESCE(CAST(location_id AS VARCHAR), '') || '|' || "
+        "COALESCE(status, '') || '|' || COALESCE(verification_level, ''), "
+        "category_id, location_id, status, verification_level, COUNT(*) "
+        "FROM organizations "
+        "GROUP BY category_id, location_id, status, verification_level"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('organizations', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_organizations_status'))
+        batch_op.drop_index(batch_op.f('ix_organizations_location_id'))
+        batch_op.drop_index(batch_op.f('ix_organizations_category_id'))
+
+    with op.batch_alter_table('organization_facet_counts', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_organization_facet_counts_verification_level'))
+        batch_op.drop_index(batch_op.f('ix_organization_facet_counts_status'))
+        batch_op.drop_index(batch_op.f('ix_organization_facet_counts_location_id'))
+        batch_op.drop_index(batch_op.f('ix_organization_facet_counts_category_id'))
+
+    op.drop_table('organization_facet_counts')
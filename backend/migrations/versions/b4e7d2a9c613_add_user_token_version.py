@@ -0,0 +1,32 @@
+"""Add users.token_version
+
+Revision ID: b4e7d2a9c613
+Revises: d8f3a1c5e740
+Create Date: 2026-10-18 21:02:37.418205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4e7d2a9c613'
+down_revision = 'd8f3a1c5e740'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('token_version')
+
+    # SQLite drops the column by rebuilding the table, which loses the
+    # lower(...) expression indexes from d8f3a1c5e740
+    for column in ('name', 'email'):
+        op.create_index(f'ix_users_lower_{column}', 'users', [sa.text(f'lower({column})')],
+                        unique=False, if_not_exists=True)
@@ -0,0 +1,42 @@
+"""Add organization change feed with tombstones
+
+Revision ID: c6e2b94d7a13
+Revises: a83c5d1e6f42
+Create Date: 2026-10-18 18:02:37.519846
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6e2b94d7a13'
+down_revision = 'a83c5d1e6f42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('organization_changes',
+    sa.Column('org_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('seq', sa.BigInteger(), nullable=False),
+    sa.Column('op', sa.String(length=10), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('org_id')
+    )
+    with op.batch_alter_table('organization_changes', schema=None) as batch_op:
+        batch_op.create_index('ix_organization_changes_seq', ['seq', 'org_id'], unique=False)
+
+    # Existing orgs enter the feed at seq 0, before any change recorded from
+    # now on; deletes before this migration are not known
+    op.execute(sa.text(
+        "INSERT INTO organization_changes (org_id, seq, op, changed_at) "
+        "SELECT org_id, 0, 'upsert', :now FROM organizations"
+    ).bindparams(now=datetime.utcnow()))
+
+
+def downgrade():
+    with op.batch_alter_table('organization_changes', schema=None) as batch_op:
+        batch_op.drop_index('ix_organization_changes_seq')
+    op.drop_table('organization_changes')
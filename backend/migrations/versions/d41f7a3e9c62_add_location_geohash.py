@@ -0,0 +1,44 @@
+"""Add geohash column to locations
+
+Revision ID: d41f7a3e9c62
+Revises: b2e8f05d4a17
+Create Date: 2026-10-18 12:41:09.554780
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.geo import encode_geohash
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41f7a3e9c62'
+down_revision = 'b2e8f05d4a17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('locations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('geohash', sa.String(length=12), nullable=True))
+        batch_op.create_index(batch_op.f('ix_locations_geohash'), ['geohash'], unique=False)
+
+    connection = op.get_bind()
+    rows = connection.execute(sa.text(
+        "SELECT location_id, latitude, longitude FROM locations "
+        "WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+    )).all()
+    if rows:
+        connection.execute(
+            sa.text("UPDATE locations SET geohash = :geohash WHERE location_id = :location_id"),
+            [
+                {'location_id': row[0], 'geohash': encode_geohash(float(row[1]), float(row[2]))}
+                for row in rows
+            ]
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('locations', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_locations_geohash'))
+        batch_op.drop_column('geohash')
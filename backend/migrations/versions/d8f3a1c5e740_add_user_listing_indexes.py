@@ -0,0 +1,44 @@
+"""Add user listing indexes
+
+Revision ID: d8f3a1c5e740
+Revises: c6e2b94d7a13
+Create Date: 2026-10-18 19:24:51.630472
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8f3a1c5e740'
+down_revision = 'c6e2b94d7a13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keyset cursors compare (created_at, user_id) row values, so the
+    # default sort key must not be NULL
+    op.execute("UPDATE users SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL")
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_index('ix_users_created_at_user_id', ['created_at', 'user_id'], unique=False)
+        batch_op.create_index('ix_users_name_user_id', ['name', 'user_id'], unique=False)
+        batch_op.create_index('ix_users_role_created_at_user_id', ['role', 'created_at', 'user_id'], unique=False)
+        batch_op.create_index('ix_users_last_login', ['last_login'], unique=False)
+
+    op.create_index('ix_users_lower_name', 'users', [sa.text('lower(name)')], unique=False)
+    op.create_index('ix_users_lower_email', 'users', [sa.text('lower(email)')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_users_lower_email', table_name='users')
+    op.drop_index('ix_users_lower_name', table_name='users')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_last_login')
+        batch_op.drop_index('ix_users_role_created_at_user_id')
+        batch_op.drop_index('ix_users_name_user_id')
+        batch_op.drop_index('ix_users_created_at_user_id')
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
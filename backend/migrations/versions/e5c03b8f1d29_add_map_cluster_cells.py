@@ -0,0 +1,64 @@
+"""Add map cluster cell aggregates
+
+Revision ID: e5c03b8f1d29
+Revises: d41f7a3e9c62
+Create Date: 2026-10-18 14:05:52.771320
+
+"""
+from collections import defaultdict
+from alembic import op
+import sqlalchemy as sa
+
+from app.geo import mercator_cell
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c03b8f1d29'
+down_revision = 'd41f7a3e9c62'
+branch_labels = None
+depends_on = None
+
+# Must match app/services/cluster_service.py
+CLUSTER_MAX_ZOOM = 16
+MAX_REPRESENTATIVES = 3
+
+
+def upgrade():
+    cells = op.create_table('map_cluster_cells',
+    sa.Column('zoom', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('cell_x', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('cell_y', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('sum_latitude', sa.Float(), nullable=False),
+    sa.Column('sum_longitude', sa.Float(), nullable=False),
+    sa.Column('representative_org_ids', sa.JSON(), nullable=True),
+    sa.PrimaryKeyConstraint('zoom', 'cell_x', 'cell_y')
+    )
+
+    # Build the grid for existing organizations
+    rows = op.get_bind().execute(sa.text(
+        "SELECT o.org_id, l.latitude, l.longitude FROM organizations o "
+        "JOIN locations l ON o.location_id = l.location_id "
+        "WHERE l.latitude IS NOT NULL AND l.longitude IS NOT NULL "
+        "ORDER BY o.org_id"
+    )).all()
+    grid = defaultdict(lambda: [0, 0.0, 0.0, []])
+    for org_id, latitude, longitude in rows:
+        latitude, longitude = float(latitude), float(longitude)
+        for zoom in range(CLUSTER_MAX_ZOOM + 1):
+            cell = grid[(zoom,) + mercator_cell(latitude, longitude, zoom)]
+            cell[0] += 1
+            cell[1] += latitude
+            cell[2] += longitude
+            if len(cell[3]) < MAX_REPRESENTATIVES:
+                cell[3].append(org_id)
+    if grid:
+        op.bulk_insert(cells, [
+            {'zoom': zoom, 'cell_x': x, 'cell_y': y, 'count': count,
+             'sum_latitude': sum_lat, 'sum_longitude': sum_lng, 'representative_org_ids': ids}
+            for (zoom, x, y), (count, sum_lat, sum_lng, ids) in grid.items()
+        ])
+
+
+def downgrade():
+    op.drop_table('map_cluster_cells')
@@ -0,0 +1,38 @@
+"""Add resource version counters and backfill row versions
+
+Revision ID: f19a6c2e7b30
+Revises: e5c03b8f1d29
+Create Date: 2026-10-18 15:20:33.480912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f19a6c2e7b30'
+down_revision = 'e5c03b8f1d29'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    versions = op.create_table('resource_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Seed the rows so the first write only ever needs an UPDATE
+    op.bulk_insert(versions, [
+        {'name': 'organizations', 'version': 1},
+        {'name': 'users', 'version': 1},
+    ])
+
+    # updated_at is now the row version behind ETags; it must never be NULL
+    op.execute("UPDATE organizations SET updated_at = created_at WHERE updated_at IS NULL")
+    op.execute("UPDATE users SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL")
+
+
+def downgrade():
+    op.drop_table('resource_versions')
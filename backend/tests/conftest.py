@@ -0,0 +1,12 @@
+import os
+import tempfile
+
+# Config reads the environment at import time, so every test module must see
+# the same settings before the first one imports the app
+_DB_FILE = os.path.join(tempfile.mkdtemp(), 'test.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_DB_FILE}'
+os.environ.setdefault('JWT_SECRET_KEY', 'test-jwt-secret-key-that-is-long-enough')
+# No periodic reference-data version checks in the middle of a counted request
+os.environ['REFERENCE_CHECK_INTERVAL'] = '3600'
+# Hash on the test thread instead of spawning a process pool
+os.environ['PASSWORD_HASH_WORKERS'] = '0'
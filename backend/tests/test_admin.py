@@ -1 +1,148 @@
 # Add unit tests for admin routes and services here
+
+import threading
+
+import pytest
+
+from app import app as flask_app
+from app.db import db
+from app.models import AuditLog, Organization, User
+from app.services.email_service import EmailService
+from app.services.moderation_service import ModerationService
+from app.services.password_service import PasswordService
+
+PASSWORDS = {'admin@example.com': 'admin-password', 'visitor@example.com': 'visitor-password'}
+
+
+@pytest.fixture(scope='module')
+def client():
+    with flask_app.app_context():
+        db.create_all()
+        db.session.add_all([
+            User(name='Admin', email='admin@example.com', role='admin',
+                 password_hash=PasswordService.hash(PASSWORDS['admin@example.com'])),
+            User(name='Visitor', email='visitor@example.com', role='visitor',
+                 password_hash=PasswordService.hash(PASSWORDS['visitor@example.com'])),
+        ])
+        db.session.commit()
+        yield flask_app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def emails(monkeypatch):
+    """Emails the test queued, instead of sending them"""
+    queued = []
+
+    def enqueue(send, *args):
+        queued.append(args)
+        return True
+
+    monkeypatch.setattr(EmailService, 'enqueue', staticmethod(enqueue))
+    return queued
+
+
+def _organizations(prefix, count, status='pending', email=True):
+    orgs = [
+        Organization(name=f'{prefix} {i}', status=status,
+                     email=f'{prefix.lower()}{i}@example.com' if email else None)
+        for i in range(count)
+    ]
+    db.session.add_all(orgs)
+    db.session.commit()
+    return [org.org_id for org in orgs]
+
+
+def _statuses(org_ids):
+    db.session.expire_all()
+    return {org.org_id: org.status for org in Organization.query.filter(Organization.org_id.in_(org_ids))}
+
+
+def _login(client, email):
+    response = client.post('/auth/login', json={'email': email, 'password': PASSWORDS[email]})
+    assert response.status_code == 200
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+
+def test_moderation_decides_a_batch_and_reports_what_it_skipped(client, emails):
+    reviewer = User.query.filter_by(email='admin@example.com').one()
+    pending = _organizations('Pending', 2) + _organizations('Quiet', 1, email=False)
+    approved = _organizations('Approved', 1, status='approved')
+
+    result = ModerationService.moderate(pending + approved + [999999], 'approved', reviewer=reviewer)
+
+    assert result['moderated'] == pending
+    assert result['skipped'] == {approved[0]: 'already approved', 999999: 'not found'}
+    assert result['emails_queued'] == len(emails) == 2
+    assert set(_statuses(pending).values()) == {'approved'}
+    assert Organization.query.filter(Organization.org_id.in_(pending),
+                                     Organization.approved_by == reviewer.user_id).count() == 3
+    logs = AuditLog.query.filter(AuditLog.target_id.in_(pending)).all()
+    assert sorted(log.target_id for log in logs) == pending
+    assert {log.action_type for log in logs} == {'organization_approved'}
+
+
+def test_concurrent_reviewers_decide_each_organization_once(client, emails):
+    org_ids = _organizations('Contested', 6)
+    start = threading.Barrier(2)
+    results = {}
+
+    def review(status):
+        with flask_app.app_context():
+            start.wait()
+            results[status] = ModerationService.moderate(org_ids, status)
+            db.session.remove()
+
+    threads = [threading.Thread(target=review, args=(status,)) for status in ('approved', 'rejected')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    approved, rejected = set(results['approved']['moderated']), set(results['rejected']['moderated'])
+    assert not approved & rejected
+    assert approved | rejected == set(org_ids)
+    statuses = _statuses(org_ids)
+    assert all(statuses[org_id] == ('approved' if org_id in approved else 'rejected') for org_id in org_ids)
+    assert AuditLog.query.filter(AuditLog.target_id.in_(org_ids)).count() == len(org_ids)
+    assert len(emails) == len(org_ids)
+
+
+def test_moderation_endpoint_is_admin_only_and_validates_decisions(client, emails):
+    org_ids = _organizations('Endpoint', 2)
+    body = {'decision': 'reject', 'org_ids': org_ids, 'reason': 'Missing registration number'}
+
+    assert client.post('/api/admin/moderation', json=body,
+                       headers=_login(client, 'visitor@example.com')).status_code == 403
+
+    admin = _login(client, 'admin@example.com')
+    assert client.post('/api/admin/moderation', json=dict(body, decision='ignore'), headers=admin).status_code == 400
+    response = client.post('/api/admin/moderation', json=body, headers=admin)
+    assert response.status_code == 200
+    assert response.get_json()['moderated'] == org_ids
+    assert response.get_json()['status'] == 'rejected'
+    assert set(_statuses(org_ids).values()) == {'rejected'}
+
+
+def test_dashboard_moderation_is_audited_with_its_reviewer(client, emails):
+    org_ids = _organizations('Dashboard', 2)
+    admin = User.query.filter_by(email='admin@example.com').one()
+
+    response = client.post('/admin/organization/action/', headers=_login(client, 'admin@example.com'),
+                           data={'action': 'approve', 'rowid': [str(org_id) for org_id in org_ids]})
+    assert response.status_code == 302
+
+    db.session.expire_all()
+    assert {org.approved_by for org in Organization.query.filter(Organization.org_id.in_(org_ids))} == {admin.user_id}
+    logs = AuditLog.query.filter(AuditLog.target_id.in_(org_ids)).all()
+    assert {(log.user_id, log.new_values['source']) for log in logs} == {(admin.user_id, 'admin_dashboard')}
+
+
+def test_anonymous_dashboard_moderation_still_records_its_source(client, emails):
+    org_ids = _organizations('Unsigned', 1)
+
+    client.post('/admin/organization/action/', data={'action': 'reject', 'rowid': [str(org_ids[0])]})
+
+    log = AuditLog.query.filter_by(target_id=org_ids[0]).one()
+    assert (log.user_id, log.action_type, log.new_values['source']) == (None, 'organization_rejected', 'admin_dashboard')
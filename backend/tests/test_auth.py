@@ -1 +1,118 @@
 # Add unit tests for auth routes and services here
+
+import threading
+
+import pytest
+from flask_jwt_extended import decode_token
+from sqlalchemy import event
+
+from app import app as flask_app
+from app.db import db
+from app.models import User
+from app.services.password_service import PasswordService
+from app.utils import APIException
+
+PASSWORDS = {'admin@example.com': 'admin-password', 'visitor@example.com': 'visitor-password'}
+
+
+@pytest.fixture(scope='module')
+def client():
+    with flask_app.app_context():
+        db.create_all()
+        db.session.add_all([
+            User(name='Admin', email='admin@example.com', role='admin',
+                 password_hash=PasswordService.hash(PASSWORDS['admin@example.com'])),
+            User(name='Visitor', email='visitor@example.com', role='visitor',
+                 password_hash=PasswordService.hash(PASSWORDS['visitor@example.com'])),
+        ])
+        db.session.commit()
+        yield flask_app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+def _login(client, email):
+    response = client.post('/auth/login', json={'email': email, 'password': PASSWORDS[email]})
+    assert response.status_code == 200
+    return response.get_json()['token']
+
+
+def _bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def _set(email, **values):
+    user = User.query.filter_by(email=email).one()
+    for name, value in values.items():
+        setattr(user, name, value)
+    db.session.commit()
+
+
+def test_access_token_carries_role_and_version_claims(client):
+    token = _login(client, 'admin@example.com')
+    claims = decode_token(token)
+    user = User.query.filter_by(email='admin@example.com').one()
+    assert claims['sub'] == str(user.user_id)
+    assert claims['role'] == 'admin'
+    assert claims['verified'] is False
+    assert claims['tv'] == user.token_version
+
+
+def test_role_required_authorizes_without_loading_the_user(client):
+    admin = _bearer(_login(client, 'admin@example.com'))
+    visitor = _bearer(_login(client, 'visitor@example.com'))
+    # First use caches each user's token version
+    client.get('/api/admin/moderation', headers=admin)
+    client.get('/api/admin/moderation', headers=visitor)
+
+    statements = []
+    record = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        assert client.get('/api/admin/moderation', headers=admin).status_code == 200
+        assert client.get('/api/admin/moderation', headers=visitor).status_code == 403
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert not [statement for statement in statements if 'users' in statement]
+
+
+def test_logout_revokes_earlier_tokens(client):
+    old = _login(client, 'visitor@example.com')
+    assert client.get('/users/profile', headers=_bearer(old)).status_code == 200
+
+    assert client.post('/auth/logout', headers=_bearer(old)).status_code == 200
+    assert client.get('/users/profile', headers=_bearer(old)).status_code == 401
+    assert client.get('/users/profile', headers=_bearer(_login(client, 'visitor@example.com'))).status_code == 200
+
+
+@pytest.mark.parametrize('change, restore', [
+    ({'role': 'visitor'}, {'role': 'admin'}),
+    ({'is_verified': True}, {'is_verified': False}),
+])
+def test_claim_changes_revoke_earlier_tokens(client, change, restore):
+    old = _login(client, 'admin@example.com')
+    assert client.get('/api/admin/moderation', headers=_bearer(old)).status_code == 200
+
+    _set('admin@example.com', **change)
+    try:
+        assert client.get('/api/admin/moderation', headers=_bearer(old)).status_code == 401
+        fresh = _login(client, 'admin@example.com')
+        expected = 403 if change.get('role') == 'visitor' else 200
+        assert client.get('/api/admin/moderation', headers=_bearer(fresh)).status_code == expected
+    finally:
+        _set('admin@example.com', **restore)
+
+
+def test_verify_without_a_hash_works_before_init_app(monkeypatch):
+    monkeypatch.setattr(PasswordService, '_dummy_hash', None)
+    assert PasswordService.verify('password', None) is False
+    assert PasswordService._dummy_hash
+
+
+def test_hashing_rejects_work_past_the_pending_limit(monkeypatch):
+    monkeypatch.setattr(PasswordService, '_workers', 1)
+    monkeypatch.setattr(PasswordService, '_slots', threading.BoundedSemaphore(1))
+    PasswordService._slots.acquire()  # one hash already in flight
+    with pytest.raises(APIException) as error:
+        PasswordService.hash('password')
+    assert error.value.status_code == 503
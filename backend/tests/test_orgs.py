@@ -1 +1,922 @@
 # Add unit tests for organization routes and services here
+
+import csv
+import gzip
+import io
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, func, select, text
+
+from app import app as flask_app
+from app.db import db
+from app.geo import haversine_km
+from app.models import Category, Location, MapClusterCell, Organization, OrganizationTrend, User
+from app.pagination import encode_cursor
+from app.routes import orgs as orgs_routes
+from app.serializers import loads, serializer_for
+from app.services import suggest_service
+from app.services.cache_service import CacheService, ORG_KEY
+from app.services.cluster_service import ClusterService
+from app.services.counter_service import CounterService
+from app.services.duplicate_service import DuplicateService
+from app.services.event_service import EventService
+from app.services.export_service import ExportService
+from app.services.facet_service import FACETS, FacetService
+from app.services.org_sync import OrgChange
+from app.services.reference_service import ReferenceService
+from app.services.search_service import SearchService
+from app.services.suggest_service import OrganizationIndex, SuggestService
+from app.services.trending_service import TrendingService
+
+
+@pytest.fixture(scope='module')
+def client():
+    with flask_app.app_context():
+        db.create_all()
+        categories = [Category(name=f'Category {i}') for i in range(5)]
+        locations = [Location(country='US', city=f'City {i}') for i in range(5)]
+        admins = [User(name=f'Admin {i}', email=f'admin{i}@example.com', password_hash='x') for i in range(5)]
+        db.session.add_all(categories + locations + admins)
+        db.session.flush()
+        db.session.add_all(
+            Organization(
+                name=f'Charity {i:03d}',
+                category_id=categories[i % 5].category_id,
+                location_id=locations[i % 5].location_id,
+                admin_user_id=admins[i % 5].user_id,
+            )
+            for i in range(60)
+        )
+        db.session.commit()
+    ReferenceService.init_app(flask_app)
+    with flask_app.app_context():
+        yield flask_app.test_client()
+        # Views counted by the tests must not be flushed into a dropped table
+        CounterService.store().drain()
+        db.session.remove()
+        db.drop_all()
+
+
+def _queries(client, url, uncached=True):
+    """Run one GET (uncached by default) and return (response, SQL statements run)"""
+    if uncached:
+        CacheService.init_app(flask_app)
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with flask_app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    return response, statements
+
+
+def _count_queries(client, url):
+    """Run one uncached GET and return (response, number of SQL statements)"""
+    response, statements = _queries(client, url)
+    return response, len(statements)
+
+
+def test_expand_query_count_is_independent_of_page_size(client):
+    small, small_count = _count_queries(client, '/orgs/?limit=5&expand=category,location,admin_user')
+    large, large_count = _count_queries(client, '/orgs/?limit=50&expand=category,location,admin_user')
+
+    assert small.status_code == 200 and large.status_code == 200
+    assert len(small.get_json()['data']) == 5
+    assert len(large.get_json()['data']) == 50
+    assert small_count == large_count
+
+
+def test_reference_expansions_are_served_from_memory(client):
+    _, joined_count = _count_queries(client, '/orgs/?limit=20&expand=admin_user')
+    _, referenced_count = _count_queries(client, '/orgs/?limit=20&expand=admin_user,category,location')
+    assert referenced_count == joined_count
+
+
+def test_expand_embeds_related_rows(client):
+    response = client.get('/orgs/?limit=3&expand=category,location&fields=name,category_id')
+    for item in response.get_json()['data']:
+        assert item['category']['category_id'] == item['category_id']
+        assert item['category']['name'].startswith('Category ')
+        assert item['location']['country'] == 'US'
+        assert 'admin_user' not in item
+
+
+def test_unknown_expansion_is_rejected(client):
+    response = client.get('/orgs/?expand=nonexistent')
+    assert response.status_code == 400
+
+
+def test_changes_feed_returns_each_changed_org_once_with_tombstones(client):
+    start = client.get('/orgs/changes?limit=1000').get_json()
+    assert not start['has_more']
+    cursor = start['cursor']
+
+    org_id = client.post('/orgs/?force=true', json={'name': 'Feed Test Charity'}).get_json()['org_id']
+    client.put(f'/orgs/{org_id}', json={'mission': 'First edit'})
+    client.put(f'/orgs/{org_id}', json={'mission': 'Second edit'})
+    client.delete('/orgs/1')
+
+    first = client.get(f'/orgs/changes?since={cursor}&limit=1').get_json()
+    assert first['has_more']
+    second = client.get(f"/orgs/changes?since={first['cursor']}&limit=1").get_json()
+    assert not second['has_more']
+
+    changes = first['data'] + second['data']
+    assert [(change['op'], change['org_id']) for change in changes] == [('upsert', org_id), ('delete', 1)]
+    assert changes[0]['organization']['mission'] == 'Second edit'
+    assert changes[1]['organization'] is None
+
+
+def test_changes_feed_rejects_malformed_cursor(client):
+    assert client.get('/orgs/changes?since=not-a-cursor').status_code == 400
+
+
+def test_counter_flush_keeps_collection_etags(client):
+    CounterService.flush()
+    changes = client.get('/orgs/changes?limit=5')
+    names = client.get('/orgs/?fields=org_id,name&limit=5')
+    client.get('/orgs/2')
+    client.get('/orgs/3')
+    CounterService.flush()
+
+    assert client.get('/orgs/changes?limit=5', headers={'If-None-Match': changes.headers['ETag']}).status_code == 304
+    assert client.get('/orgs/?fields=org_id,name&limit=5',
+                      headers={'If-None-Match': names.headers['ETag']}).status_code == 304
+
+
+def test_revalidating_an_organization_is_not_a_view(client):
+    first = client.get('/orgs/4')
+    assert client.get('/orgs/4', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    assert client.get('/orgs/4').get_json()['view_count'] == first.get_json()['view_count'] + 1
+
+
+def test_organization_etag_follows_live_counts(client):
+    first = client.get('/orgs/5')
+    client.get('/orgs/5')  # someone else's view changes the count in the body
+
+    again = client.get('/orgs/5', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 200
+    assert again.get_json()['view_count'] == first.get_json()['view_count'] + 2
+
+
+def test_bulk_create_refuses_near_duplicates_unless_forced(client):
+    rows = [{'name': 'Charity 007'}, {'name': 'Bulk Import Original Charity'}]
+
+    refused = client.post('/orgs/bulk?atomic=false', json=rows)
+    assert refused.status_code == 207
+    first, second = refused.get_json()['results']
+    assert any(match['name'] == 'Charity 007' for match in first['errors']['duplicates'])
+    assert 'org_id' in second
+
+    forced = client.post('/orgs/bulk?force=true', json=rows[:1])
+    assert forced.status_code == 201
+
+
+
+
+def test_bulk_create_refuses_near_duplicates_within_the_batch(client):
+    rows = [{'name': 'Riverside Food Pantry', 'email': 'hello@riverside-pantry.org'},
+            {'name': 'Riverside Food Pantry Inc', 'email': 'info@riverside.example'},
+            {'name': 'Mountain Literacy Project'}]
+
+    response = client.post('/orgs/bulk?atomic=false', json=rows)
+    assert response.status_code == 207
+    first, second, third = response.get_json()['results']
+    assert 'org_id' in first and 'org_id' in third
+    assert [match['row'] for match in second['errors']['duplicates']] == [0]
+
+
+@pytest.mark.parametrize('field, value', [('email', 42), ('address', ['1 Main St']), ('website', {'url': 'x'})])
+def test_create_rejects_non_string_contact_fields(client, field, value):
+    response = client.post('/orgs/', json={'name': 'Typed Charity', field: value})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == f'{field} must be a string'
+
+
+def _walk(client, url, link):
+    """Org ids of each page from `url` on, following the `link` ('next' or 'prev') URLs"""
+    pages = []
+    while url:
+        body = client.get(url).get_json()
+        pages.append([item['org_id'] for item in body['data']])
+        url, last = body[link], body
+    return pages, last
+
+
+def test_keyset_pages_walk_forward_and_back(client):
+    forward, last = _walk(client, '/orgs/?fields=org_id,name&sort=-name&limit=7', 'next')
+    expected = db.session.execute(
+        select(Organization.org_id).order_by(Organization.name.desc(), Organization.org_id.desc())
+    ).scalars().all()
+    assert [org_id for page in forward for org_id in page] == expected
+    assert all(len(page) == 7 for page in forward[:-1])
+
+    backward, first = _walk(client, last['prev'], 'prev')
+    assert backward[::-1] == forward[:-1]
+    assert first['prev_cursor'] is None
+
+
+@pytest.mark.parametrize('payload', [
+    [], 'x', 7, {'s': 'name', 'd': False}, {'s': 'name', 'd': False, 'v': 'Charity 001'},
+    {'s': 'name', 'd': False, 'v': 'Charity 001', 'id': 'one'},
+])
+def test_malformed_list_cursor_is_rejected(client, payload):
+    response = client.get('/orgs/', query_string={'after': encode_cursor(payload)})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid cursor'
+
+
+
+@pytest.fixture
+def search_index(client):
+    # create_all does not make the FTS5 table the migration adds
+    SearchService.install(db.session.connection())
+    db.session.commit()
+    yield SearchService
+    db.session.execute(text(f'DROP TABLE {SearchService.FTS_TABLE}'))
+    db.session.commit()
+    SearchService._available.clear()
+
+
+def _search_ids(query):
+    return [hit['org_id'] for hit in SearchService.search(query)]
+
+
+def test_search_index_is_built_from_existing_rows(client, search_index):
+    response = client.get('/orgs/search?q=charity%20007')
+    assert response.status_code == 200
+    best = response.get_json()['data'][0]
+    assert best['name'] == 'Charity 007'
+    assert best['name_highlight'] == '<mark>Charity</mark> <mark>007</mark>'
+
+
+def test_search_terms_are_quoted_and_prefixes_kept(client, search_index):
+    assert SearchService.parse_terms('Anim* NEAR(x) OR -"y"') == [
+        ('anim', True), ('near', False), ('x', False), ('or', False), ('y', False)
+    ]
+    assert len(_search_ids('charit*')) == 20
+    assert _search_ids('charit') == []
+    # FTS5 syntax in user input is matched as words, not parsed
+    response = client.get('/orgs/search', query_string={'q': 'charity OR NEAR(007) -"x'})
+    assert response.status_code == 200
+    assert response.get_json()['data'] == []
+
+
+def test_search_index_follows_organization_writes(client, search_index):
+    org = Organization(name='Zebra Sanctuary', mission='Rescuing striped horses')
+    db.session.add(org)
+    db.session.commit()
+    assert _search_ids('zebra') == [org.org_id]
+
+    org.name = 'Okapi Sanctuary'
+    db.session.commit()
+    assert _search_ids('zebra') == []
+    assert _search_ids('okapi') == _search_ids('striped') == [org.org_id]
+
+    org.website = 'https://okapi.example.org'
+    db.session.commit()
+    assert _search_ids('okapi') == [org.org_id]
+
+    db.session.delete(org)
+    db.session.commit()
+    assert _search_ids('okapi') == _search_ids('striped') == []
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setitem(flask_app.config, 'CACHE_STALE_TTL', 60)
+    CacheService.init_app(flask_app)
+    yield CacheService
+    CacheService.init_app(flask_app)
+
+
+def test_concurrent_misses_run_the_loader_once(cache):
+    calls = []
+    started = threading.Event()
+
+    def loader():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return {'answer': 42}
+
+    coalesced = cache.metrics()['loads']['coalesced']
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('test:flight', loader)))
+               for _ in range(8)]
+    threads[0].start()
+    started.wait(1)
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{'answer': 42}] * 8
+    assert cache.metrics()['loads']['coalesced'] - coalesced == 7
+
+
+def test_expired_entry_is_served_stale_while_it_reloads(cache):
+    cache.get_or_load('test:stale', lambda: 'old', ttl=0.05)
+    time.sleep(0.1)
+    served = cache.metrics()['loads']['stale_served']
+    reloaded = threading.Event()
+
+    def loader():
+        reloaded.set()
+        return 'new'
+
+    assert cache.get_or_load('test:stale', loader) == 'old'
+    assert reloaded.wait(2)
+    deadline = time.monotonic() + 2
+    while cache.get_or_load('test:stale', lambda: 'missed') != 'new' and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.get_or_load('test:stale', lambda: 'missed') == 'new'
+    assert cache.metrics()['loads']['stale_served'] > served
+
+
+def test_load_racing_an_invalidation_is_not_cached(cache):
+    key = ORG_KEY.format(1)
+
+    def racing_loader():
+        # The row was read, then a write committed before the value is stored
+        value = 'read before the write'
+        cache.invalidate_organizations([OrgChange('update', 1, {'name': None}, None)])
+        return value
+
+    assert cache.get_or_load(key, racing_loader) == 'read before the write'
+    assert cache.get_or_load(key, lambda: 'read after the write') == 'read after the write'
+    assert cache.get_or_load(key, lambda: 'not reloaded') == 'read after the write'
+
+
+def test_invalidation_keeps_loads_of_other_keys(cache):
+    def loader():
+        cache.invalidate_organizations([OrgChange('update', 1, {'name': None}, None)])
+        return 'unaffected'
+
+    assert cache.get_or_load(ORG_KEY.format(2), loader) == 'unaffected'
+    assert cache.get_or_load(ORG_KEY.format(2), lambda: 'not reloaded') == 'unaffected'
+
+
+
+class _DictRedis:
+    """The part of the redis client API RedisCache uses, in a dict (no expiry)"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, name):
+        return self.data.get(name)
+
+    def set(self, name, value, ex=None, px=None, nx=False):
+        if nx and name in self.data:
+            return None
+        self.data[name] = value
+        return True
+
+    def mget(self, names):
+        return [self.data.get(name) for name in names]
+
+    def delete(self, *names):
+        return sum(self.data.pop(name, None) is not None for name in names)
+
+    def eval(self, *args):
+        raise NotImplementedError('no Lua')
+
+    def pipeline(self, transaction=True):
+        client, calls = self, []
+
+        class Pipeline:
+            def set(self, *args, **kwargs):
+                calls.append((args, kwargs))
+
+            def execute(self):
+                return [client.set(*args, **kwargs) for args, kwargs in calls]
+
+        return Pipeline()
+
+
+def test_detail_entries_are_shared_through_l2_and_invalidated_in_both_tiers(client, counters):
+    redis_client = _DictRedis()
+    CacheService.init_app(flask_app, client=redis_client)
+    try:
+        org = Organization.query.filter_by(name='Charity 011').one()
+        url = f'/orgs/{org.org_id}?fields=org_id,name'
+        key = 'cache:' + ORG_KEY.format(org.org_id)
+
+        assert _queries(client, url, uncached=False)[0].get_json()['name'] == 'Charity 011'
+        assert key in redis_client.data
+        assert len(_queries(client, url, uncached=False)[1]) == 0
+
+        # Another worker: an empty L1 is filled from L2 without a query
+        CacheService._l1.clear()
+        response, statements = _queries(client, url, uncached=False)
+        assert response.get_json()['name'] == 'Charity 011' and statements == []
+        assert CacheService.metrics()['l2']['hits'] >= 1
+
+        org.name = 'Charity 011 Renamed'
+        db.session.commit()
+        assert key not in redis_client.data
+        assert client.get(url).get_json()['name'] == 'Charity 011 Renamed'
+        assert loads(redis_client.data[key])['value']['name'] == 'Charity 011 Renamed'
+    finally:
+        CacheService.init_app(flask_app)
+
+@pytest.fixture
+def counters(monkeypatch):
+    # Flush only when the test says so
+    CounterService.shutdown()
+    monkeypatch.setattr(CounterService, '_ensure_flusher', staticmethod(lambda: None))
+    yield CounterService
+
+
+def _stored_counts(org_id):
+    row = db.session.execute(
+        select(Organization.view_count, Organization.bookmark_count).where(Organization.org_id == org_id)
+    ).one()
+    return {'org_id': org_id, 'view_count': row.view_count, 'bookmark_count': row.bookmark_count}
+
+
+def test_concurrent_counter_increments_are_merged_then_flushed_once(client, counters):
+    before = _stored_counts(7)
+
+    def count_views():
+        for _ in range(250):
+            counters.increment(7)
+
+    threads = [threading.Thread(target=count_views) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counters.increment(7, 'bookmark_count')
+
+    assert counters.pending([7]) == {(7, 'view_count'): 1000, (7, 'bookmark_count'): 1}
+    merged = dict(before)
+    counters.merge_pending([merged])
+    assert merged == dict(before, view_count=before['view_count'] + 1000,
+                          bookmark_count=before['bookmark_count'] + 1)
+
+    assert counters.flush() == 2
+    assert counters.pending([7]) == {}
+    assert _stored_counts(7) == merged
+
+
+def test_failed_counter_flush_keeps_its_deltas(client, counters, monkeypatch):
+    before = _stored_counts(8)
+    counters.increment(8, by=3)
+
+    def broken(deltas):
+        raise RuntimeError('database unavailable')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(CounterService, '_write', staticmethod(broken))
+        with pytest.raises(RuntimeError):
+            counters.flush()
+    assert counters.pending([8]) == {(8, 'view_count'): 3}
+
+    assert counters.flush() == 1
+    assert _stored_counts(8)['view_count'] == before['view_count'] + 3
+
+
+def test_counter_flush_keeps_cached_list_pages(client, counters):
+    url = '/orgs/?sort=name&limit=5'
+    first = client.get(url).get_json()['data'][0]
+    loads = CacheService.metrics()['loads']['loads']
+
+    counters.increment(first['org_id'], by=4)
+    counters.flush()
+    response = client.get(url)
+
+    assert response.get_json()['data'][0]['view_count'] == first['view_count'] + 4
+    assert CacheService.metrics()['loads']['loads'] == loads
+    again = client.get(url, headers={'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_trending_lists_only_approved_organizations(client, counters):
+    public, hidden = (db.session.get(Organization, org_id) for org_id in (21, 22))
+    public.status, hidden.status = 'approved', 'rejected'
+    db.session.commit()
+    counters.increment(public.org_id, by=3)
+    counters.increment(hidden.org_id, by=50)
+    counters.flush()
+
+    top = client.get('/orgs/trending?limit=1').get_json()['data']
+    assert [item['org_id'] for item in top] == [public.org_id]
+    assert hidden.org_id not in [item['org_id'] for item in client.get('/orgs/trending?limit=100').get_json()['data']]
+
+
+def test_fieldsets_select_and_return_only_the_requested_fields(client):
+    response, statements = _queries(client, '/orgs/?fields=org_id,name&limit=5')
+    assert response.status_code == 200
+    assert all(set(item) == {'org_id', 'name'} for item in response.get_json()['data'])
+    page_query = next(statement for statement in statements if 'FROM organizations' in statement)
+    assert 'description' not in page_query and 'mission' not in page_query
+
+    detail = client.get('/orgs/5?fields=summary&exclude=website,logo_url').get_json()
+    assert 'name' in detail and 'view_count' in detail
+    assert not {'website', 'logo_url', 'description'} & set(detail)
+
+    # The primary key is always kept, so rows stay addressable
+    assert set(client.get('/orgs/5?fields=name').get_json()) == {'org_id', 'name'}
+    assert client.get('/orgs/?fields=name,secret').status_code == 400
+    assert client.get('/orgs/5?exclude=password').status_code == 400
+
+
+def _facet_counts(filters):
+    """FacetService.counts as {facet: {value: count}}"""
+    return {facet: {item['value']: item['count'] for item in items}
+            for facet, items in FacetService.counts(filters).items()}
+
+
+def _grouped_counts(filters):
+    """The same counts by GROUP BY over organizations"""
+    result = {}
+    for facet in FACETS:
+        column = getattr(Organization, facet)
+        query = db.session.query(column, func.count()).group_by(column)
+        other_filters = {name: values for name, values in filters.items() if name != facet}
+        result[facet] = dict(FacetService.apply_filters(query, other_filters).all())
+    return result
+
+
+def test_facet_counts_follow_inserts_updates_and_deletes(client):
+    category_id = Category.query.order_by(Category.category_id).first().category_id
+    filters = {'category_id': [category_id], 'status': ['pending']}
+    assert _facet_counts(filters) == _grouped_counts(filters)
+
+    org = Organization(name='Faceted', category_id=category_id, status='pending')
+    db.session.add(org)
+    db.session.commit()
+    before = _facet_counts(filters)
+    assert before == _grouped_counts(filters)
+
+    org.category_id, org.verification_level = category_id + 1, 'verified'
+    db.session.commit()
+    after = _facet_counts(filters)
+    assert after == _grouped_counts(filters)
+    assert after['status']['pending'] == before['status']['pending'] - 1
+
+    db.session.delete(org)
+    db.session.commit()
+    assert _facet_counts(filters) == _grouped_counts(filters)
+    assert _facet_counts({}) == _grouped_counts({})
+
+    body = client.get(f'/orgs/?category_id={category_id}&status=pending&facets=true').get_json()
+    assert {item['value']: item['count'] for item in body['facets']['status']} == _grouped_counts(filters)['status']
+
+    with db.engine.begin() as connection:
+        FacetService.rebuild(connection)
+    assert _facet_counts({}) == _grouped_counts({})
+
+
+def test_nearby_matches_a_brute_force_distance_scan(client):
+    center = (40.7128, -74.0060)
+    # Spread around the centre so the points straddle geohash cell edges
+    points = [(40.7128 + dlat, -74.0060 + dlng) for dlat in (-0.04, -0.012, 0.0, 0.02, 0.09)
+              for dlng in (-0.05, 0.003, 0.03)]
+    category_id = Category.query.order_by(Category.category_id).first().category_id
+    locations = [Location(country='US', city=f'Grid {i}', latitude=lat, longitude=lng)
+                 for i, (lat, lng) in enumerate(points)]
+    db.session.add_all(locations)
+    db.session.flush()
+    orgs = [Organization(name=f'Nearby {i}', location_id=location.location_id,
+                         category_id=category_id if i % 2 else None)
+            for i, location in enumerate(locations)]
+    db.session.add_all(orgs)
+    db.session.commit()
+
+    def expected(radius_km, only_category=False):
+        hits = [(haversine_km(*center, lat, lng), org.org_id) for org, (lat, lng) in zip(orgs, points)
+                if not only_category or org.category_id == category_id]
+        return [org_id for distance, org_id in sorted(hits) if distance <= radius_km]
+
+    def nearby(query):
+        response = client.get(f'/orgs/nearby?lat={center[0]}&lng={center[1]}&{query}')
+        assert response.status_code == 200
+        return response.get_json()['data']
+
+    body = nearby('radius_km=5&limit=100')
+    assert [item['org_id'] for item in body] == expected(5)
+    assert [item['distance_km'] for item in body] == sorted(item['distance_km'] for item in body)
+    assert [item['org_id'] for item in nearby('radius_km=5&limit=3')] == expected(5)[:3]
+    assert [item['org_id'] for item in nearby(f'radius_km=20&limit=100&category_id={category_id}')] == \
+        expected(20, only_category=True)
+
+    # Moving a location re-hashes it, so it is found at its new place
+    moved = locations[-1]
+    moved.latitude, moved.longitude = center
+    db.session.commit()
+    points[-1] = center
+    assert [item['org_id'] for item in nearby('radius_km=1&limit=100')] == expected(1)
+    assert orgs[-1].org_id in expected(1)
+
+    assert client.get('/orgs/nearby?lat=40.7').status_code == 400
+    assert client.get('/orgs/nearby?lat=91&lng=0').status_code == 400
+    assert client.get('/orgs/nearby?lat=0&lng=0&radius_km=501').status_code == 400
+
+
+def _grid():
+    """Every map cluster cell as {(zoom, x, y): (count, sum_lat, sum_lng)}"""
+    return {
+        (cell.zoom, cell.cell_x, cell.cell_y): (cell.count, round(cell.sum_latitude, 6), round(cell.sum_longitude, 6))
+        for cell in db.session.execute(select(MapClusterCell)).scalars()
+    }
+
+
+def test_cluster_grid_follows_org_and_location_writes(client):
+    paris, lyon, nice = (Location(country='FR', city=city, latitude=lat, longitude=lng)
+                         for city, lat, lng in (('Paris', 48.8566, 2.3522), ('Lyon', 45.764, 4.8357),
+                                                ('Nice', 43.7102, 7.262)))
+    db.session.add_all([paris, lyon, nice])
+    db.session.flush()
+    orgs = [Organization(name=f'Clustered {i}', location_id=(paris, lyon)[i % 2].location_id) for i in range(5)]
+    db.session.add_all(orgs)
+    db.session.commit()
+
+    orgs[0].location_id = nice.location_id
+    db.session.commit()
+    lyon.latitude, lyon.longitude = 45.75, 4.85
+    db.session.commit()
+    db.session.delete(orgs[1])
+    db.session.commit()
+
+    incremental = _grid()
+    with db.engine.begin() as connection:
+        ClusterService.rebuild(connection)
+    db.session.expire_all()
+    assert incremental == _grid()
+
+    response = client.get('/orgs/clusters?bbox=-5,41,10,52&zoom=3')
+    assert response.status_code == 200
+    clusters = response.get_json()['data']
+    assert sum(cluster['count'] for cluster in clusters) == 4
+    in_france = {org.org_id for org in orgs[:1] + orgs[2:]}
+    assert all(len(cluster['org_ids']) == min(cluster['count'], 3) and set(cluster['org_ids']) <= in_france
+               for cluster in clusters)
+    assert client.get('/orgs/clusters?bbox=1,2,3').status_code == 400
+
+
+def test_export_streams_every_matching_row_in_both_formats(client, monkeypatch):
+    # Small chunks, so the body is sent in many pieces
+    monkeypatch.setattr(ExportService, 'FLUSH_BYTES', 512)
+    monkeypatch.setattr(ExportService, 'YIELD_PER', 7)
+    category_id = Category.query.order_by(Category.category_id).first().category_id
+    expected = db.session.execute(
+        select(Organization.org_id, Organization.name)
+        .where(Organization.category_id == category_id).order_by(Organization.org_id)
+    ).all()
+
+    response = client.get(f'/orgs/export?format=ndjson&category_id={category_id}')
+    assert response.status_code == 200 and response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    chunks = list(response.response)
+    assert len(chunks) > 1
+    rows = [json.loads(line) for line in b''.join(chunks).decode('utf-8').splitlines()]
+    assert [(row['org_id'], row['name']) for row in rows] == [tuple(row) for row in expected]
+    assert 'created_at' in rows[0] and 'description' in rows[0]
+
+    response = client.get(f'/orgs/export?format=csv&gzip=true&category_id={category_id}')
+    assert response.headers['Content-Encoding'] == 'gzip'
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(response.get_data()).decode('utf-8'))))
+    assert [(int(row['org_id']), row['name']) for row in rows] == [tuple(row) for row in expected]
+
+    assert client.get('/orgs/export?format=xml').status_code == 400
+
+
+def test_compiled_serializers_match_the_objects_they_read(client):
+    fields = ('org_id', 'name', 'status', 'created_at', 'view_count')
+    serializer = serializer_for(Organization, fields, nested=[('category', ('category_id', 'name'))])
+    assert serializer_for(Organization, list(fields), nested=[('category', ['category_id', 'name'])]) is serializer
+
+    orgs = Organization.query.order_by(Organization.org_id).limit(3).all()
+    orgs[0].category = None
+    for org, item in zip(orgs, serializer.many(orgs)):
+        assert list(item) == list(fields) + ['category']
+        assert {name: item[name] for name in fields} == {name: getattr(org, name) for name in fields}
+        assert item['category'] == (None if org.category is None else
+                                    {'category_id': org.category.category_id, 'name': org.category.name})
+    db.session.rollback()
+
+    flat = serializer_for(Organization, fields)
+    rows = db.session.execute(select(*flat.columns()).where(Organization.org_id.in_([org.org_id for org in orgs]))
+                              .order_by(Organization.org_id)).all()
+    assert flat.tuples(rows) == flat.many(orgs)
+    assert [item['created_at'] for item in loads(flat.dumps(orgs))] == [org.created_at.isoformat() for org in orgs]
+
+    aliased = serializer_for(User, ('id', 'email'), aliases={'id': 'user_id'})
+    admin = User.query.first()
+    assert aliased.one(admin) == {'id': admin.user_id, 'email': admin.email}
+    with pytest.raises(ValueError):
+        serializer_for(Organization, ('name', '__class__.__name__'))
+    with pytest.raises(ValueError):
+        serializer_for(Organization, ('name',), nested=[('admin_user_id', ('name',))])
+
+
+def test_list_pages_reencode_only_the_rows_that_changed(client, cache, monkeypatch):
+    serialized = []
+    serialize = orgs_routes._serialize_organizations
+
+    def recording(org_ids, *args):
+        serialized.append(sorted(org_ids))
+        return serialize(org_ids, *args)
+
+    monkeypatch.setattr(orgs_routes, '_serialize_organizations', recording)
+    url = '/orgs/?limit=5&sort=created_at'
+    first = client.get(url).get_json()['data']
+    page_ids = [item['org_id'] for item in first]
+    assert serialized == [sorted(page_ids)]
+
+    assert client.get(url).get_json()['data'] == first
+    assert len(serialized) == 1
+
+    org = db.session.get(Organization, page_ids[2])
+    org.website = 'https://fragments.example.org'
+    db.session.commit()
+    changed = client.get(url).get_json()['data']
+    assert serialized[1:] == [[org.org_id]]
+    assert changed[2]['website'] == 'https://fragments.example.org'
+    assert changed[:2] + changed[3:] == first[:2] + first[3:]
+
+    # Another fieldset is another set of fragments
+    assert set(client.get(url + '&fields=org_id,name').get_json()['data'][0]) == {'org_id', 'name'}
+    assert serialized[2:] == [sorted(page_ids)]
+
+
+def test_suggestions_follow_writes_and_match_a_fresh_index(client, monkeypatch):
+    # Every prefix below goes through the cached, patched top lists
+    monkeypatch.setattr(suggest_service, 'SCAN_LIMIT', 1)
+    monkeypatch.setattr(SuggestService, '_index', None)
+
+    def suggested(q):
+        response = client.get(f'/orgs/suggest?q={q}&limit=5')
+        assert response.status_code == 200
+        return [item['org_id'] for item in response.get_json()['organizations']]
+
+    def rebuilt(q):
+        with db.engine.connect() as connection:
+            return OrganizationIndex(SuggestService._rows(connection)).search(q, 5)
+
+    assert suggested('quokka') == []
+    orgs = [Organization(name=f'Quokka Refuge {i}', view_count=i) for i in range(6)]
+    db.session.add_all(orgs)
+    db.session.commit()
+    assert suggested('quok') == rebuilt('quok') == [org.org_id for org in reversed(orgs)][:5]
+    assert suggested('refuge') == rebuilt('refuge')
+
+    orgs[0].verification_level = 'premium'
+    db.session.commit()
+    assert suggested('quok')[0] == orgs[0].org_id
+    orgs[0].verification_level = 'basic'
+    db.session.commit()
+    assert suggested('quok') == rebuilt('quok')
+
+    orgs[5].name = 'Wombat Refuge'
+    db.session.delete(orgs[4])
+    db.session.commit()
+    assert orgs[5].org_id not in suggested('quok')
+    assert suggested('quok') == rebuilt('quok')
+    assert suggested('wombat') == [orgs[5].org_id]
+    assert suggested('refuge') == rebuilt('refuge')
+
+
+def test_duplicate_clusters_follow_organization_writes(client, monkeypatch):
+    monkeypatch.setattr(DuplicateService, '_index', None)
+
+    def cluster_of(org_id):
+        return next(((members, reasons) for members, reasons in DuplicateService.clusters() if org_id in members),
+                    ([org_id], []))
+
+    DuplicateService.index()
+    # Written after the index was built, so they reach it through the commit hook
+    pantry = Organization(name='Harbor Food Pantry', address='12 North Main Street', email='hello@harborpantry.org')
+    twin = Organization(name='The Harbor Food Pantry Inc.', address='12 N Main St')
+    alias = Organization(name='HFP Warehouse', email='Hello+donations@HarborPantry.org')
+    db.session.add_all([pantry, twin, alias])
+    db.session.commit()
+
+    members, reasons = cluster_of(pantry.org_id)
+    assert members == sorted([pantry.org_id, twin.org_id, alias.org_id])
+    assert {'name', 'email'} <= set(reasons)
+    assert [match['org_id'] for match in DuplicateService.find({'name': 'Harbor Food Pantry'})][:2] == \
+        sorted([pantry.org_id, twin.org_id])
+
+    alias.email = 'info@hfp-warehouse.org'
+    db.session.commit()
+    assert cluster_of(pantry.org_id)[0] == sorted([pantry.org_id, twin.org_id])
+    assert cluster_of(alias.org_id)[0] == [alias.org_id]
+
+    db.session.delete(twin)
+    db.session.commit()
+    assert cluster_of(pantry.org_id)[0] == [pantry.org_id]
+    assert DuplicateService.find({'name': 'Harbor Food Pantry Inc'}, exclude=pantry.org_id) == []
+
+
+def test_trending_scores_decay_and_follow_category_moves_and_deletes(client):
+    category, other = Category(name='Trending Now'), Category(name='Trending Later')
+    db.session.add_all([category, other])
+    db.session.flush()
+    old, steady, fresh = (Organization(name=f'Trending {name}', status='approved', category_id=category.category_id)
+                          for name in ('Old', 'Steady', 'Fresh'))
+    db.session.add_all([old, steady, fresh])
+    db.session.commit()
+
+    # Two half-lives ago 12 views were worth what 3 are now
+    now = datetime.utcnow()
+    with db.engine.begin() as connection:
+        TrendingService.record(connection, {(old.org_id, 'view_count'): 12}, now=now - timedelta(hours=48))
+        TrendingService.record(connection, {(steady.org_id, 'view_count'): 4, (fresh.org_id, 'bookmark_count'): 1,
+                                            (old.org_id, 'bookmark_count'): -1}, now=now)
+
+    def trending(category_id):
+        return [(item['org_id'], item['trend_score'])
+                for item in client.get(f'/orgs/trending?category={category_id}&limit=100').get_json()['data']]
+
+    assert trending(category.category_id) == [
+        (fresh.org_id, pytest.approx(5, abs=0.01)), (steady.org_id, pytest.approx(4, abs=0.01)),
+        (old.org_id, pytest.approx(3, abs=0.01)),
+    ]
+    score_log = db.session.get(OrganizationTrend, steady.org_id).score_log
+    assert TrendingService.score(score_log, now + timedelta(hours=24)) == pytest.approx(2)
+
+    fresh.category_id = other.category_id
+    db.session.delete(steady)
+    db.session.commit()
+    assert [org_id for org_id, _ in trending(category.category_id)] == [old.org_id]
+    assert [org_id for org_id, _ in trending(other.category_id)] == [fresh.org_id]
+    assert db.session.get(OrganizationTrend, steady.org_id) is None
+
+
+@pytest.fixture
+def events(monkeypatch):
+    with monkeypatch.context() as patch:
+        patch.setitem(flask_app.config, 'EVENTS_QUEUE_SIZE', 3)
+        patch.setitem(flask_app.config, 'EVENTS_MAX_SUBSCRIBERS', 1)
+        patch.setitem(flask_app.config, 'EVENTS_HEARTBEAT', 0.05)
+        EventService.init_app(flask_app)
+        yield EventService
+    EventService.init_app(flask_app)
+
+
+def _sse_messages(chunk):
+    """(event, data) of each message in a chunk of the stream"""
+    messages = []
+    for block in chunk.decode('utf-8').split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+        if 'event' in fields:
+            messages.append((fields['event'], json.loads(fields['data'])))
+    return messages
+
+
+def test_event_stream_delivers_committed_writes_of_the_requested_types(client, events):
+    assert client.get('/events/orgs?types=created,renamed').status_code == 400
+    response = client.get('/events/orgs?types=created,approved,deleted')
+    assert response.mimetype == 'text/event-stream'
+    stream = iter(response.response)
+    assert next(stream) == b'retry: 5000\n\n'
+    assert client.get('/events/orgs').status_code == 503
+
+    org = Organization(name='Streamed Charity')
+    db.session.add(org)
+    db.session.commit()
+    org.description = 'Not a requested event type'
+    org.view_count = 5
+    db.session.commit()
+    org.status = 'approved'
+    db.session.commit()
+    db.session.delete(org)
+    db.session.commit()
+
+    received = []
+    while len(received) < 3:
+        received.extend(_sse_messages(next(stream)))
+    assert [(kind, data['type'], data['org_id'], data['name']) for kind, data in received] == [
+        ('created', 'created', org.org_id, 'Streamed Charity'),
+        ('approved', 'approved', org.org_id, 'Streamed Charity'),
+        ('deleted', 'deleted', org.org_id, 'Streamed Charity'),
+    ]
+    assert received[1][1]['fields'] == ['status']
+    assert next(stream) == b': keep-alive\n\n'
+
+    # A client that falls behind is told how much it missed
+    db.session.add_all(Organization(name=f'Burst {i}') for i in range(5))
+    db.session.commit()
+    burst = []
+    while len(burst) < 4:
+        burst.extend(_sse_messages(next(stream)))
+    assert burst[0] == ('overflow', {'dropped': 2})
+    assert [data['name'] for _, data in burst[1:]] == ['Burst 2', 'Burst 3', 'Burst 4']
+
+    response.close()
+    assert events.metrics()['connections'] == 0
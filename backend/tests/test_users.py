@@ -0,0 +1,143 @@
+# Add unit tests for user routes and services here
+
+import threading
+from datetime import datetime
+
+import pytest
+from flask import jsonify
+
+from app import app as flask_app
+from app.db import db
+from app.models import User
+from app.services.password_service import PasswordService
+from app.services.version_service import VersionService
+
+PASSWORD = 'member-password'
+
+
+@pytest.fixture(scope='module')
+def client():
+    with flask_app.app_context():
+        db.create_all()
+        password_hash = PasswordService.hash(PASSWORD)
+        db.session.add_all(
+            User(name=f'Member {i:02d}', email=f'member{i:02d}@example.com', password_hash=password_hash,
+                 role='admin' if i % 5 == 0 else 'visitor')
+            for i in range(25)
+        )
+        db.session.commit()
+        yield flask_app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+def _record_login(email):
+    # What AuthService does on every Google sign-in
+    user = User.query.filter_by(email=email).one()
+    user.last_login = datetime.utcnow()
+    db.session.commit()
+
+
+def test_logins_leave_listings_without_last_login_valid(client):
+    listing = client.get('/users/?fields=summary')
+    version = VersionService.get('users')[0]
+
+    _record_login('member03@example.com')
+
+    assert VersionService.get('users')[0] == version
+    assert client.get('/users/?fields=summary',
+                      headers={'If-None-Match': listing.headers['ETag']}).status_code == 304
+
+
+def test_logins_change_listings_that_show_last_login(client):
+    listing = client.get('/users/?fields=user_id,last_login')
+
+    _record_login('member04@example.com')
+
+    response = client.get('/users/?fields=user_id,last_login', headers={'If-None-Match': listing.headers['ETag']})
+    assert response.status_code == 200
+    assert any(user['last_login'] for user in response.get_json()['data'])
+
+
+def test_listed_column_changes_bump_the_users_version(client):
+    version = VersionService.get('users')[0]
+    user = User.query.filter_by(email='member05@example.com').one()
+    user.name = 'Member Renamed'
+    db.session.commit()
+    assert VersionService.get('users')[0] == version + 1
+
+
+@pytest.fixture
+def saturate_hashing(monkeypatch):
+    """Call to take every hashing slot, as a login burst would"""
+    def saturate():
+        monkeypatch.setattr(PasswordService, '_workers', 1)
+        monkeypatch.setattr(PasswordService, '_slots', threading.BoundedSemaphore(1))
+        PasswordService._slots.acquire()
+    return saturate
+
+
+def test_saturated_hashing_answers_signups_with_503(client, saturate_hashing):
+    saturate_hashing()
+    response = client.post('/users/', json={'name': 'Newcomer', 'email': 'newcomer@example.com',
+                                            'password': 'newcomer-password'})
+    assert response.status_code == 503
+    assert User.query.filter_by(email='newcomer@example.com').first() is None
+
+
+def test_saturated_hashing_answers_password_changes_with_503(client, saturate_hashing):
+    token = client.post('/auth/login', json={'email': 'member07@example.com', 'password': PASSWORD})
+    headers = {'Authorization': f"Bearer {token.get_json()['token']}"}
+    saturate_hashing()
+
+    response = client.put('/users/profile', json={'name': 'Member Seven', 'password': 'changed-password'},
+                          headers=headers)
+    assert response.status_code == 503
+    db.session.expire_all()
+    assert User.query.filter_by(email='member07@example.com').one().name == 'Member 07'
+
+
+def test_datetimes_are_iso_8601_in_every_json_response(client):
+    user = User.query.filter_by(email='member08@example.com').one()
+    body = client.get(f'/users/{user.user_id}?fields=user_id,created_at').get_json()
+    assert body['created_at'] == user.created_at.isoformat()
+
+    # Not Flask's default HTTP date ('Wed, 01 May 2024 09:30:00 GMT')
+    with flask_app.test_request_context():
+        assert jsonify({'at': datetime(2024, 5, 1, 9, 30)}).get_json() == {'at': '2024-05-01T09:30:00'}
+
+
+def _all_pages(client, url):
+    """Every user on every page of a listing, following the next links"""
+    users, body = [], client.get(url).get_json()
+    users.extend(body['data'])
+    while body['next']:
+        body = client.get(body['next']).get_json()
+        users.extend(body['data'])
+    return users
+
+
+def test_user_search_matches_name_or_email_prefixes_with_totals(client):
+    by_email = _all_pages(client, '/users/?q=MEMBER1&fields=email&limit=4&sort=email')
+    assert [user['email'] for user in by_email] == [f'member{i}@example.com' for i in range(10, 20)]
+
+    body = client.get('/users/?q=member 2&fields=name&count=exact').get_json()
+    assert sorted(user['name'] for user in body['data']) == [f'Member {i}' for i in range(20, 25)]
+    assert (body['total'], body['total_is_estimate']) == (5, False)
+
+    # SQLite has no planner statistics, so an estimate is an exact count
+    body = client.get('/users/?q=member1&role=admin&fields=email&count=estimate').get_json()
+    assert sorted(user['email'] for user in body['data']) == ['member10@example.com', 'member15@example.com']
+    assert body['total'] == 2
+
+    # A prefix, not a LIKE pattern
+    assert client.get('/users/?q=member_&count=exact').get_json()['total'] == 0
+    assert 'total' not in client.get('/users/?q=member1').get_json()
+    assert client.get('/users/?count=roughly').status_code == 400
+
+    listing = client.get('/users/?q=member3&count=exact')
+    db.session.add(User(name='Member 30', email='member30@example.com', password_hash='x'))
+    db.session.commit()
+    response = client.get('/users/?q=member3&count=exact', headers={'If-None-Match': listing.headers['ETag']})
+    assert response.status_code == 200
+    assert response.get_json()['total'] == listing.get_json()['total'] + 1